@@ -3,11 +3,15 @@ from tkinter import ttk
 from tkinter import messagebox
 from tkcalendar import DateEntry
 from datetime import datetime
+import queue
 import subprocess
+import threading
 
-from config_manager import load_config, save_config
+from config_manager import load_config, load_settings, save_config
 from version import VERSION
-from service_task_analyzer import TaskAnalyzer
+
+# 分析スレッドからの進捗を確認する間隔(ミリ秒)
+POLL_INTERVAL_MS = 100
 
 
 class TaskAnalyzerGUI:
@@ -15,19 +19,98 @@ class TaskAnalyzerGUI:
         self.root = root
         self.root.title(f'業務分析 v{VERSION}')
         self.config = load_config()
-        self.analyzer = TaskAnalyzer()
+        # polars などの重いライブラリを読み込む TaskAnalyzer は初回の利用時に作成する
+        self.analyzer = None
+        self.analyzer_settings = None
+        self.analyzer_lock = threading.Lock()
+        # 分析は別スレッドで実行し、進捗と結果はキューを通じてメインスレッドで受け取る
+        self.worker = None
+        self.cancel_event = threading.Event()
+        self.messages = queue.Queue()
+        self.watcher = None
+        self.watcher_lock = threading.Lock()
+        # 監視モードで集計し直す期間（前回の分析期間）
+        self.watch_range = (
+            self.config.get('Analysis', 'start_date', fallback=None),
+            self.config.get('Analysis', 'end_date', fallback=None),
+        )
 
         window_width = self.config.getint('Appearance', 'window_width')
         window_height = self.config.getint('Appearance', 'window_height')
         self.root.geometry(f"{window_width}x{window_height}")
 
         self._setup_gui()
+        # 画面を表示した後に、分析に使うライブラリを別スレッドで読み込んでおく
+        self.root.after_idle(self._start_prewarm)
+
+    def get_analyzer(self):
+        """TaskAnalyzer を返す。初回の呼び出しで分析に使うモジュールを読み込んで作成する
+
+        設定ファイル（業務分類・期間別集計・トレース・監視などを含む）が編集されて Settings が変わった場合は
+        作成し直し、監視も新しい設定でやり直す。画面が保存する分析期間は Settings に含まないため、
+        分析期間の保存では作成し直さない。
+        """
+        with self.analyzer_lock:
+            # 設定ファイルの更新日時が変わっていなければ前回の Settings が返る
+            settings = load_settings()
+            if self.analyzer is not None and settings == self.analyzer_settings:
+                return self.analyzer
+
+            from service_task_analyzer import TaskAnalyzer
+            if self.analyzer is not None:
+                # 画面で分析期間を保存する際に、編集された内容を上書きしないよう読み込み直す
+                self.config = load_config()
+            self.analyzer = TaskAnalyzer(settings)
+            self.analyzer_settings = settings
+            analyzer = self.analyzer
+        self._start_watcher(settings)
+        return analyzer
+
+    def _start_prewarm(self):
+        threading.Thread(target=self._prewarm, daemon=True).start()
+
+    def _prewarm(self):
+        """読み込みスレッドで実行する。Tkの操作は行わない"""
+        try:
+            self.get_analyzer()
+        except Exception as e:
+            # 分析開始の時点で改めて作成し、エラーを表示する
+            print(f"分析の準備中にエラーが発生しました: {e}")
+
+    def _start_watcher(self, settings):
+        """[Analysis] watch が有効な場合、入力のブックが更新されるたびに前回の期間を集計し直す
+
+        集計結果はメモリに保持され、分析開始では結果の出力だけを行う。
+        監視中の場合は止めてから、settings の監視の間隔・入力ファイルで監視し直す。
+        """
+        from service_workbook_watcher import WorkbookWatcher
+
+        with self.watcher_lock:
+            if self.watcher is not None:
+                self.watcher.stop()
+                self.watcher = None
+            interval = settings.analysis.watch_interval
+            if interval is None:
+                return
+            self.watcher = WorkbookWatcher(settings.paths.input_file_path, self._refresh_prepared, interval)
+            self.watcher.start()
+
+    def _refresh_prepared(self):
+        """監視スレッドで実行する。Tkの操作は行わない"""
+        start_date_str, end_date_str = self.watch_range
+        if not start_date_str or not end_date_str:
+            return
+        self.get_analyzer().prepare(
+            datetime.strptime(start_date_str, '%Y-%m-%d'),
+            datetime.strptime(end_date_str, '%Y-%m-%d')
+        )
 
     def _setup_gui(self):
         main_frame = ttk.Frame(self.root, padding="10")
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
         self._setup_date_frame(main_frame)
+        self._setup_progress(main_frame)
         self._setup_buttons(main_frame)
 
     def _setup_date_frame(self, parent):
@@ -46,16 +129,27 @@ class TaskAnalyzerGUI:
                                   locale='ja_JP', date_pattern='yyyy/mm/dd')
         self.end_date.grid(row=1, column=1, padx=5, pady=5)
 
+    def _setup_progress(self, parent):
+        self.progress_bar = ttk.Progressbar(parent, mode='determinate', length=250)
+        self.progress_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        self.status_label = ttk.Label(parent, text="")
+        self.status_label.grid(row=3, column=0, columnspan=2, pady=5)
+
     def _setup_buttons(self, parent):
-        ttk.Button(parent, text="分析開始", command=self.start_analysis).grid(
-            row=3, column=0, columnspan=2, pady=10)
+        self.start_button = ttk.Button(parent, text="分析開始", command=self.start_analysis)
+        self.start_button.grid(row=4, column=0, columnspan=2, pady=10)
+        self.cancel_button = ttk.Button(parent, text="キャンセル", command=self.cancel_analysis, state='disabled')
+        self.cancel_button.grid(row=5, column=0, columnspan=2, pady=5)
         ttk.Button(parent, text="設定ファイル", command=self.open_config).grid(
-            row=4, column=0, columnspan=2, pady=5)
+            row=6, column=0, columnspan=2, pady=5)
         ttk.Button(parent, text="閉じる", command=self.root.quit).grid(
-            row=5, column=0, columnspan=2, pady=5)
+            row=7, column=0, columnspan=2, pady=5)
 
     def start_analysis(self):
         """GUIから分析を開始するメソッド"""
+        if self.worker is not None and self.worker.is_alive():
+            return
+
         try:
             start_date = self.start_date.get_date()
             end_date = self.end_date.get_date()
@@ -73,19 +167,85 @@ class TaskAnalyzerGUI:
                 'end_date': end_date.strftime('%Y-%m-%d')
             })
             save_config(self.config)
+            self.watch_range = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
 
-            # 分析の実行
-            success, error_message = self.analyzer.run_analysis(
-                start_date.strftime('%Y-%m-%d'),
-                end_date.strftime('%Y-%m-%d')
+            # 分析の実行（画面が固まらないよう別スレッドで実行する）
+            self.cancel_event = threading.Event()
+            self.worker = threading.Thread(
+                target=self._run_worker,
+                args=(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), self.cancel_event),
+                daemon=True
             )
-
-            if not success:
-                messagebox.showerror("エラー", error_message)
+            self._set_running(True)
+            self.worker.start()
+            self.root.after(POLL_INTERVAL_MS, self._poll_analysis)
 
         except Exception as e:
+            self._set_running(False)
             messagebox.showerror("エラー", f"予期せぬエラーが発生しました：\n{str(e)}")
 
+    def cancel_analysis(self):
+        self.cancel_event.set()
+        self.cancel_button.configure(state='disabled')
+        self.status_label.configure(text="キャンセルしています...")
+
+    def _run_worker(self, start_date_str, end_date_str, cancel_event):
+        """分析スレッドで実行する。Tkの操作は行わず、進捗と結果をキューに入れる"""
+        try:
+            result = self.get_analyzer().run_analysis(
+                start_date_str,
+                end_date_str,
+                progress_callback=lambda *progress: self.messages.put(('progress', progress)),
+                cancel_event=cancel_event
+            )
+        except Exception as e:
+            result = (False, f"予期せぬエラーが発生しました：\n{str(e)}", None)
+        self.messages.put(('done', result))
+
+    def _poll_analysis(self):
+        """キューに溜まった進捗を画面に反映し、分析が終わっていなければ再度予約する"""
+        result = None
+        while True:
+            try:
+                kind, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self._show_progress(*value)
+            else:
+                result = value
+
+        if result is None:
+            self.root.after(POLL_INTERVAL_MS, self._poll_analysis)
+            return
+
+        self._set_running(False)
+        success, message, report = result
+        if success:
+            self.status_label.configure(text=f"完了（{report.total_seconds:.1f}秒）")
+        elif self.cancel_event.is_set():
+            self.status_label.configure(text=message)
+        else:
+            self.status_label.configure(text="")
+            messagebox.showerror("エラー", message)
+
+    def _show_progress(self, stage, done, total):
+        if total:
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate', maximum=total, value=done)
+            self.status_label.configure(text=f"{stage} {done}/{total}")
+        else:
+            # 件数のない段階は終了まで動き続ける表示にする
+            self.progress_bar.configure(mode='indeterminate')
+            self.progress_bar.start()
+            self.status_label.configure(text=f"{stage}中...")
+
+    def _set_running(self, running):
+        self.start_button.configure(state='disabled' if running else 'normal')
+        self.cancel_button.configure(state='normal' if running else 'disabled')
+        if not running:
+            self.progress_bar.stop()
+            self.progress_bar.configure(mode='determinate', value=0)
 
     def open_config(self):
         config_path = self.config.get('PATHS', 'config_path')
@@ -0,0 +1,71 @@
+"""業務内容・氏名の列を文字列型とカテゴリ型で保持した場合のメモリ使用量と集計時間を比較する
+
+実行方法:
+    python benchmarks/categorical_strings.py [行数]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from service_data_analyzer import TaskDataAnalyzer  # noqa: E402
+from task_records import to_categorical  # noqa: E402
+
+DEFAULT_ROWS = 2_000_000
+CONTENT_COUNT = 300
+NAME_COUNT = 50
+REPEAT = 5
+
+
+def create_records(rows, seed=0):
+    """1年分のシートを想定し、数百種類の業務内容と氏名が繰り返されるデータを作成する"""
+    rng = random.Random(seed)
+    contents = [f'クラーク業務{i}' if i % 3 == 0 else f'業務内容{i}' for i in range(CONTENT_COUNT)]
+    names = [f'担当者{i}' for i in range(NAME_COUNT)]
+    start = datetime(2024, 1, 1)
+    return pl.DataFrame({
+        'date': [start + timedelta(days=rng.randrange(365)) for _ in range(rows)],
+        'name': [rng.choice(names) for _ in range(rows)],
+        'content': [rng.choice(contents) for _ in range(rows)],
+        'minutes': [float(rng.randrange(5, 120, 5)) for _ in range(rows)],
+    })
+
+
+def measure(data_frame):
+    """集計を REPEAT 回実行し、最短の時間(秒)を返す"""
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        TaskDataAnalyzer.aggregate_dataframe(data_frame)
+        TaskDataAnalyzer.aggregate_dataframe(data_frame, group_by_col='name')
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    string_df = create_records(rows)
+    categorical_df = to_categorical(string_df)
+
+    # 集計結果は列の型によらず同じ（合計時間が同じ行の順序は不定のため並べ替えて比較する）
+    string_result, categorical_result = (
+        TaskDataAnalyzer.aggregate_dataframe(data_frame).sort(pl.all())
+        for data_frame in (string_df, categorical_df)
+    )
+    assert string_result.equals(categorical_result)
+
+    print(f'行数: {rows:,}  業務内容: {CONTENT_COUNT}種類  氏名: {NAME_COUNT}種類')
+    print(f'{"列の型":<12}{"メモリ(MB)":>12}{"集計(ms)":>12}')
+    for label, data_frame in (('String', string_df), ('Categorical', categorical_df)):
+        size = data_frame.estimated_size('mb')
+        elapsed = measure(data_frame) * 1000
+        print(f'{label:<12}{size:>12.1f}{elapsed:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""作成したWILLDOリストで読み込み・集計・出力の時間をシート数ごとに計測し、結果をJSONで保存する
+
+読み込みは毎回キャッシュを使わずに行う。行範囲・読み込み方式・出力方式は config.ini の設定を使う。
+あわせて起動時のモジュールの読み込み時間（startup.py）も計測する。
+
+実行方法:
+    python benchmarks/pipeline.py [--sheets 30 365 1500] [--repeat 3] [--output 保存先.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_manager import create_config_parser, load_config, read_settings  # noqa: E402
+from service_data_analyzer import TaskDataAnalyzer  # noqa: E402
+from service_excel_reader import ExcelTaskReader  # noqa: E402
+from service_excel_writer import RESULT_SHEET_NAMES, ExcelResultWriter  # noqa: E402
+from startup import STARTUP_MODULES, measure_startup  # noqa: E402
+from willdo_generator import generate_workbook  # noqa: E402
+
+SHEET_COUNTS = (30, 365, 1500)
+DEFAULT_REPEAT = 3
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / 'results' / 'pipeline.json'
+START_DATE = datetime(2024, 1, 1)
+
+# 計測する段階（結果のJSONのキー）
+STAGES = ('read_workbook', 'analyze', 'save_results')
+
+
+def create_benchmark_config(config=None):
+    """config.ini の [Analysis] を使い、読み込みキャッシュだけを無効にした設定を返す"""
+    source = config or load_config()
+    config = create_config_parser()
+    config['Analysis'] = dict(source['Analysis']) if source.has_section('Analysis') else {}
+    config['Analysis']['use_cache'] = 'false'
+    return config
+
+
+def create_template(path):
+    """結果を書き込むシートと見出し行だけのテンプレートを作成する"""
+    wb = Workbook()
+    wb.active.title = 'Sheet'
+    for sheet_name in RESULT_SHEET_NAMES:
+        wb.create_sheet(sheet_name).append(['content', 'total_minutes', 'total_hours', 'frequency'])
+    wb.save(path)
+    return path
+
+
+def measure(func, repeat):
+    """func を repeat 回実行し、(最後の戻り値, 各回の時間(秒)のリスト) を返す"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+def summarize_timings(timings):
+    return {'median': statistics.median(timings), 'min': min(timings), 'runs': timings}
+
+
+def benchmark_sheet_count(settings, workdir, sheet_count, repeat, template_path):
+    """sheet_count 日分のブックで3つの段階を計測する"""
+    reader = ExcelTaskReader(settings)
+    workbook_path = generate_workbook(
+        workdir / f'WILLDOリスト_{sheet_count}.xlsx', sheet_count, row_bands=reader.get_row_bands()
+    )
+    end_date = datetime.max
+
+    records, read_timings = measure(lambda: reader.read_workbook(workbook_path, START_DATE, end_date), repeat)
+    tasks, daily_tasks, comm_tasks, all_items, actual_start_date, actual_end_date = records
+
+    analyzer = TaskDataAnalyzer()
+    (analysis_results, extra_sheets), analyze_timings = measure(
+        lambda: analyzer.analyze(tasks, daily_tasks, comm_tasks, all_items), repeat
+    )
+
+    writer_backend = settings.analysis.writer_backend
+    _, write_timings = measure(
+        lambda: ExcelResultWriter.save_results(
+            analysis_results, template_path, workdir / 'output',
+            datetime.strptime(actual_start_date, '%Y%m%d'), datetime.strptime(actual_end_date, '%Y%m%d'),
+            extra_sheets, backend=writer_backend, open_output=False
+        ),
+        repeat
+    )
+
+    return {
+        'rows': all_items.height + comm_tasks.height,
+        'workbook_bytes': workbook_path.stat().st_size,
+        'stages': {
+            'read_workbook': summarize_timings(read_timings),
+            'analyze': summarize_timings(analyze_timings),
+            'save_results': summarize_timings(write_timings),
+        },
+    }
+
+
+def run_benchmarks(sheet_counts=SHEET_COUNTS, repeat=DEFAULT_REPEAT, config=None):
+    """シート数ごとの計測結果を、実行環境と設定とともに辞書で返す"""
+    settings = read_settings(create_benchmark_config(config))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        template_path = create_template(workdir / 'template.xlsx')
+        for sheet_count in sheet_counts:
+            results[str(sheet_count)] = benchmark_sheet_count(settings, workdir, sheet_count, repeat, template_path)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'polars': pl.__version__,
+            'platform': platform.platform(),
+        },
+        'settings': {
+            'reader_backend': settings.analysis.reader_backend,
+            'writer_backend': settings.analysis.writer_backend,
+            'workers': str(settings.analysis.workers),
+            'repeat': repeat,
+        },
+        'results': results,
+        'startup': measure_startup(repeat),
+    }
+
+
+def format_results(benchmark):
+    lines = [f'{"シート数":>8}{"行数":>10}' + ''.join(f'{stage + "(ms)":>20}' for stage in STAGES)]
+    for sheet_count, result in benchmark['results'].items():
+        medians = ''.join(f'{result["stages"][stage]["median"] * 1000:>20.1f}' for stage in STAGES)
+        lines.append(f'{sheet_count:>8}{result["rows"]:>10,}{medians}')
+    for module in STARTUP_MODULES:
+        lines.append(f'起動（import {module}）: {benchmark["startup"][module]["median"] * 1000:.1f}ms')
+    return '\n'.join(lines)
+
+
+def save_results(benchmark, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(benchmark, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description='読み込み・集計・出力の時間をシート数ごとに計測する')
+    parser.add_argument('--sheets', nargs='+', type=int, default=list(SHEET_COUNTS), help='計測するシート数')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='各段階を実行する回数')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='結果のJSONの保存先')
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    benchmark = run_benchmarks(args.sheets, args.repeat)
+    print(format_results(benchmark))
+    print(f'結果を保存しました: {save_results(benchmark, args.output)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
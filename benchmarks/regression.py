@@ -0,0 +1,143 @@
+"""読み込み・集計・出力の時間を基準値（baseline.json）と比較し、遅くなった段階があれば失敗する
+
+基準値のシート数で pipeline.py と同じ計測を行い、各段階の中央値が基準値の (1 + 閾値) 倍を超えた場合を
+遅くなったとみなす。数ミリ秒の揺らぎで失敗しないよう、差が NOISE_SECONDS 未満の場合は無視する。
+
+実行方法:
+    python benchmarks/regression.py [--threshold 0.25]
+    # 意図して速度が変わった場合に基準値を更新する
+    python benchmarks/regression.py --update-baseline
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from pipeline import DEFAULT_REPEAT, SHEET_COUNTS, STAGES, run_benchmarks, save_results  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+THRESHOLD_ENV_VAR = 'TASK_ANALYZER_BENCHMARK_THRESHOLD'
+DEFAULT_THRESHOLD = 0.25
+NOISE_SECONDS = 0.005
+
+
+def get_threshold(value=None):
+    """閾値（基準値に対して許容する遅くなった割合）。指定がなければ環境変数、既定は0.25"""
+    if value is None:
+        value = os.environ.get(THRESHOLD_ENV_VAR, DEFAULT_THRESHOLD)
+    return float(value)
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_sheet_counts(baseline):
+    return [int(sheet_count) for sheet_count in baseline['results']]
+
+
+def describe_regression(label, median, expected_median, threshold):
+    """基準値の (1 + threshold) 倍を超えて遅くなった場合はその説明、そうでなければNoneを返す"""
+    if median > expected_median * (1 + threshold) and median - expected_median >= NOISE_SECONDS:
+        return (
+            f"{label}: {median * 1000:.1f}ms "
+            f"（基準値 {expected_median * 1000:.1f}ms の {median / expected_median:.2f}倍）"
+        )
+    return None
+
+
+def find_regressions(benchmark, baseline, threshold):
+    """遅くなった段階の説明のリストを返す。空の場合は基準値の範囲内"""
+    settings, expected_settings = (
+        {key: value for key, value in result['settings'].items() if key != 'repeat'}
+        for result in (benchmark, baseline)
+    )
+    if settings != expected_settings:
+        return [f"計測の設定が基準値と異なります: {settings} != {expected_settings}"]
+
+    regressions = []
+    for sheet_count, expected in baseline['results'].items():
+        result = benchmark['results'].get(sheet_count)
+        if result is None:
+            regressions.append(f"{sheet_count}シートの計測結果がありません")
+            continue
+        for stage in STAGES:
+            regressions.append(describe_regression(
+                f"{sheet_count}シートの{stage}",
+                result['stages'][stage]['median'], expected['stages'][stage]['median'], threshold
+            ))
+
+    for module, expected in baseline.get('startup', {}).items():
+        regressions.append(describe_regression(
+            f"起動（import {module}）", benchmark['startup'][module]['median'], expected['median'], threshold
+        ))
+    return [regression for regression in regressions if regression]
+
+
+def format_comparison(benchmark, baseline):
+    lines = [f'{"シート数":>8}{"段階":>24}{"基準値(ms)":>14}{"今回(ms)":>12}{"比":>8}']
+    for sheet_count, expected in baseline['results'].items():
+        result = benchmark['results'].get(sheet_count)
+        if result is None:
+            continue
+        for stage in STAGES:
+            median = result['stages'][stage]['median']
+            expected_median = expected['stages'][stage]['median']
+            lines.append(
+                f'{sheet_count:>8}{stage:>24}{expected_median * 1000:>14.1f}{median * 1000:>12.1f}'
+                f'{median / expected_median:>8.2f}'
+            )
+    for module, expected in baseline.get('startup', {}).items():
+        median = benchmark['startup'][module]['median']
+        lines.append(
+            f'{"起動":>8}{module:>24}{expected["median"] * 1000:>14.1f}{median * 1000:>12.1f}'
+            f'{median / expected["median"]:>8.2f}'
+        )
+    return '\n'.join(lines)
+
+
+def check(baseline_path=BASELINE_PATH, threshold=None, repeat=None):
+    """基準値と同じ条件で計測し、(計測結果, 遅くなった段階の説明のリスト) を返す"""
+    baseline = load_baseline(baseline_path)
+    repeat = repeat or baseline['settings'].get('repeat', DEFAULT_REPEAT)
+    benchmark = run_benchmarks(get_sheet_counts(baseline), repeat)
+    return benchmark, find_regressions(benchmark, baseline, get_threshold(threshold))
+
+
+def update_baseline(baseline_path=BASELINE_PATH, sheet_counts=SHEET_COUNTS, repeat=DEFAULT_REPEAT):
+    """計測し直した結果で基準値を置き換える"""
+    return save_results(run_benchmarks(sheet_counts, repeat), baseline_path)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(description='読み込み・集計・出力の時間を基準値と比較する')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help='基準値のJSONのパス')
+    parser.add_argument('--threshold', type=float,
+                        help=f'許容する遅くなった割合（省略時は環境変数 {THRESHOLD_ENV_VAR}、既定は{DEFAULT_THRESHOLD}）')
+    parser.add_argument('--repeat', type=int, help='各段階を実行する回数（省略時は基準値と同じ）')
+    parser.add_argument('--update-baseline', action='store_true', help='計測し直して基準値を更新する')
+    parser.add_argument('--sheets', nargs='+', type=int, default=list(SHEET_COUNTS),
+                        help='基準値を更新する場合に計測するシート数')
+    return parser
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+    if args.update_baseline:
+        path = update_baseline(args.baseline, args.sheets, args.repeat or DEFAULT_REPEAT)
+        print(f'基準値を更新しました: {path}')
+        return 0
+
+    benchmark, regressions = check(args.baseline, args.threshold, args.repeat)
+    print(format_comparison(benchmark, load_baseline(args.baseline)))
+    for regression in regressions:
+        print(regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""起動時間の計測。新しいPythonプロセスでモジュールの読み込みにかかる時間を計測する
+
+app_window は画面の表示までに読み込むモジュール、service_task_analyzer は分析を開始するまでに
+読み込むモジュール（polars・openpyxl など）の時間の目安になる。
+
+実行方法:
+    python benchmarks/startup.py [回数]
+"""
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 計測するモジュール（結果のJSONのキー）
+STARTUP_MODULES = ('app_window', 'service_task_analyzer')
+
+_MEASURE_CODE = (
+    'import time\n'
+    'started = time.perf_counter()\n'
+    'import {module}\n'
+    'print(time.perf_counter() - started)\n'
+)
+
+
+def measure_import(module):
+    """新しいプロセスで module の読み込みにかかった時間(秒)を返す"""
+    output = subprocess.run(
+        [sys.executable, '-c', _MEASURE_CODE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_startup(repeat):
+    """モジュールごとの読み込み時間の中央値・最小値・各回の時間を返す"""
+    results = {}
+    for module in STARTUP_MODULES:
+        timings = [measure_import(module) for _ in range(repeat)]
+        results[module] = {'median': statistics.median(timings), 'min': min(timings), 'runs': timings}
+    return results
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for module, result in measure_startup(repeat).items():
+        print(f'{module:<24}{result["median"] * 1000:>10.1f}ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""WILLDOリストと同じ形式のブックを乱数の種から決まった内容で作成する
+
+行範囲は config.ini の [Analysis] と同じ（または指定した）業務・コミュニケーション・デイリータスクの範囲に、
+指定した割合で行を埋める。時間の列には数値のほか、数値の文字列・「*」・数値でない文字列を含める。
+
+実行方法:
+    python benchmarks/willdo_generator.py 出力先.xlsx [シート数]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_manager import load_config, read_row_bands  # noqa: E402
+from service_sheet_index import TOC_SHEET_NAME  # noqa: E402
+
+CONTENTS = [f'クラーク業務{i}' if i % 3 == 0 else f'業務内容{i}' for i in range(60)]
+DAILY_CONTENTS = ['朝礼', 'メール確認', '日報作成', '書類整理', '電話対応', '清掃']
+TOPICS = ['打合せ', '相談', '報告', '引継ぎ', '確認']
+NAMES = [f'担当者{i}' for i in range(20)]
+INVALID_TIMES = ['未定', '30分', '-']
+
+
+def get_row_bands(config=None):
+    """config.ini（または config）の行範囲を read_workbook と同じ形式で返す"""
+    return read_row_bands(config or load_config()).as_dict()
+
+
+def generate_time(rng, star_ratio, invalid_ratio):
+    """時間の列の値。一部は「*」や数値でない文字列、数値の文字列にする"""
+    value = rng.random()
+    if value < star_ratio:
+        return '*'
+    if value < star_ratio + invalid_ratio:
+        return rng.choice(INVALID_TIMES)
+    minutes = rng.randrange(5, 125, 5)
+    return str(minutes) if value > 0.95 else minutes
+
+
+def generate_content(rng, band):
+    if band == 'communication':
+        # 氏名のない行（集計対象外）も一部含める
+        topic = rng.choice(TOPICS)
+        return topic if rng.random() < 0.05 else f'{topic}({rng.choice(NAMES)})'
+    if band == 'daily':
+        return rng.choice(DAILY_CONTENTS)
+    content = rng.choice(CONTENTS)
+    # 業務内容の後のメモは集計時に除かれる
+    return f'{content} メモ' if rng.random() < 0.1 else content
+
+
+def generate_workbook(path, sheet_count, row_bands=None, fill_ratio=0.6, star_ratio=0.05,
+                      invalid_ratio=0.02, include_toc=True, start_date=datetime(2024, 1, 1), seed=0):
+    """sheet_count 日分のシートを持つブックを path に保存し、path を返す
+
+    同じ引数からは同じ内容のブックを作成する。include_toc が真の場合は先頭にシート一覧を作成する。
+    """
+    rng = random.Random(seed)
+    row_bands = row_bands or get_row_bands()
+    max_row = max(end for _, end in row_bands.values())
+    band_of_row = {}
+    for band, (start_row, end_row) in row_bands.items():
+        for row in range(start_row, end_row + 1):
+            band_of_row.setdefault(row, band)
+
+    # 大量のシートを作成するため、書き込み専用モードで行を順に追加する
+    wb = Workbook(write_only=True)
+    dates = [start_date + timedelta(days=day) for day in range(sheet_count)]
+    sheet_names = [f'{sheet_date:%Y%m%d}' for sheet_date in dates]
+
+    if include_toc:
+        toc = wb.create_sheet(TOC_SHEET_NAME)
+        for sheet_name, sheet_date in zip(sheet_names, dates):
+            toc.append([sheet_name, f'{sheet_date.year}年{sheet_date.month}月{sheet_date.day}日'])
+
+    for sheet_name, sheet_date in zip(sheet_names, dates):
+        sheet = wb.create_sheet(sheet_name)
+        sheet.append([f'{sheet_date.year}年{sheet_date.month}月{sheet_date.day}日'])
+        for row in range(2, max_row + 1):
+            band = band_of_row.get(row)
+            if band is None or rng.random() >= fill_ratio:
+                sheet.append([])
+                continue
+            sheet.append([None, generate_content(rng, band), generate_time(rng, star_ratio, invalid_ratio)])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    sheet_count = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    print(generate_workbook(sys.argv[1], sheet_count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
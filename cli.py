@@ -0,0 +1,110 @@
+import argparse
+import calendar
+import json
+import multiprocessing
+import sys
+from datetime import datetime
+
+from config_manager import load_config, read_settings, replace_paths
+from service_task_analyzer import TaskAnalyzer
+from service_workbook_watcher import DEFAULT_WATCH_INTERVAL, WorkbookWatcher
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日付の形式が正しくありません（YYYY-MM-DD）: {value}")
+
+
+def month_ranges(year):
+    """指定した年の各月の初日と末日の組を返す"""
+    return [
+        (datetime(year, month, 1), datetime(year, month, calendar.monthrange(year, month)[1]))
+        for month in range(1, 13)
+    ]
+
+
+def build_date_ranges(args):
+    """指定された期間とプリセットを指定した順に並べ、重複を除いて返す"""
+    date_ranges = []
+    for start_date, end_date in args.range or []:
+        if start_date > end_date:
+            raise ValueError(f"開始日が終了日より後の日付になっています: {start_date:%Y-%m-%d} {end_date:%Y-%m-%d}")
+        date_ranges.append((start_date, end_date))
+    for year in args.months or []:
+        date_ranges.extend(month_ranges(year))
+    for year in args.year or []:
+        date_ranges.append((datetime(year, 1, 1), datetime(year, 12, 31)))
+    return list(dict.fromkeys(date_ranges))
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description='WILLDOリストを画面なしで分析し、期間ごとに結果のExcelファイルを出力する'
+    )
+    parser.add_argument('--range', nargs=2, action='append', type=parse_date, metavar=('START', 'END'),
+                        help='分析期間（YYYY-MM-DD YYYY-MM-DD）。複数指定できます')
+    parser.add_argument('--months', action='append', type=int, metavar='YEAR',
+                        help='指定した年の各月を分析期間にします（例: --months 2025）')
+    parser.add_argument('--year', action='append', type=int, metavar='YEAR',
+                        help='指定した年の1年間を分析期間にします')
+    parser.add_argument('--input', help='WILLDOリストのパス（省略時は設定ファイルの input_file_path）')
+    parser.add_argument('--output-dir', help='出力先ディレクトリ（省略時は設定ファイルの output_dir）。cache_dir の指定がなければ読み込みキャッシュもこの出力先と同じ階層の cache フォルダを使います')
+    parser.add_argument('--report', help='実行結果（段階ごとの時間など）をJSONで保存するパス')
+    parser.add_argument('--open', action='store_true', help='出力したファイルをExcelで開く')
+    parser.add_argument('--watch', nargs='?', const=DEFAULT_WATCH_INTERVAL, type=float, metavar='SECONDS',
+                        help='終了せずに入力のブックを監視し、更新されるたびに分析し直す（確認する間隔の秒数、既定は5秒）')
+    return parser
+
+
+def main(argv=None):
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        date_ranges = build_date_ranges(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if not date_ranges:
+        parser.error("--range、--months、--year のいずれかで分析期間を指定してください")
+
+    settings = replace_paths(read_settings(load_config()), input_file_path=args.input, output_dir=args.output_dir)
+    analyzer = TaskAnalyzer(settings)
+
+    success = run_batch(analyzer, date_ranges, args)
+    if args.watch is None:
+        return 0 if success else 1
+
+    watcher = WorkbookWatcher(
+        analyzer.paths.input_file_path,
+        lambda: run_batch(analyzer, date_ranges, args),
+        args.watch
+    )
+    print("入力のブックを監視しています（Ctrl+Cで終了）")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_batch(analyzer, date_ranges, args):
+    """分析して結果を表示し、すべての期間が成功したかを返す"""
+    success, messages, report = analyzer.run_batch(date_ranges, open_output=args.open)
+
+    for message in messages:
+        print(message)
+    print(report.format_summary())
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+
+    return success
+
+
+if __name__ == "__main__":
+    # PyInstallerでビルドした実行ファイルでプロセスプールを使うために必要
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import configparser
 import os
 import sys
-from typing import Any
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Optional
 
 
 def get_config_path():
@@ -18,8 +20,15 @@ CONFIG_PATH = get_config_path()
 
 
 
-def load_config() -> configparser.ConfigParser:
+def create_config_parser() -> configparser.ConfigParser:
     config = configparser.ConfigParser()
+    # 業務分類名などの項目名は大文字・小文字を区別して記述どおりに扱う
+    config.optionxform = str
+    return config
+
+
+def load_config() -> configparser.ConfigParser:
+    config = create_config_parser()
     try:
         with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
             config.read_file(f)
@@ -35,6 +44,33 @@ def load_config() -> configparser.ConfigParser:
     return config
 
 
+def get_config_value(config, section, option, fallback=None):
+    """設定から値を取得する。セクションや項目がない場合はfallbackを返す"""
+    try:
+        return config[section][option]
+    except KeyError:
+        return fallback
+
+
+def get_config_section(config, section):
+    """セクションの項目を補間せずに記述どおりの値で返す。セクションがない場合はNoneを返す"""
+    if isinstance(config, configparser.ConfigParser):
+        if not config.has_section(section):
+            return None
+        return dict(config.items(section, raw=True))
+    try:
+        return dict(config[section])
+    except KeyError:
+        return None
+
+
+def get_config_bool(config, section, option, fallback=False):
+    value = get_config_value(config, section, option)
+    if value is None:
+        return fallback
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 def save_config(config: configparser.ConfigParser):
     try:
         with open(CONFIG_PATH, 'w', encoding='utf-8') as configfile:
@@ -45,3 +81,212 @@ def save_config(config: configparser.ConfigParser):
     except IOError as e:
         print(f"設定ファイルの保存中にエラーが発生しました: {e}")
         raise
+
+
+READER_BACKENDS = ('openpyxl', 'xml')
+WRITER_BACKENDS = ('openpyxl', 'zip')
+
+# 行範囲の名前と、開始行・終了行の設定項目
+ROW_BAND_OPTIONS = {
+    'tasks': ('start_row', 'end_row'),
+    'communication': ('communication_start_row', 'communication_end_row'),
+    'daily': ('daily_task_start_row', 'daily_task_end_row'),
+}
+
+
+@dataclass(frozen=True)
+class RowBands:
+    """業務・コミュニケーション・デイリータスクの行範囲（終了行を含む range）と、読み込み時に使う値"""
+    tasks: range
+    communication: range
+    daily: range
+    # 全項目の行範囲（業務データの開始行からデイリータスクの終了行まで）
+    all_items: range = field(init=False)
+    # 読み込む最後の行と、日付セルの行といずれかの行範囲に含まれる行番号の集合
+    max_row: int = field(init=False)
+    rows: frozenset = field(init=False)
+
+    def __post_init__(self):
+        bands = (self.tasks, self.communication, self.daily)
+        all_items = range(self.tasks.start, self.daily.stop)
+        rows = {1, *all_items}
+        for band in bands:
+            rows.update(band)
+        object.__setattr__(self, 'all_items', all_items)
+        object.__setattr__(self, 'max_row', max(band.stop - 1 for band in bands))
+        object.__setattr__(self, 'rows', frozenset(rows))
+
+    def as_dict(self):
+        """{行範囲の名前: (開始行, 終了行)} の辞書（キャッシュの署名などに使う）"""
+        return {
+            'tasks': (self.tasks.start, self.tasks.stop - 1),
+            'communication': (self.communication.start, self.communication.stop - 1),
+            'daily': (self.daily.start, self.daily.stop - 1),
+        }
+
+
+@dataclass(frozen=True)
+class AnalysisSettings:
+    reader_backend: str = 'openpyxl'
+    writer_backend: str = 'openpyxl'
+    workers: int = 1
+    source_workers: int = 4
+    use_cache: bool = False
+    use_cube: bool = False
+    # 期間別に集計する単位（day, week, month）
+    rollup_periods: tuple = ()
+    # 入力のブックを確認する間隔(秒)。監視しない場合はNone
+    watch_interval: Optional[float] = None
+    # 環境変数での指定を含めて、トレース・メモリの計測が有効か
+    trace: bool = False
+    memory_profile: bool = False
+
+
+@dataclass(frozen=True)
+class PathSettings:
+    """[PATHS] のパス。指定がない項目はNone"""
+    input_file_path: Optional[str] = None
+    output_dir: Optional[str] = None
+    template_path: Optional[str] = None
+    config_path: Optional[str] = None
+    cache_dir: Optional[str] = None
+    category_file: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Settings:
+    """設定ファイルの内容を型を揃えて検証した、変更できない設定
+
+    読み込み・集計・出力はこの設定だけを使い、設定ファイル（ConfigParser）は参照しない。
+    """
+    paths: PathSettings
+    analysis: AnalysisSettings
+    row_bands: RowBands
+    # 業務分類（task_categories.CategoryTaxonomy）
+    categories: Any = None
+
+
+def get_config_int(config, section, option, fallback, minimum=None):
+    value = get_config_value(config, section, option)
+    if value is None or str(value).strip() == '':
+        return fallback
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{option} の値が正しくありません: {value}")
+    return number if minimum is None else max(minimum, number)
+
+
+def read_row_bands(config):
+    """[Analysis] の行範囲を読み込み、開始行が終了行より後の範囲や重なっている範囲がないかを確認する"""
+    bands = {}
+    for name, (start_option, end_option) in ROW_BAND_OPTIONS.items():
+        start_row = get_config_int(config, 'Analysis', start_option, None)
+        end_row = get_config_int(config, 'Analysis', end_option, None)
+        if start_row is None or end_row is None:
+            raise ValueError(f"設定ファイルに {start_option} と {end_option} を指定してください")
+        if start_row > end_row:
+            raise ValueError(f"{start_option} が {end_option} より後の行になっています: {start_row} > {end_row}")
+        bands[name] = range(start_row, end_row + 1)
+
+    ordered = sorted(bands.items(), key=lambda item: item[1].start)
+    for (name, band), (next_name, next_band) in zip(ordered, ordered[1:]):
+        if next_band.start < band.stop:
+            raise ValueError(f"行範囲が重なっています: {name} ({band.start}～{band.stop - 1}) と "
+                             f"{next_name} ({next_band.start}～{next_band.stop - 1})")
+    return RowBands(**bands)
+
+
+def read_analysis_settings(config):
+    """[Analysis] の読み込み方式・出力方式・プロセス数・キャッシュ・集計・監視などの設定を読み込んで検証する"""
+    # 各項目を読み込む関数のモジュールは config_manager を使うため、ここで読み込む
+    from service_data_analyzer import get_rollup_periods
+    from service_workbook_watcher import get_watch_interval
+    from task_memory import is_memory_profile_enabled
+    from task_trace import is_trace_enabled
+
+    settings = AnalysisSettings(
+        reader_backend=get_config_value(config, 'Analysis', 'reader_backend', 'openpyxl'),
+        writer_backend=get_config_value(config, 'Analysis', 'writer_backend', 'openpyxl'),
+        workers=get_config_int(config, 'Analysis', 'workers', 1, minimum=1),
+        source_workers=get_config_int(config, 'Analysis', 'source_workers', 4, minimum=1),
+        use_cache=get_config_bool(config, 'Analysis', 'use_cache'),
+        use_cube=get_config_bool(config, 'Analysis', 'use_cube'),
+        rollup_periods=tuple(get_rollup_periods(config)),
+        watch_interval=get_watch_interval(config),
+        trace=is_trace_enabled(config),
+        memory_profile=is_memory_profile_enabled(config),
+    )
+    if settings.reader_backend not in READER_BACKENDS:
+        raise ValueError(f"reader_backend の値が正しくありません: {settings.reader_backend}")
+    if settings.writer_backend not in WRITER_BACKENDS:
+        raise ValueError(f"writer_backend の値が正しくありません: {settings.writer_backend}")
+    return settings
+
+
+def read_path_settings(config):
+    return PathSettings(**{
+        option: get_config_value(config, 'PATHS', option) or None
+        for option in PathSettings.__dataclass_fields__
+    })
+
+
+def read_settings(config):
+    """設定（ConfigParser）から Settings を作成する。値が正しくない場合は ValueError"""
+    from task_categories import CategoryTaxonomy
+
+    return Settings(
+        paths=read_path_settings(config),
+        analysis=read_analysis_settings(config),
+        row_bands=read_row_bands(config),
+        categories=CategoryTaxonomy.from_config(config),
+    )
+
+
+def as_settings(settings):
+    """Settings はそのまま返し、設定（ConfigParser や辞書）の場合は Settings を作成して返す"""
+    return settings if isinstance(settings, Settings) else read_settings(settings)
+
+
+def replace_paths(settings, **paths):
+    """PATHS の一部を置き換えた Settings を返す（コマンドラインでのパスの指定など）。Noneの項目は置き換えない"""
+    paths = {option: value for option, value in paths.items() if value is not None}
+    if not paths:
+        return settings
+    return replace(settings, paths=replace(settings.paths, **paths))
+
+
+_settings_lock = threading.Lock()
+# ((設定ファイルの更新日時, 業務分類のCSVファイルの更新日時), Settings)
+_settings_cache = None
+
+
+def get_file_mtime(path):
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_config_mtime():
+    return get_file_mtime(CONFIG_PATH)
+
+
+def load_settings():
+    """設定ファイルの Settings を返す
+
+    設定ファイルと、[PATHS] category_file を指定している場合はそのCSVファイルの更新日時が
+    変わるまでは前回の結果を返す。
+    """
+    global _settings_cache
+    with _settings_lock:
+        mtime = get_config_mtime()
+        if _settings_cache is not None and mtime is not None:
+            (config_mtime, category_mtime), settings = _settings_cache
+            if config_mtime == mtime and category_mtime == get_file_mtime(settings.paths.category_file):
+                return settings
+        settings = read_settings(load_config())
+        _settings_cache = ((mtime, get_file_mtime(settings.paths.category_file)), settings)
+        return settings
@@ -1,3 +1,4 @@
+import multiprocessing
 import tkinter as tk
 from app_window import TaskAnalyzerGUI
 from version import VERSION
@@ -9,4 +10,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # PyInstallerでビルドした実行ファイルでプロセスプールを使うために必要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import argparse
+import json
+import multiprocessing
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import polars as pl
+
+from config_manager import get_config_value, load_config, read_settings, replace_paths
+from service_data_analyzer import ANALYSIS_PLAN_NAMES, CATEGORY_SHEET_NAME, TaskDataAnalyzer
+from service_excel_reader import ExcelTaskReader, get_input_signature, split_date_ranges
+
+# localhost 以外からは接続できないようにする
+HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 64
+
+# 集計の名前（URLのパス）。6種類の集計と業務分類別の集計
+QUERY_NAMES = (*ANALYSIS_PLAN_NAMES, 'category_summary')
+
+
+class QueryError(ValueError):
+    """クエリの指定が正しくない場合の例外"""
+
+
+class TaskQueryService:
+    """ブックを1回だけ読み込んでメモリに保持し、期間・氏名・業務内容で絞り込んだ集計結果を返す
+
+    同じ条件の集計結果は LRU キャッシュから返す。入力のブックが更新された場合は、次のクエリで
+    読み込み直す（内容が変わっていないシートは読み込みキャッシュから取得する）。
+    読み込みはロックの中で行うため、同時に複数のクエリが来てもブックを重複して解析しない。
+    """
+
+    def __init__(self, settings, cache_size=DEFAULT_CACHE_SIZE):
+        self.input_path = settings.paths.input_file_path
+        self.reader = ExcelTaskReader(settings)
+        self.analyzer = TaskDataAnalyzer(settings.categories)
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.signature = None
+        self.dataset = None
+        self.results = OrderedDict()
+
+    def load(self):
+        """ブック全体の (シートの日付, 種類ごとのデータフレーム) を返す。ブックが変わった場合は読み込み直す"""
+        signature = get_input_signature(self.input_path)
+        with self.lock:
+            if self.dataset is None or signature != self.signature:
+                self.dataset = self.reader.read_sources(self.input_path, datetime.min, datetime.max)
+                self.signature = signature
+                self.results.clear()
+            return self.dataset
+
+    def query(self, query_name, start_date=None, end_date=None, name=None, content=None):
+        """集計結果を (実際の開始日, 実際の終了日, データフレーム) で返す。期間内のデータがない場合はNone
+
+        name はコミュニケーションの氏名に一致する行、content は業務内容に含む行に絞り込む。
+        """
+        if query_name not in QUERY_NAMES:
+            raise QueryError(f"集計の名前が正しくありません: {query_name}")
+        if start_date and end_date and start_date > end_date:
+            raise QueryError("開始日が終了日より後の日付になっています")
+
+        sheet_dates, frames = self.load()
+        key = (start_date, end_date, name, content)
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.select(self.results[key], query_name)
+
+        result = self.analyze(sheet_dates, frames, start_date or datetime.min, end_date or datetime.max, name, content)
+
+        with self.lock:
+            # 読み込み直した後に古いデータの結果を保存しないようにする
+            if self.dataset is not None and self.dataset[1] is frames:
+                self.results[key] = result
+                self.results.move_to_end(key)
+                while len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+        return self.select(result, query_name)
+
+    def analyze(self, sheet_dates, frames, start_date, end_date, name, content):
+        range_result = split_date_ranges(sheet_dates, frames, [(start_date, end_date)])[0]
+        if range_result is None:
+            return None
+        *range_frames, actual_start_date, actual_end_date = range_result
+        range_frames = [self.filter_frame(frame, name, content) for frame in range_frames]
+
+        analysis_results, extra_results = self.analyzer.analyze(*range_frames)
+        return (
+            actual_start_date,
+            actual_end_date,
+            {**dict(zip(ANALYSIS_PLAN_NAMES, analysis_results)), 'category_summary': extra_results[CATEGORY_SHEET_NAME]},
+        )
+
+    @staticmethod
+    def filter_frame(frame, name, content):
+        if name and 'name' in frame.columns:
+            frame = frame.filter(pl.col('name').cast(pl.String) == name)
+        if content:
+            frame = frame.filter(pl.col('content').cast(pl.String).str.contains(content, literal=True))
+        return frame
+
+    @staticmethod
+    def select(result, query_name):
+        if result is None:
+            return None
+        actual_start_date, actual_end_date, frames = result
+        return actual_start_date, actual_end_date, frames[query_name]
+
+
+def parse_query_date(params, key):
+    value = params.get(key, [''])[0]
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise QueryError(f"日付の形式が正しくありません（YYYY-MM-DD）: {value}")
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """GET /<集計の名前>?start=YYYY-MM-DD&end=YYYY-MM-DD&name=氏名&content=業務内容 にJSONで応答する"""
+
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query_name = url.path.strip('/')
+        if not query_name:
+            self.send_json(HTTPStatus.OK, {'queries': list(QUERY_NAMES)})
+            return
+
+        params = parse_qs(url.query)
+        try:
+            result = self.service.query(
+                query_name,
+                parse_query_date(params, 'start'),
+                parse_query_date(params, 'end'),
+                params.get('name', [None])[0],
+                params.get('content', [None])[0],
+            )
+        except QueryError as e:
+            status = HTTPStatus.NOT_FOUND if query_name not in QUERY_NAMES else HTTPStatus.BAD_REQUEST
+            self.send_json(status, {'error': str(e)})
+            return
+        except Exception as e:
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"分析中にエラーが発生しました: {e}"})
+            return
+
+        if result is None:
+            self.send_json(HTTPStatus.OK, {'start_date': None, 'end_date': None, 'rows': []})
+            return
+        actual_start_date, actual_end_date, frame = result
+        self.send_json(HTTPStatus.OK, {
+            'start_date': actual_start_date,
+            'end_date': actual_end_date,
+            'rows': frame.to_dicts(),
+        })
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # 問い合わせごとの標準エラー出力への記録は行わない
+        pass
+
+
+def create_server(service, port=DEFAULT_PORT):
+    """service の集計結果を返すサーバーを作成する。port に0を指定すると空いているポートを使う"""
+    handler = type('TaskQueryRequestHandler', (QueryRequestHandler,), {'service': service})
+    return ThreadingHTTPServer((HOST, port), handler)
+
+
+def main(argv=None):
+    config = load_config()
+    parser = argparse.ArgumentParser(description='WILLDOリストの集計結果をJSONで返すサーバーをこのPCだけで起動する')
+    parser.add_argument('--port', type=int, default=int(get_config_value(config, 'Server', 'port', DEFAULT_PORT)),
+                        help=f'待ち受けるポート（省略時は設定ファイルの [Server] port、既定は{DEFAULT_PORT}）')
+    parser.add_argument('--input', help='WILLDOリストのパス（省略時は設定ファイルの input_file_path）')
+    args = parser.parse_args(argv)
+
+    settings = replace_paths(read_settings(config), input_file_path=args.input)
+    cache_size = int(get_config_value(config, 'Server', 'cache_size', DEFAULT_CACHE_SIZE))
+    service = TaskQueryService(settings, cache_size=cache_size)
+    service.load()
+
+    server = create_server(service, args.port)
+    print(f"http://{HOST}:{server.server_port}/ で待ち受けています（Ctrl+Cで終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    # PyInstallerでビルドした実行ファイルでプロセスプールを使うために必要
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+from service_excel_reader import get_input_signature
+from service_sheet_cache import get_cache_dir
+from task_records import RECORD_SCHEMAS
+
+CUBE_VERSION = 2
+CUBE_MANIFEST_FILE = 'cube.json'
+
+
+def get_cube_dir(settings):
+    """日別集計が有効な場合は保存先（キャッシュの保存先の cube フォルダ）を返す"""
+    if not settings.analysis.use_cube:
+        return None
+    cache_dir = get_cache_dir(settings)
+    if cache_dir is None:
+        return None
+    return cache_dir / 'cube'
+
+
+def get_cube_keys(schema):
+    """日別集計のキーの列（日付・業務内容、コミュニケーションは氏名、複数のブックの場合はブックの名前も）"""
+    return [column for column in ('date', 'source', 'name', 'content') if column in schema]
+
+
+class DailyCube:
+    """読み込み結果を日付・（氏名・）業務内容ごとに合計時間と回数へ集計したもの
+
+    ブック全体を1回だけ集計してParquet形式で保存し、任意の期間の分析は
+    期間内の日の集計結果を合計して求める。入力ファイル（フォルダの場合はフォルダ内のブック）の
+    更新日時・サイズまたは行範囲の設定が変わった場合は作り直す。
+    """
+
+    def __init__(self, cube_dir, signature=''):
+        self.cube_dir = Path(cube_dir)
+        self.signature = signature
+        self.source = None
+        self.sheet_dates = None
+        self.frames = None
+
+    def is_current(self, file_path):
+        """入力ファイルから作成した集計をメモリまたはファイルから読み込めたか"""
+        source = get_input_signature(file_path)
+        if self.frames is not None and self.source == source:
+            return True
+        return self.load(source)
+
+    def load(self, source):
+        try:
+            with open(self.cube_dir / CUBE_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if (manifest.get('version') != CUBE_VERSION or manifest.get('signature') != self.signature
+                    or manifest.get('source') != source):
+                return False
+            frames = [pl.read_parquet(self.cube_dir / f'{kind}.parquet') for kind in RECORD_SCHEMAS]
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, pl.exceptions.PolarsError) as e:
+            print(f"日別集計の読み込み中にエラーが発生しました: {e}")
+            return False
+
+        self.source = source
+        self.sheet_dates = [datetime.fromisoformat(value) for value in manifest['sheet_dates']]
+        self.frames = frames
+        return True
+
+    def build(self, file_path, sheet_dates, frames):
+        """ブック全体の読み込み結果（シート名の列を除いたもの）から日別集計を作成して保存する"""
+        self.source = get_input_signature(file_path)
+        self.sheet_dates = list(sheet_dates)
+        self.frames = [
+            frame.group_by(get_cube_keys(frame.schema))
+            .agg([
+                pl.col('minutes').sum(),
+                pl.len().cast(pl.UInt32).alias('frequency')
+            ])
+            .sort(get_cube_keys(frame.schema))
+            for frame in frames
+        ]
+        self.save()
+
+    def save(self):
+        try:
+            self.cube_dir.mkdir(parents=True, exist_ok=True)
+            for kind, frame in zip(RECORD_SCHEMAS, self.frames):
+                frame.write_parquet(self.cube_dir / f'{kind}.parquet')
+            manifest = {
+                'version': CUBE_VERSION,
+                'signature': self.signature,
+                'source': self.source,
+                'sheet_dates': [sheet_date.isoformat() for sheet_date in self.sheet_dates],
+            }
+            # 集計のファイルを書き終えてから対応する入力ファイルの情報を保存する
+            with open(self.cube_dir / CUBE_MANIFEST_FILE, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"日別集計の保存中にエラーが発生しました: {e}")
@@ -1,87 +1,243 @@
 import polars as pl
 
+from config_manager import get_config_value
+from task_categories import CLERK_CATEGORY, CategoryTaxonomy
+from task_records import to_categorical
+from task_trace import is_tracing, span
+
+CATEGORY_SHEET_NAME = '業務分類別'
+
+# トレースに記録する6種類の集計の名前（build_analysis_plan の返す順序）
+ANALYSIS_PLAN_NAMES = (
+    'clerk_tasks',
+    'non_clerk_tasks',
+    'daily_tasks_agg',
+    'communication_by_name',
+    'communication_by_content',
+    'all_items_summary',
+)
+
+# 期間別の集計の単位: (group_by_dynamic の every, 期間の表示形式, シート名に付ける名前)
+ROLLUP_PERIODS = {
+    'day': ('1d', '%Y-%m-%d', '日別'),
+    'week': ('1w', '%Y-%m-%d', '週別'),
+    'month': ('1mo', '%Y-%m', '月別'),
+}
+
+
+def get_rollup_periods(config):
+    """[Analysis] rollup_periods（day, week, month のカンマ区切り）から期間別に集計する単位を取得する"""
+    value = get_config_value(config, 'Analysis', 'rollup_periods', '') or ''
+    periods = [period.strip() for period in value.split(',') if period.strip()]
+    for period in periods:
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"rollup_periods の値が正しくありません: {period}")
+    return periods
+
 
 class TaskDataAnalyzer:
+    def __init__(self, taxonomy=None, rollup_periods=()):
+        self.taxonomy = taxonomy or CategoryTaxonomy.default()
+        self.rollup_periods = list(rollup_periods)
+
+    @staticmethod
+    def to_dataframe(records):
+        # 読み込み時に列ごとに作成済みのデータフレームはカテゴリ型のため、コピーせずにそのまま使う
+        if isinstance(records, pl.DataFrame):
+            return to_categorical(records)
+        return to_categorical(pl.DataFrame(records))
+
     @staticmethod
     def create_dataframes(tasks, daily_tasks, communication_tasks, all_items):
-        df = pl.DataFrame(tasks)
-        daily_df = pl.DataFrame(daily_tasks)
-        comm_df = pl.DataFrame(communication_tasks)
-        all_items_df = pl.DataFrame(all_items)
-        
+        df = TaskDataAnalyzer.to_dataframe(tasks)
+        daily_df = TaskDataAnalyzer.to_dataframe(daily_tasks)
+        comm_df = TaskDataAnalyzer.to_dataframe(communication_tasks)
+        all_items_df = TaskDataAnalyzer.to_dataframe(all_items)
+
         return df, daily_df, comm_df, all_items_df
 
     @staticmethod
-    def aggregate_dataframe(data_frame, group_by_col='content', filter_condition=None):
+    def frequency_expr(lazy_frame):
+        """回数を求める式。日ごとに集計済みのデータ（DailyCube）は回数の列を合計する"""
+        if 'frequency' in lazy_frame.collect_schema().names():
+            return pl.col('frequency').sum().cast(pl.UInt32)
+        return pl.col('minutes').count()
+
+    @staticmethod
+    def summarize(lazy_frame, group_by_cols):
+        # 合計時間は1回だけ計算し、時間(h)は集計後の合計から求める
+        # カテゴリ型の列は整数のまま集計し、集計後の少ない行だけを文字列に戻す
+        return (
+            lazy_frame.group_by(group_by_cols)
+            .agg([
+                pl.col('minutes').sum().alias('total_minutes'),
+                TaskDataAnalyzer.frequency_expr(lazy_frame).alias('frequency')
+            ])
+            .with_columns(
+                pl.col(group_by_cols).cast(pl.String),
+                (pl.col('total_minutes') / 60).cast(pl.Int64).alias('total_hours')
+            )
+            .select([*group_by_cols, 'total_minutes', 'total_hours', 'frequency'])
+        )
+
+    @staticmethod
+    def aggregate_lazy(lazy_frame, group_by_col='content', filter_condition=None):
 
         if filter_condition is not None:
-            data_frame = data_frame.filter(filter_condition)
+            lazy_frame = lazy_frame.filter(filter_condition)
 
-        if group_by_col == 'content' and 'name' in data_frame.columns:
+        if group_by_col == 'content' and 'name' in lazy_frame.collect_schema().names():
             return (
-                data_frame.group_by(['name', group_by_col])
-                .agg([
-                    pl.col('minutes').sum().alias('total_minutes'),
-                    (pl.col('minutes').sum() / 60).cast(pl.Int64).alias('total_hours'),
-                    pl.col('minutes').count().alias('frequency')
-                ])
+                TaskDataAnalyzer.summarize(lazy_frame, ['name', group_by_col])
                 .sort(['name', 'total_minutes'], descending=[False, True])
             )
 
         return (
-            data_frame.group_by(group_by_col)
+            TaskDataAnalyzer.summarize(lazy_frame, [group_by_col])
+            .sort('total_minutes', descending=True)
+        )
+
+    @staticmethod
+    def summarize_by_period(lazy_frame, period, group_by_col='content'):
+        """group_by_dynamic で期間（日・週・月）ごとに1回の走査で集計する。週は月曜日から始まる"""
+        every, date_format, _ = ROLLUP_PERIODS[period]
+        return (
+            lazy_frame.sort('date')
+            .group_by_dynamic('date', every=every, group_by=group_by_col)
             .agg([
                 pl.col('minutes').sum().alias('total_minutes'),
-                (pl.col('minutes').sum() / 60).cast(pl.Int64).alias('total_hours'),
-                pl.col('minutes').count().alias('frequency')
+                TaskDataAnalyzer.frequency_expr(lazy_frame).alias('frequency')
             ])
-            .sort('total_minutes', descending=True)
+            .with_columns(
+                pl.col('date').dt.strftime(date_format).alias('period'),
+                pl.col(group_by_col).cast(pl.String),
+                (pl.col('total_minutes') / 60).cast(pl.Int64).alias('total_hours')
+            )
+            .select(['period', group_by_col, 'total_minutes', 'total_hours', 'frequency'])
+            .sort(['period', 'total_minutes', group_by_col], descending=[False, True, False])
         )
 
-    def analyze_task_data(self, tasks, daily_tasks, comm_tasks, all_items):
+    @staticmethod
+    def aggregate_dataframe(data_frame, group_by_col='content', filter_condition=None):
+        return TaskDataAnalyzer.aggregate_lazy(data_frame.lazy(), group_by_col, filter_condition).collect()
+
+    def build_analysis_plan(self, df, daily_df, comm_df, all_items_df):
+        """6種類の集計と業務分類別の集計をひとつのクエリプランとして組み立てる"""
 
-        df, daily_df, comm_df, all_items_df = self.create_dataframes(
-            tasks, daily_tasks, comm_tasks, all_items
+        # 業務内容ごとの集計を1回だけ行い、業務分類の判定は業務内容ごとに1回だけ行う
+        task_summary = (
+            self.aggregate_lazy(df.lazy())
+            .with_columns(self.taxonomy.category_expr().alias('category'))
         )
-        
+
         # クラーク業務の集計
-        clerk_tasks = self.aggregate_dataframe(
-            df,
-            filter_condition=pl.col('content').str.contains('クラーク業務')
-        )
-        
+        clerk_tasks = task_summary.filter(pl.col('category') == CLERK_CATEGORY).drop('category')
+
         # クラーク業務以外の集計
-        non_clerk_tasks = self.aggregate_dataframe(
-            df,
-            filter_condition=~pl.col('content').str.contains('クラーク業務')
+        non_clerk_tasks = task_summary.filter(pl.col('category') != CLERK_CATEGORY).drop('category')
+
+        # 業務分類別の集計
+        category_summary = (
+            task_summary.group_by('category')
+            .agg([
+                pl.col('total_minutes').sum(),
+                pl.col('frequency').sum()
+            ])
+            .with_columns((pl.col('total_minutes') / 60).cast(pl.Int64).alias('total_hours'))
+            .select(['category', 'total_minutes', 'total_hours', 'frequency'])
+            .sort('total_minutes', descending=True)
         )
-        
+
         # デイリータスクの集計
-        daily_tasks_agg = self.aggregate_dataframe(daily_df)
-        
+        daily_tasks_agg = self.aggregate_lazy(daily_df.lazy())
+
         # コミュニケーションの集計
-        communication_by_name = self.aggregate_dataframe(comm_df, group_by_col='name')
-        
+        comm_lazy = comm_df.lazy()
+        communication_by_name = self.aggregate_lazy(comm_lazy, group_by_col='name')
+
         # コミュニケーション内容別の集計
         communication_by_content = (
-            comm_df.group_by(['content', 'name'])
-            .agg([
-                pl.col('minutes').sum().alias('total_minutes'),
-                (pl.col('minutes').sum() / 60).cast(pl.Int64).alias('total_hours'),
-                pl.col('minutes').count().alias('frequency')
-            ])
+            self.summarize(comm_lazy, ['content', 'name'])
             .sort(['name', 'total_minutes'], descending=[False, True])
-            .select(['content', 'name', 'total_minutes', 'total_hours', 'frequency'])
         )
-        
+
         # 全項目の集計
-        all_items_summary = self.aggregate_dataframe(all_items_df)
-        
-        return (
+        all_items_summary = self.aggregate_lazy(all_items_df.lazy())
+
+        analysis_plans = [
             clerk_tasks,
             non_clerk_tasks,
             daily_tasks_agg,
             communication_by_name,
             communication_by_content,
             all_items_summary
+        ]
+        extra_plans = {CATEGORY_SHEET_NAME: category_summary}
+        if 'source' in df.columns:
+            extra_plans.update(self.build_source_plans(df, daily_df, comm_df, all_items_df))
+        for period in self.rollup_periods:
+            extra_plans.update(self.build_rollup_plans(df, daily_df, comm_df, all_items_df, period))
+        return analysis_plans, extra_plans
+
+    def build_source_plans(self, df, daily_df, comm_df, all_items_df):
+        """複数のブックを読み込んだ場合に、ブックごと（source 列ごと）の集計を返す
+
+        6種類の集計はすべてのブックを合わせた集計のまま、ブックごとの集計を追加のシートに出力する。
+        """
+        def by_source(data_frame, column='content'):
+            return (
+                self.summarize(data_frame.lazy(), ['source', column])
+                .sort(['source', 'total_minutes', column], descending=[False, True, False])
+            )
+
+        task_by_source = by_source(df).with_columns(self.taxonomy.category_expr().alias('category'))
+        return {
+            'クラーク業務(ファイル別)': task_by_source.filter(pl.col('category') == CLERK_CATEGORY).drop('category'),
+            'クラーク以外業務(ファイル別)': task_by_source.filter(pl.col('category') != CLERK_CATEGORY).drop('category'),
+            'デイリータスク(ファイル別)': by_source(daily_df),
+            'コミュニケーション(ファイル別)': by_source(comm_df, 'name'),
+            '全項目(ファイル別)': by_source(all_items_df),
+        }
+
+    def build_rollup_plans(self, df, daily_df, comm_df, all_items_df, period):
+        """クラーク業務・クラーク以外業務・デイリータスク・コミュニケーション・全項目の期間別の集計を返す"""
+        label = ROLLUP_PERIODS[period][2]
+
+        # 業務分類の判定は期間・業務内容ごとに集計した後の行に対して行う
+        task_rollup = (
+            self.summarize_by_period(df.lazy(), period)
+            .with_columns(self.taxonomy.category_expr().alias('category'))
         )
+        return {
+            f'クラーク業務({label})': task_rollup.filter(pl.col('category') == CLERK_CATEGORY).drop('category'),
+            f'クラーク以外業務({label})': task_rollup.filter(pl.col('category') != CLERK_CATEGORY).drop('category'),
+            f'デイリータスク({label})': self.summarize_by_period(daily_df.lazy(), period),
+            f'コミュニケーション({label})': self.summarize_by_period(comm_df.lazy(), period, group_by_col='name'),
+            f'全項目({label})': self.summarize_by_period(all_items_df.lazy(), period),
+        }
+
+    def analyze(self, tasks, daily_tasks, comm_tasks, all_items):
+        """6種類の集計結果と、追加のシートに出力する集計結果（シート名→データフレーム）を返す"""
+        with span('create_dataframes'):
+            df, daily_df, comm_df, all_items_df = self.create_dataframes(
+                tasks, daily_tasks, comm_tasks, all_items
+            )
+        analysis_plans, extra_plans = self.build_analysis_plan(df, daily_df, comm_df, all_items_df)
+        plans = analysis_plans + list(extra_plans.values())
+
+        if is_tracing():
+            # 集計ごとの時間を記録するため、トレース中は各集計を順に実行する
+            results = []
+            for name, plan in zip([*ANALYSIS_PLAN_NAMES, *extra_plans], plans):
+                with span('collect', plan=name):
+                    results.append(plan.collect())
+        else:
+            # 共通部分は1回だけ実行され、各集計はPolarsにより並列に実行される
+            results = pl.collect_all(plans)
+        analysis_results = tuple(results[:len(analysis_plans)])
+        extra_results = dict(zip(extra_plans, results[len(analysis_plans):]))
+        return analysis_results, extra_results
+
+    def analyze_task_data(self, tasks, daily_tasks, comm_tasks, all_items):
+        """6種類の集計結果だけを返す"""
+        return self.analyze(tasks, daily_tasks, comm_tasks, all_items)[0]
@@ -1,18 +1,185 @@
+import glob
+import hashlib
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from openpyxl import load_workbook
 from pathlib import Path
 
+import polars as pl
+
+from config_manager import as_settings
+from service_sheet_cache import SheetCache, get_cache_dir
+from service_sheet_index import TOC_SHEET_NAME, select_sheets
+from service_xlsx_archive import XlsxArchive
+from task_progress import STAGE_READ, AnalysisCancelled, ProgressReporter
+from task_records import concat_record_frames, create_record_buffers, empty_record_frames
+from task_trace import add_events, is_tracing, span, start_tracing, stop_tracing
+
+
+def parse_sheet_shard(settings, file_path, sheet_entries, trace=False):
+    """プロセスプールのワーカーで担当分のシートを解析する
+
+    種類ごとのデータフレーム、解析・対象外の行数、trace が真の場合はワーカーで記録した区間を返す。
+    """
+    if trace:
+        start_tracing()
+    reader = ExcelTaskReader(settings)
+    progress = ProgressReporter()
+    try:
+        with span('parse_sheet_shard', sheets=len(sheet_entries)):
+            frames = reader.parse_sheets(file_path, sheet_entries, progress)
+    finally:
+        tracer = stop_tracing()
+    events = tracer.events if tracer is not None else []
+    return frames, progress.report.rows_parsed, progress.report.rows_rejected, events
+
+
+class NoSheetsInRange(ValueError):
+    """期間内のシートがない場合に発生する例外"""
+
+
+def is_multi_source(input_path):
+    """入力がフォルダまたはワイルドカードを含むパス（複数のブック）か"""
+    return os.path.isdir(input_path) or glob.has_magic(str(input_path))
+
+
+def resolve_input_files(input_path):
+    """入力のブックのパスをファイル名の順に返す。フォルダの場合はフォルダ内の .xlsx ファイル
+
+    Excelで開いている間に作成される一時ファイル（~$で始まるファイル）は除く。
+    """
+    if os.path.isdir(input_path):
+        paths = glob.glob(os.path.join(glob.escape(str(input_path)), '*.xlsx'))
+    elif glob.has_magic(str(input_path)):
+        paths = glob.glob(str(input_path))
+    else:
+        return [str(input_path)]
+    return sorted(path for path in paths if os.path.isfile(path) and not os.path.basename(path).startswith('~$'))
+
+
+def get_input_signature(input_path):
+    """入力のブックの更新日時とサイズ。いずれかのブックが変わると値が変わる"""
+    files = []
+    for file_path in resolve_input_files(input_path):
+        stat = os.stat(file_path)
+        files.append({'path': str(Path(file_path).resolve()), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size})
+    return {'input': str(input_path), 'files': files}
+
+
+def get_source_name(file_path):
+    """source 列に入れるブックの名前（拡張子を除いたファイル名）"""
+    return Path(file_path).stem
+
+
+def read_source(settings, file_path, start_date, end_date):
+    """1つのブックを読み込み、(シートの日付, シート名の列を除いた種類ごとのデータフレーム, RunReport) を返す
+
+    読み込みキャッシュはブックごとに分け、期間内のシートがない場合は空のデータフレームを返す。
+    """
+    path_hash = hashlib.sha1(str(Path(file_path).resolve()).encode('utf-8')).hexdigest()[:8]
+    reader = ExcelTaskReader(settings, cache_name=f'{get_source_name(file_path)}-{path_hash}', workers=1)
+    progress = ProgressReporter()
+    with span('read_source', file=os.path.basename(file_path)):
+        try:
+            sheet_dates, frames = reader.read_dataset(file_path, start_date, end_date, progress)
+        except NoSheetsInRange:
+            sheet_dates, frames = [], [frame.drop('sheet') for frame in empty_record_frames()]
+    progress.finish_stage()
+    return sheet_dates, frames, progress.report
+
+
+def read_source_in_worker(settings, file_path, start_date, end_date, trace=False):
+    """プロセスプールのワーカーで read_source を実行し、trace が真の場合は記録した区間も返す"""
+    if trace:
+        start_tracing()
+    try:
+        result = read_source(settings, file_path, start_date, end_date)
+    finally:
+        tracer = stop_tracing()
+    return (*result, tracer.events if tracer is not None else [])
+
+
+def split_date_ranges(sheet_dates, frames, date_ranges):
+    """日付の列を持つ種類ごとのデータフレームを期間ごとに絞り込み、read_workbook と同じ形式の結果のリストを返す
+
+    sheet_dates は読み込んだシートの日付。期間内にシートがない期間の結果は None になる。
+    """
+    results = []
+    for start_date, end_date in date_ranges:
+        dates = [sheet_date for sheet_date in sheet_dates if start_date <= sheet_date <= end_date]
+        if not dates:
+            results.append(None)
+            continue
+
+        if len(dates) == len(sheet_dates):
+            # すべてのシートが期間内の場合は絞り込まない
+            range_frames = frames
+        else:
+            range_frames = [frame.filter(pl.col('date').is_between(start_date, end_date)) for frame in frames]
+        all_tasks, all_daily_tasks, all_communication_tasks, all_items = range_frames
+
+        actual_start_date = min(dates).strftime("%Y%m%d")
+        actual_end_date = max(dates).strftime("%Y%m%d")
+        results.append((
+            all_tasks, all_daily_tasks, all_communication_tasks, all_items, actual_start_date, actual_end_date
+        ))
+    return results
+
 
 class ExcelTaskReader:
-    def __init__(self, config):
-        self.config = config
+    # 1プロセスあたりの最小シート数（これより少ない場合は起動コストの方が大きい）
+    MIN_SHEETS_PER_WORKER = 10
+
+    def __init__(self, settings, cache_name=None, workers=None):
+        """settings には Settings を渡す。設定（ConfigParser）を渡した場合はそこから作成する
+
+        cache_name を指定した場合は読み込みキャッシュの保存先のその名前のフォルダを使う。
+        workers を指定した場合は設定ファイルの workers の代わりにそのプロセス数でシートを解析する。
+        """
+        # 設定は作成時に1回だけ検証し、シートごとの処理では属性を参照する
+        self.settings = as_settings(settings)
+        self.row_bands = self.settings.row_bands
+        # 読み込み方式。openpyxl が基準実装、xml はzip内のXMLを直接読む高速な実装
+        self.backend = self.settings.analysis.reader_backend
+        self.cache_name = cache_name
+        self.cache = self.create_cache()
+        self.workers = workers or self.settings.analysis.workers
+
+    def get_row_bands(self):
+        """業務・コミュニケーション・デイリータスクの行範囲を {名前: (開始行, 終了行)} で返す"""
+        return self.row_bands.as_dict()
+
+    def get_max_row(self):
+        return self.row_bands.max_row
+
+    def get_band_rows(self):
+        """日付セルの行と、いずれかの行範囲に含まれる行番号の集合"""
+        return self.row_bands.rows
+
+    def read_sheet_rows(self, sheet):
+        """A～C列の値を行番号をキーにして1回の走査で取得する"""
+        max_row = self.get_max_row()
+
+        rows = {}
+        for row, values in enumerate(
+                sheet.iter_rows(min_row=1, max_row=max_row, max_col=3, values_only=True), start=1):
+            rows[row] = values
+        return rows
 
     @staticmethod
-    def extract_cell_data(sheet, row, date):
-        content = sheet[f'B{row}'].value
-        time = sheet[f'C{row}'].value
+    def get_row_value(rows, row, column):
+        values = rows.get(row)
+        if values is None or len(values) <= column:
+            return None
+        return values[column]
 
+    @staticmethod
+    def parse_task_minutes(content, time):
+        """業務内容と時間(分)の組を返す。集計対象外の行は None を返す"""
         if not (content and time and time != '*'):
             return None
 
@@ -29,120 +196,348 @@ class ExcelTaskReader:
                 return None
 
             content = content.split()[0] if content else content
-            result = {
-                'date': date,
-                'content': content,
-                'minutes': minutes
-            }
-
-            return result
+            return content, minutes
         except (ValueError, TypeError) as e:
             print(f"時間の変換でエラー: {e}")
             return None
 
-    def load_excel_task_data(self, wb, sheet_name, date):
-        sheet = wb[sheet_name]
-        tasks = []
-        daily_tasks = []
-        communication_tasks = []
+    @staticmethod
+    def parse_communication(content, time):
+        """氏名・内容・時間(分)の組を返す。氏名のない行や集計対象外の行は None を返す"""
+        if not (content and time and time != '*'):
+            return None
 
-        # クラーク業務とクラーク業務以外のデータを抽出
-        start_row = self.config.getint('Analysis', 'start_row')
-        end_row = self.config.getint('Analysis', 'end_row')
+        try:
+            # 名前を抽出 (括弧内の文字列を取得)
+            name_match = re.search(r'\((.*?)\)', content)
+            if name_match:
+                name = name_match.group(1)
+                content = re.sub(r'\(.*?\)', '', content).strip()
+                content = content.split()[0]
+                minutes = float(time)
+                return name, content, minutes
+        except (ValueError, TypeError) as e:
+            print(f"コミュニケーションデータの時間の変換でエラー: {e}")
 
-        for row in range(start_row, end_row + 1):
-            data = self.extract_cell_data(sheet, row, date)
-            if data:
-                tasks.append(data)
+        return None
+
+    @staticmethod
+    def extract_cell_data(sheet, row, date):
+        content = sheet[f'B{row}'].value
+        time = sheet[f'C{row}'].value
 
-        daily_start_row = self.config.getint('Analysis', 'daily_task_start_row')
-        daily_end_row = self.config.getint('Analysis', 'daily_task_end_row')
+        parsed = ExcelTaskReader.parse_task_minutes(content, time)
+        if parsed is None:
+            return None
 
-        for row in range(daily_start_row, daily_end_row + 1):
-            data = self.extract_cell_data(sheet, row, date)
-            if data:
-                daily_tasks.append(data)
+        content, minutes = parsed
+        return {
+            'date': date,
+            'content': content,
+            'minutes': minutes
+        }
 
-        comm_start_row = self.config.getint('Analysis', 'communication_start_row')
-        comm_end_row = self.config.getint('Analysis', 'communication_end_row')
+    def load_excel_task_data(self, wb, sheet_name, date):
+        """1シートのクラーク業務・デイリータスク・コミュニケーションを行範囲ごとに読み込み、行ごとの辞書のリストで返す
 
-        for row in range(comm_start_row, comm_end_row + 1):
-            content = sheet[f'B{row}'].value
-            time = sheet[f'C{row}'].value
+        分析では collect_sheet_records で全項目とあわせて1回の走査で読み込む。
+        """
+        sheet = wb[sheet_name]
+        bands = self.row_bands
+        tasks = [data for row in bands.tasks if (data := self.extract_cell_data(sheet, row, date))]
+        daily_tasks = [data for row in bands.daily if (data := self.extract_cell_data(sheet, row, date))]
 
-            if content and time and time != '*':
-                try:
-                    # 名前を抽出 (括弧内の文字列を取得)
-                    name_match = re.search(r'\((.*?)\)', content)
-                    if name_match:
-                        name = name_match.group(1)
-                        content = re.sub(r'\(.*?\)', '', content).strip()
-                        content = content.split()[0]
-                        minutes = float(time)
-                        communication_tasks.append({
-                            'date': date,
-                            'name': name,
-                            'content': content,
-                            'minutes': minutes
-                        })
-                except (ValueError, TypeError) as e:
-                    print(f"コミュニケーションデータの時間の変換でエラー: {e}")
+        communication_tasks = []
+        for row in bands.communication:
+            parsed = self.parse_communication(sheet[f'B{row}'].value, sheet[f'C{row}'].value)
+            if parsed:
+                name, content, minutes = parsed
+                communication_tasks.append({
+                    'date': date,
+                    'name': name,
+                    'content': content,
+                    'minutes': minutes
+                })
 
         return tasks, daily_tasks, communication_tasks
 
     def load_excel_sheet_all_items(self, wb, sheet_name, date):
+        """1シートの全項目（業務データの開始行からデイリータスクの終了行まで）を行ごとの辞書のリストで返す"""
         sheet = wb[sheet_name]
-        all_items = []
+        return [data for row in self.row_bands.all_items if (data := self.extract_cell_data(sheet, row, date))]
+
+    def collect_sheet_records(self, rows, sheet_name, date, buffers):
+        """各行のB・C列を1回だけ解析し、該当するすべての集計対象のバッファに追加する
+
+        業務内容のあった行数と、そのうちどの集計対象にもならなかった行数を返す。
+        """
+        tasks, daily_tasks, communication_tasks, all_items = buffers
+
+        bands = self.row_bands
+        task_rows = bands.tasks
+        comm_rows = bands.communication
+        daily_rows = bands.daily
+        # 全項目は業務データの開始行からデイリータスクの終了行まで
+        all_item_rows = bands.all_items
+
+        first_row = min(task_rows.start, comm_rows.start, daily_rows.start)
+        last_row = bands.max_row
+
+        parsed_rows = 0
+        rejected_rows = 0
+        for row in range(first_row, last_row + 1):
+            content = self.get_row_value(rows, row, 1)
+            time = self.get_row_value(rows, row, 2)
+            collected = False
+
+            in_tasks = row in task_rows
+            in_daily = row in daily_rows
+            in_all_items = row in all_item_rows
+
+            if in_tasks or in_daily or in_all_items:
+                parsed = self.parse_task_minutes(content, time)
+                if parsed:
+                    task_content, minutes = parsed
+                    if in_tasks:
+                        tasks.append(sheet_name, date, task_content, minutes)
+                    if in_daily:
+                        daily_tasks.append(sheet_name, date, task_content, minutes)
+                    if in_all_items:
+                        all_items.append(sheet_name, date, task_content, minutes)
+                    collected = True
+
+            if row in comm_rows:
+                parsed = self.parse_communication(content, time)
+                if parsed:
+                    name, comm_content, minutes = parsed
+                    communication_tasks.append(sheet_name, date, name, comm_content, minutes)
+                    collected = True
+
+            if content:
+                parsed_rows += 1
+                if not collected:
+                    rejected_rows += 1
+
+        return parsed_rows, rejected_rows
+
+    def create_cache(self):
+        cache_dir = get_cache_dir(self.settings)
+        if cache_dir is None:
+            return None
+        if self.cache_name:
+            cache_dir = cache_dir / self.cache_name
+        # 行範囲の設定が変わった場合はキャッシュを使わない
+        return SheetCache(cache_dir, signature=repr(sorted(self.get_row_bands().items())))
+
+    def parse_sheets(self, file_path, sheet_entries, progress=None):
+        """指定したシートを解析し、シート名の列を含む種類ごとのデータフレームを返す"""
+        if not sheet_entries:
+            return empty_record_frames()
+        progress = progress or ProgressReporter()
+        if self.backend == 'xml':
+            return self.parse_sheets_xml(file_path, sheet_entries, progress)
+        return self.parse_sheets_openpyxl(file_path, sheet_entries, progress)
+
+    def parse_sheets_xml(self, file_path, sheet_entries, progress):
+        """共有文字列テーブルを1回だけ読み込み、各シートのXMLから必要な行だけを取得する"""
+        max_row = self.get_max_row()
+        band_rows = self.get_band_rows()
 
-        start_row = self.config.getint('Analysis', 'start_row')
-        end_row = self.config.getint('Analysis', 'daily_task_end_row')
+        buffers = create_record_buffers()
+        with XlsxArchive(file_path) as archive:
+            for entry in sheet_entries:
+                with span('parse_sheet', sheet=entry.name):
+                    rows = dict(archive.iter_rows(entry.member, max_row, max_col=3, rows=band_rows))
+                    progress.report.add_rows(*self.collect_sheet_records(rows, entry.name, entry.date, buffers))
+                progress.advance()
 
-        for row in range(start_row, end_row + 1):
-            data = self.extract_cell_data(sheet, row, date)
-            if data:
-                all_items.append(data)
+        return tuple(buffer.to_frame() for buffer in buffers)
 
-        return all_items
+    def parse_sheets_openpyxl(self, file_path, sheet_entries, progress):
+        """指定したシートを読み取り専用モードのopenpyxlで解析する"""
+        buffers = create_record_buffers()
+        with span('load_workbook'):
+            wb = load_workbook(filename=file_path, read_only=True)
+        try:
+            for entry in sheet_entries:
+                with span('parse_sheet', sheet=entry.name):
+                    rows = self.read_sheet_rows(wb[entry.name])
+                    progress.report.add_rows(*self.collect_sheet_records(rows, entry.name, entry.date, buffers))
+                progress.advance()
+        finally:
+            wb.close()
+
+        return tuple(buffer.to_frame() for buffer in buffers)
 
-    def read_workbook(self, file_path, start_date, end_date):
-        wb = load_workbook(filename=file_path)
-        all_tasks = []
-        all_daily_tasks = []
-        all_communication_tasks = []
-        all_items = []
-        dates = []
+    def parse_sheets_parallel(self, file_path, sheet_entries, progress=None):
+        """シートを連続した範囲に分割して複数プロセスで解析し、ブック内の順序で結合する
 
-        for sheet_name in wb.sheetnames:
-            if sheet_name == 'シート一覧':
-                continue
+        workers が1の場合やシート数が少ない場合は parse_sheets と同じく1プロセスで解析する。
+        複数プロセスの場合、進捗の通知とキャンセルの確認は分割した範囲ごとに行う。
+        """
+        progress = progress or ProgressReporter()
+        worker_count = min(
+            self.workers,
+            len(sheet_entries) // self.MIN_SHEETS_PER_WORKER
+        )
+        if worker_count <= 1:
+            return self.parse_sheets(file_path, sheet_entries, progress)
 
-            sheet = wb[sheet_name]
-            date_cell = sheet['A1'].value
+        shard_size = -(-len(sheet_entries) // worker_count)
+        shards = [
+            sheet_entries[i:i + shard_size]
+            for i in range(0, len(sheet_entries), shard_size)
+        ]
 
+        # Windowsと同じくspawnで起動する（Polarsのスレッドプールを持つプロセスのforkは安全でない）
+        mp_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=mp_context) as executor:
+            batches = []
             try:
-                if isinstance(date_cell, datetime):
-                    sheet_date = date_cell
-                else:
-                    sheet_date = datetime.strptime(str(date_cell), '%Y年%m月%d日')
+                results = executor.map(
+                    parse_sheet_shard, repeat(self.settings), repeat(file_path), shards, repeat(is_tracing())
+                )
+                for shard, (frames, parsed_rows, rejected_rows, events) in zip(shards, results):
+                    batches.append(frames)
+                    progress.report.add_rows(parsed_rows, rejected_rows)
+                    add_events(events)
+                    progress.advance(len(shard))
+            except AnalysisCancelled:
+                # 未着手の範囲は実行せずに終了する
+                executor.shutdown(cancel_futures=True)
+                raise
+            return concat_record_frames(batches)
 
-                if start_date <= sheet_date <= end_date:
-                    tasks, daily_tasks, comm_tasks = self.load_excel_task_data(wb, sheet_name, sheet_date)
-                    sheet_items = self.load_excel_sheet_all_items(wb, sheet_name, sheet_date)
+    def read_workbook(self, file_path, start_date, end_date, progress=None):
+        """期間内のシートを読み込む
 
-                    all_tasks.extend(tasks)
-                    all_daily_tasks.extend(daily_tasks)
-                    all_communication_tasks.extend(comm_tasks)
-                    all_items.extend(sheet_items)
-                    dates.append(sheet_date)
+        progress には解析したシート数を通知し、シート数・行数などを記録する ProgressReporter を渡す。
+        """
+        return self.read_workbook_ranges(file_path, [(start_date, end_date)], progress)[0]
 
-            except (ValueError, TypeError) as e:
-                print(f"シート {sheet_name} の日付の解析でエラー: {e}")
-                continue
+    def read_workbook_ranges(self, file_path, date_ranges, progress=None):
+        """複数の期間をまとめて1回だけ読み込み、期間ごとに read_workbook と同じ形式の結果を返す
 
-        if not dates:
-            raise ValueError("指定された期間内のデータがありません")
+        すべての期間を含む範囲のシートを読み込み、期間ごとに日付で絞り込む。
+        期間内にシートがない期間の結果は None になる。
+        """
+        first_date = min(start_date for start_date, _ in date_ranges)
+        last_date = max(end_date for _, end_date in date_ranges)
+        sheet_dates, frames = self.read_sources(file_path, first_date, last_date, progress)
+        return split_date_ranges(sheet_dates, frames, date_ranges)
 
-        actual_start_date = min(dates).strftime("%Y%m%d")
-        actual_end_date = max(dates).strftime("%Y%m%d")
+    def read_sources(self, input_path, start_date, end_date, progress=None):
+        """入力のブックを読み込み、read_dataset と同じ形式で返す
+
+        input_path がフォルダまたはワイルドカードの場合は、各ブックを source_workers 個までの
+        プロセスで並行して読み込み、ブックの名前を source 列に追加して結合する。
+        """
+        if not is_multi_source(input_path):
+            return self.read_dataset(input_path, start_date, end_date, progress)
+
+        file_paths = resolve_input_files(input_path)
+        if not file_paths:
+            raise FileNotFoundError(f"入力ファイルが見つかりません: {input_path}")
+
+        progress = progress or ProgressReporter()
+        progress.start_stage(STAGE_READ)
+        progress.set_total(len(file_paths))
+        progress.report.bytes_read = sum(os.path.getsize(file_path) for file_path in file_paths)
+
+        sheet_dates = []
+        batches = []
+        worker_count = min(self.settings.analysis.source_workers, len(file_paths))
+        # ワーカーから受け取ったカテゴリ型の列を結合できるように、受け取りから結合までを文字列キャッシュで囲む
+        with pl.StringCache():
+            if worker_count <= 1:
+                results = (
+                    (*read_source(self.settings, file_path, start_date, end_date), [])
+                    for file_path in file_paths
+                )
+                self.collect_sources(file_paths, results, sheet_dates, batches, progress)
+            else:
+                mp_context = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=worker_count, mp_context=mp_context) as executor:
+                    results = executor.map(
+                        read_source_in_worker, repeat(self.settings), file_paths,
+                        repeat(start_date), repeat(end_date), repeat(is_tracing())
+                    )
+                    try:
+                        self.collect_sources(file_paths, results, sheet_dates, batches, progress)
+                    except AnalysisCancelled:
+                        executor.shutdown(cancel_futures=True)
+                        raise
+
+            if not sheet_dates:
+                raise NoSheetsInRange("指定された期間内のデータがありません")
+            frames = concat_record_frames(batches)
+
+        return sorted(sheet_dates), list(frames)
+
+    @staticmethod
+    def collect_sources(file_paths, results, sheet_dates, batches, progress):
+        """ブックごとの読み込み結果に source 列を追加して batches に追加する"""
+        for file_path, (dates, frames, report, events) in zip(file_paths, results):
+            source = pl.lit(get_source_name(file_path)).cast(pl.Categorical()).alias('source')
+            batches.append(tuple(frame.with_columns(source) for frame in frames))
+            sheet_dates.extend(dates)
+            progress.report.merge_counts(report)
+            add_events(events)
+            progress.advance()
+
+    def read_dataset(self, file_path, start_date, end_date, progress=None):
+        """期間内のシートの日付のリストと、シート名の列を除いた種類ごとのデータフレームを返す"""
+        progress = progress or ProgressReporter()
+        progress.start_stage(STAGE_READ)
+        progress.report.bytes_read = os.path.getsize(file_path)
+
+        # ワーカーの結果やキャッシュのカテゴリ型の列を結合できるように、全体で文字列キャッシュを共有する
+        with pl.StringCache():
+            sheet_entries, frames = self.read_sheet_frames(file_path, start_date, end_date, progress)
+
+        # シート名の列は読み込み時の管理用のため、集計には渡さない
+        return [entry.date for entry in sheet_entries], [frame.drop('sheet') for frame in frames]
+
+    def read_sheet_frames(self, file_path, start_date, end_date, progress):
+        """期間内のシートとシート名の列を含む種類ごとのデータフレームを返す"""
+        # 期間外のシートは解析せず、内容が変わったシートだけを読み込む
+        with XlsxArchive(file_path) as archive:
+            if self.cache is not None:
+                # 日付の解決には、内容が変わっていないシートとシート一覧のフィンガープリントだけを使う
+                with span('compute_fingerprints'):
+                    fingerprints = self.cache.compute_fingerprints(archive, [TOC_SHEET_NAME])
+                known_dates = self.cache.get_cached_dates(fingerprints)
+            else:
+                known_dates = None
+            with span('select_sheets'):
+                sheet_entries = select_sheets(archive, start_date, end_date, known_dates)
+            if self.cache is not None:
+                # 内容が変わったシートは期間内のシートだけフィンガープリントを求める
+                with span('compute_fingerprints', sheets=len(sheet_entries)):
+                    fingerprints = self.cache.compute_fingerprints(archive, [entry.name for entry in sheet_entries])
+            sheet_names = archive.sheet_names
+            progress.report.sheets_scanned = sum(name != TOC_SHEET_NAME for name in sheet_names)
+        progress.report.sheets_in_range = len(sheet_entries)
+
+        if not sheet_entries:
+            raise NoSheetsInRange("指定された期間内のデータがありません")
+
+        # 進捗は期間内のシート数に対して通知する
+        progress.set_total(len(sheet_entries))
+        if self.cache is None:
+            progress.report.sheets_parsed = len(sheet_entries)
+            return sheet_entries, self.parse_sheets_parallel(file_path, sheet_entries, progress)
 
-        return all_tasks, all_daily_tasks, all_communication_tasks, all_items, actual_start_date, actual_end_date
+        stale_entries = [
+            entry for entry in sheet_entries
+            if not self.cache.is_fresh(entry, fingerprints[entry.name])
+        ]
+        progress.report.sheets_parsed = len(stale_entries)
+        # キャッシュから取得するシートは解析せずに完了とする
+        if len(stale_entries) < len(sheet_entries):
+            progress.advance(len(sheet_entries) - len(stale_entries))
+        parsed_frames = self.parse_sheets_parallel(file_path, stale_entries, progress)
+        with span('cache_update', sheets=len(stale_entries)):
+            self.cache.update(sheet_entries, parsed_frames, fingerprints, sheet_names)
+        with span('cache_get_records', sheets=len(sheet_entries)):
+            return sheet_entries, self.cache.get_records([entry.name for entry in sheet_entries])
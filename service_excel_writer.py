@@ -2,44 +2,32 @@ import os
 from pathlib import Path
 from openpyxl import load_workbook
 
+from service_xlsx_template import XlsxTemplateWriter
+from task_trace import span
+
+# 6種類の集計結果を書き込むテンプレートのシート（集計結果と同じ順序）
+RESULT_SHEET_NAMES = (
+    'クラーク業務',
+    'クラーク以外業務',
+    'デイリータスク',
+    'コミュニケーション',
+    'コミュニケーション内容',
+    '全項目',
+)
+
 
 class ExcelResultWriter:
     @staticmethod
-    def save_results(analysis_results, template_path, output_dir, start_date, end_date):
-        clerk_tasks, non_clerk_tasks, daily_tasks, communication_by_name, \
-        communication_by_content, all_items_summary = analysis_results
-
-        wb = load_workbook(filename=template_path)
-
-        clerk_sheet = wb['クラーク業務']
-        for i, row in enumerate(clerk_tasks.iter_rows(), start=2):
-            for j, value in enumerate(row, start=1):
-                clerk_sheet.cell(row=i, column=j, value=value)
-
-        non_clerk_sheet = wb['クラーク以外業務']
-        for i, row in enumerate(non_clerk_tasks.iter_rows(), start=2):
-            for j, value in enumerate(row, start=1):
-                non_clerk_sheet.cell(row=i, column=j, value=value)
-
-        daily_sheet = wb['デイリータスク']
-        for i, row in enumerate(daily_tasks.iter_rows(), start=2):
-            for j, value in enumerate(row, start=1):
-                daily_sheet.cell(row=i, column=j, value=value)
-
-        comm_sheet = wb['コミュニケーション']
-        for i, row in enumerate(communication_by_name.iter_rows(), start=2):
-            for j, value in enumerate(row, start=1):
-                comm_sheet.cell(row=i, column=j, value=value)
-
-        comm_content_sheet = wb['コミュニケーション内容']
-        for i, row in enumerate(communication_by_content.iter_rows(), start=2):
-            for j, value in enumerate(row, start=1):
-                comm_content_sheet.cell(row=i, column=j, value=value)
-
-        all_items_sheet = wb['全項目']
-        for i, row in enumerate(all_items_summary.iter_rows(), start=2):
-            for j, value in enumerate(row, start=1):
-                all_items_sheet.cell(row=i, column=j, value=value)
+    def save_results(analysis_results, template_path, output_dir, start_date, end_date, extra_sheets=None,
+                     backend='openpyxl', open_output=True):
+        """集計結果をテンプレートに書き込んで保存し、出力したファイルのパスを返す
+
+        backend は出力方式（Settings の writer_backend）。openpyxl が基準実装、zip はテンプレートのzipを
+        直接書き換える高速な実装。
+        open_output が偽の場合は保存後にExcelで開かない（画面のない定期実行など）。
+        """
+        sheet_frames = dict(zip(RESULT_SHEET_NAMES, analysis_results))
+        sheet_frames.update(extra_sheets or {})
 
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
@@ -49,8 +37,35 @@ class ExcelResultWriter:
         output_filename = f'WILLDOリストまとめ{start_date_str}_{end_date_str}.xlsx'
         output_file_path = output_path / output_filename
 
-        wb.save(output_file_path)
+        if backend == 'zip':
+            XlsxTemplateWriter(template_path).save(output_file_path, sheet_frames)
+        else:
+            ExcelResultWriter.write_workbook(template_path, output_file_path, sheet_frames)
+
+        if open_output:
+            os.system(f'start excel "{output_file_path}"')
 
-        os.system(f'start excel "{output_file_path}"')
-        
         return str(output_file_path)
+
+    @staticmethod
+    def write_workbook(template_path, output_file_path, sheet_frames):
+        """テンプレートをopenpyxlで読み込み、各シートの2行目以降に集計結果を書き込む"""
+        with span('load_template'):
+            wb = load_workbook(filename=template_path)
+
+        for sheet_name, data_frame in sheet_frames.items():
+            with span('write_sheet', sheet=sheet_name, rows=data_frame.height):
+                # テンプレートにシートがなければ見出し行付きで作成する
+                if sheet_name in wb.sheetnames:
+                    sheet = wb[sheet_name]
+                else:
+                    sheet = wb.create_sheet(sheet_name)
+                    for j, column_name in enumerate(data_frame.columns, start=1):
+                        sheet.cell(row=1, column=j, value=column_name)
+
+                for i, row in enumerate(data_frame.iter_rows(), start=2):
+                    for j, value in enumerate(row, start=1):
+                        sheet.cell(row=i, column=j, value=value)
+
+        with span('save_workbook'):
+            wb.save(output_file_path)
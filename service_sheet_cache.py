@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+from service_sheet_index import TOC_SHEET_NAME
+from task_records import RECORD_SCHEMAS, to_categorical, to_string_columns, to_string_schema
+
+CACHE_VERSION = 6
+MANIFEST_FILE = 'manifest.json'
+# 他のプロセスの書き込みと競合して残ったファイルを削除するまでの時間（秒）
+STALE_FILE_SECONDS = 3600
+SHARED_STRINGS_MEMBER = 'xl/sharedStrings.xml'
+
+
+def get_cache_dir(settings):
+    """キャッシュが有効な場合はキャッシュの保存先を返す
+
+    cache_dir の指定がなければ出力フォルダと同じ階層の cache フォルダを使用する。
+    """
+    if not settings.analysis.use_cache:
+        return None
+
+    paths = settings.paths
+    if paths.cache_dir:
+        return Path(paths.cache_dir)
+    if not paths.output_dir:
+        return None
+    return Path(paths.output_dir).parent / 'cache'
+
+
+class SheetCache:
+    """シートごとの読み込み結果をParquet形式で保存するキャッシュ
+
+    シートXMLのCRCと、そのシートが参照する共有文字列の値をフィンガープリントとし、
+    内容が変わったシートだけを再読み込みの対象にする。
+    読み込みをまたいで保持するため、カテゴリ型の列は文字列型で保持し、get_records で変換して返す。
+
+    画面・CLI・サーバーが同じ保存先を使う場合があるため、保存のたびに別の名前のParquetファイルを書き込み、
+    それらのファイル名を記録したマニフェストを最後に置き換える。読み込む側は常に1回の保存で書き込んだ
+    ファイルの組を読み込む。
+    """
+
+    def __init__(self, cache_dir, signature=''):
+        self.cache_dir = Path(cache_dir)
+        self.signature = signature
+        self.sheets = None
+        self.frames = None
+        # フィンガープリントの計算に使ったシートごとの情報（シート一覧のシートも含む）
+        self.sources = None
+        self.sources_changed = False
+        # 読み込んだ（保存した）マニフェストが参照するファイル名
+        self.files = {}
+
+    def compute_fingerprints(self, archive, sheet_names=()):
+        """内容が変わっていないシートと sheet_names のシートのフィンガープリントを求める
+
+        共有文字列テーブルはどのシートを編集しても書き換わるため、テーブル全体ではなく
+        シートが参照している文字列の値だけをフィンガープリントに含める。
+        参照している文字列の番号は、シートXMLが変わっていなければ前回の結果を使う。
+        シートXMLが変わったシートは番号を求めるためにXML全体を走査するため、
+        sheet_names（期間内のシートとシート一覧）に含まれるシートだけを対象にする。
+        """
+        self.load()
+        try:
+            shared_strings_crc = archive.zip.getinfo(SHARED_STRINGS_MEMBER).CRC
+        except KeyError:
+            shared_strings_crc = 0
+
+        sheet_names = set(sheet_names)
+        fingerprints = {}
+        for name, member in archive.sheets:
+            crc = archive.member_crc(member)
+            source = self.sources.get(name)
+            if source is not None and source['crc'] == crc:
+                if source['shared_strings_crc'] != shared_strings_crc:
+                    source = self.create_source(archive, crc, shared_strings_crc, source['strings'])
+            elif name in sheet_names:
+                source = self.create_source(archive, crc, shared_strings_crc, archive.shared_string_indices(member))
+            else:
+                continue
+
+            if self.sources.get(name) is not source:
+                self.sources[name] = source
+                self.sources_changed = True
+            fingerprints[name] = source['fingerprint']
+        return fingerprints
+
+    def create_source(self, archive, crc, shared_strings_crc, indices):
+        strings_hash = self.hash_strings(archive.shared_strings[index] for index in indices)
+        return {
+            'crc': crc,
+            'shared_strings_crc': shared_strings_crc,
+            'strings': indices,
+            'fingerprint': f'{crc:08x}-{strings_hash}',
+        }
+
+    @staticmethod
+    def hash_strings(strings):
+        digest = hashlib.sha1()
+        for string in strings:
+            digest.update(string.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()[:16]
+
+    def load(self):
+        """保存済みのキャッシュを読み込む。形式や行範囲の設定が異なる場合は破棄する"""
+        if self.sheets is not None:
+            return
+
+        self.sheets = {}
+        self.frames = {kind: pl.DataFrame(schema=to_string_schema(schema)) for kind, schema in RECORD_SCHEMAS.items()}
+        self.sources = {}
+
+        manifest_path = self.cache_dir / MANIFEST_FILE
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != CACHE_VERSION or manifest.get('signature') != self.signature:
+                return
+
+            files = manifest['files']
+            frames = {kind: pl.read_parquet(self.cache_dir / files[kind]) for kind in RECORD_SCHEMAS}
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, pl.exceptions.PolarsError) as e:
+            print(f"キャッシュの読み込み中にエラーが発生しました: {e}")
+            return
+
+        self.files = files
+        self.frames = frames
+        self.sheets = {
+            name: (info['fingerprint'], datetime.fromisoformat(info['date']), info['toc_fingerprint'])
+            for name, info in manifest['sheets'].items()
+        }
+        self.sources = manifest['sources']
+
+    def get_cached_dates(self, fingerprints):
+        """内容が変わっていないシートの日付を返す
+
+        日付はシート一覧から取得している場合があるため、日付を確認したときからシート一覧が変わったシートは返さない。
+        """
+        self.load()
+        toc_fingerprint = fingerprints.get(TOC_SHEET_NAME)
+        return {
+            name: sheet_date
+            for name, (fingerprint, sheet_date, sheet_toc_fingerprint) in self.sheets.items()
+            if fingerprints.get(name) == fingerprint and sheet_toc_fingerprint == toc_fingerprint
+        }
+
+    def is_fresh(self, entry, fingerprint):
+        """シートの内容と日付がキャッシュしたときから変わっていないか"""
+        self.load()
+        return self.sheets.get(entry.name, (None, None, None))[:2] == (fingerprint, entry.date)
+
+    def update(self, sheet_entries, frames, fingerprints, sheet_names):
+        """期間内のシートの情報と再読み込みしたシートの結果でキャッシュを更新して保存する
+
+        sheet_entries は期間内のすべてのシート、frames はそのうち is_fresh でないシートを解析した
+        シート名の列を含む種類ごとのデータフレーム。期間内のシートの日付は今回のシート一覧で確認したものとして記録する。
+        sheet_names はブックのすべてのシート名で、ブックから削除されたシートはキャッシュからも削除する。
+        """
+        self.load()
+        toc_fingerprint = fingerprints.get(TOC_SHEET_NAME)
+        replaced = {entry.name for entry in sheet_entries if not self.is_fresh(entry, fingerprints[entry.name])}
+        removed = set(self.sheets) - set(sheet_names)
+        sheets = {entry.name: (fingerprints[entry.name], entry.date, toc_fingerprint) for entry in sheet_entries}
+        checked = any(self.sheets.get(name) != sheet for name, sheet in sheets.items())
+        for name in set(self.sources) - set(sheet_names):
+            del self.sources[name]
+            self.sources_changed = True
+        if not replaced and not removed and not checked and not self.sources_changed:
+            return
+
+        dropped = list(replaced | removed)
+        for kind, frame in zip(RECORD_SCHEMAS, frames):
+            self.frames[kind] = pl.concat([
+                self.frames[kind].filter(~pl.col('sheet').is_in(dropped)),
+                to_string_columns(frame)
+            ])
+
+        for name in removed:
+            del self.sheets[name]
+        self.sheets.update(sheets)
+
+        self.save()
+
+    def save(self):
+        generation = uuid.uuid4().hex[:12]
+        files = {kind: f'{kind}-{generation}.parquet' for kind in RECORD_SCHEMAS}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for kind, frame in self.frames.items():
+                frame.write_parquet(self.cache_dir / files[kind])
+
+            manifest = {
+                'version': CACHE_VERSION,
+                'signature': self.signature,
+                'files': files,
+                'sources': self.sources,
+                'sheets': {
+                    name: {
+                        'fingerprint': fingerprint,
+                        'date': sheet_date.isoformat(),
+                        'toc_fingerprint': toc_fingerprint,
+                    }
+                    for name, (fingerprint, sheet_date, toc_fingerprint) in self.sheets.items()
+                }
+            }
+
+            # 書き込み途中のマニフェストを読まないように一時ファイルから置き換える
+            temp_path = self.cache_dir / f'{MANIFEST_FILE}.{generation}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_dir / MANIFEST_FILE)
+        except OSError as e:
+            print(f"キャッシュの保存中にエラーが発生しました: {e}")
+            return
+
+        previous_files, self.files = self.files, files
+        self.sources_changed = False
+        self.remove_unused_files(previous_files.values())
+
+    def remove_unused_files(self, previous_files):
+        """置き換える前のファイルと、競合して残った古いファイルを削除する
+
+        他のプロセスが書き込み中のファイルを削除しないように、前回のファイル以外は古いものだけを対象にする。
+        """
+        previous_files = set(previous_files)
+        current_files = set(self.files.values())
+        stale_before = time.time() - STALE_FILE_SECONDS
+        for path in [*self.cache_dir.glob('*.parquet'), *self.cache_dir.glob('*.tmp')]:
+            if path.name in current_files:
+                continue
+            try:
+                if path.name in previous_files or path.stat().st_mtime < stale_before:
+                    path.unlink()
+            except OSError:
+                # 他のプロセスが読み込み中の場合や削除済みの場合は次回以降に削除する
+                pass
+
+    def get_records(self, sheet_names):
+        """指定したシートの読み込み結果をシートの順序どおりに種類ごとのデータフレームで返す"""
+        self.load()
+        order = {name: index for index, name in enumerate(sheet_names)}
+        sheet_order = pl.col('sheet').replace_strict(order, return_dtype=pl.Int64)
+
+        return tuple(
+            to_categorical(
+                self.frames[kind]
+                .filter(pl.col('sheet').is_in(sheet_names))
+                .sort(sheet_order, maintain_order=True)
+            )
+            for kind in RECORD_SCHEMAS
+        )
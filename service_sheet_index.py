@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+TOC_SHEET_NAME = 'シート一覧'
+TOC_MAX_COLUMN = 10
+EXCEL_MAX_ROW = 1048576
+
+
+class SheetEntry(NamedTuple):
+    name: str
+    member: str
+    date: Optional[datetime]
+
+
+def parse_sheet_date(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(str(value), '%Y年%m月%d日')
+
+
+def read_toc_dates(archive, sheet_names):
+    """シート一覧からシート名と日付の組を取得する
+
+    シート名と一致するセルと日付として解釈できるセルが同じ行にある場合のみ対応付ける。
+    """
+    if TOC_SHEET_NAME not in archive.sheet_names:
+        return {}
+
+    toc_member = archive.get_member(TOC_SHEET_NAME)
+    dates = {}
+    # ハイパーリンク関数などの数式は計算済みの値で判定する
+    for _, values in archive.iter_rows(toc_member, max_row=EXCEL_MAX_ROW,
+                                       max_col=TOC_MAX_COLUMN, keep_formulas=False):
+        name = None
+        sheet_date = None
+        for value in values:
+            if value is None:
+                continue
+            if name is None and isinstance(value, str) and value in sheet_names:
+                name = value
+                continue
+            if sheet_date is None:
+                try:
+                    sheet_date = parse_sheet_date(value)
+                except (ValueError, TypeError):
+                    pass
+        if name is not None and sheet_date is not None:
+            dates[name] = sheet_date
+    return dates
+
+
+def build_sheet_index(archive, known_dates=None):
+    """各シートの日付をシート一覧またはA1セルのみから解決する
+
+    known_dates には内容が変わっていないことを確認済みのシートの日付を渡す。
+    """
+    known_dates = known_dates or {}
+    sheet_names = {name for name, _ in archive.sheets if name != TOC_SHEET_NAME}
+    toc_dates = {} if sheet_names <= set(known_dates) else read_toc_dates(archive, sheet_names)
+
+    entries = []
+    for name, member in archive.sheets:
+        if name == TOC_SHEET_NAME:
+            continue
+
+        sheet_date = known_dates.get(name) or toc_dates.get(name)
+        if sheet_date is None:
+            try:
+                sheet_date = parse_sheet_date(archive.read_cell(member, 1, 1))
+            except (ValueError, TypeError) as e:
+                print(f"シート {name} の日付の解析でエラー: {e}")
+
+        entries.append(SheetEntry(name, member, sheet_date))
+    return entries
+
+
+def select_sheets(archive, start_date, end_date, known_dates=None):
+    """期間内のシートだけをブック内の順序で返す"""
+    entries = build_sheet_index(archive, known_dates)
+
+    return [
+        entry for entry in entries
+        if entry.date is not None and start_date <= entry.date <= end_date
+    ]
@@ -1,47 +1,244 @@
+import os
+import threading
 from datetime import datetime
-from config_manager import load_config
-from service_excel_reader import ExcelTaskReader
+from pathlib import Path
+from config_manager import load_config, read_settings
+from service_daily_cube import DailyCube, get_cube_dir
+from service_excel_reader import ExcelTaskReader, get_input_signature, split_date_ranges
 from service_data_analyzer import TaskDataAnalyzer
 from service_excel_writer import ExcelResultWriter
+from task_memory import StageMemoryProfiler
+from task_progress import STAGE_ANALYZE, STAGE_READ, STAGE_WRITE, AnalysisCancelled, ProgressReporter
+from task_trace import span, start_tracing, stop_tracing
 
 
 class TaskAnalyzer:
-    def __init__(self):
-        self.config = load_config()
-        self.paths_config = self.config['PATHS']
-        self.reader = ExcelTaskReader(self.config)
-        self.analyzer = TaskDataAnalyzer()
+    def __init__(self, settings=None):
+        """settings（config_manager.Settings）を省略した場合は設定ファイルを読み込んで作成する
+
+        読み込み・集計・出力の設定はすべて settings から取得する。画面は設定ファイルが編集されて
+        Settings が変わった場合に作成し直す。
+        """
+        self.settings = settings if settings is not None else read_settings(load_config())
+        self.paths = self.settings.paths
+        self.reader = ExcelTaskReader(self.settings)
+        self.analyzer = TaskDataAnalyzer(
+            self.settings.categories,
+            rollup_periods=self.settings.analysis.rollup_periods
+        )
         self.writer = ExcelResultWriter()
+        self.writer_backend = self.settings.analysis.writer_backend
+        self.cube = self.create_cube()
+        # 監視モードのスレッドと分析のスレッドが同時に読み込み・集計を行わないようにする
+        self.lock = threading.RLock()
+        # 最後に求めた集計結果 ((開始日, 終了日, 入力ファイルの状態), 結果)
+        self.prepared = None
+
+    def create_cube(self):
+        cube_dir = get_cube_dir(self.settings)
+        if cube_dir is None:
+            return None
+        # 行範囲の設定が変わった場合は作り直す
+        return DailyCube(cube_dir, signature=repr(sorted(self.reader.get_row_bands().items())))
+
+    def query_cube(self, date_ranges, progress):
+        """日別集計から期間ごとに read_workbook と同じ形式の結果を返す
+
+        入力ファイルが変わっている場合は、ブック全体を読み込んで日別集計を作り直す。
+        """
+        file_path = self.paths.input_file_path
+        progress.start_stage(STAGE_READ)
+        if not self.cube.is_current(file_path):
+            # 内容が変わっていないシートは読み込みキャッシュから取得する
+            sheet_dates, frames = self.reader.read_sources(file_path, datetime.min, datetime.max, progress)
+            with span('build_cube'):
+                self.cube.build(file_path, sheet_dates, frames)
+        return split_date_ranges(self.cube.sheet_dates, self.cube.frames, date_ranges)
+
+    def create_progress(self, progress_callback, cancel_event):
+        """メモリの計測が有効な場合は計測を開始し、段階ごとに計測する ProgressReporter を返す"""
+        memory = None
+        if self.settings.analysis.memory_profile:
+            memory = StageMemoryProfiler()
+            memory.start()
+        return ProgressReporter(progress_callback, cancel_event, memory=memory)
 
-    def run_analysis(self, start_date_str, end_date_str):
+    def run_analysis(self, start_date_str, end_date_str, progress_callback=None, cancel_event=None):
+        """分析を実行し、(成否, メッセージ, RunReport) を返す
+
+        progress_callback には (段階, 完了数, 全体数) が通知される。
+        cancel_event がセットされると、次の確認時点で分析を中断する。
+        RunReport には失敗した場合も途中までの段階ごとの時間などが記録される。
+        """
+        progress = self.create_progress(progress_callback, cancel_event)
+        if self.settings.analysis.trace:
+            start_tracing()
         try:
             start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
 
-            tasks, daily_tasks, comm_tasks, all_items, actual_start_date_str, actual_end_date_str = self.reader.read_workbook(
-                self.paths_config['input_file_path'],
-                start_date,
-                end_date
-            )
+            with span('run_analysis', start_date=start_date_str, end_date=end_date_str):
+                output_file = self.execute(start_date, end_date, progress)
 
-            actual_start_date = datetime.strptime(actual_start_date_str, '%Y%m%d')
-            actual_end_date = datetime.strptime(actual_end_date_str, '%Y%m%d')
+            return True, f"分析が完了しました。結果は {output_file} に保存されました。", progress.report
 
-            analysis_results = self.analyzer.analyze_task_data(
-                tasks, daily_tasks, comm_tasks, all_items
-            )
+        except AnalysisCancelled:
+            return False, "分析をキャンセルしました。", progress.report
+        except ValueError as ve:
+            return False, f"日付の形式が正しくありません: {str(ve)}", progress.report
+        except Exception as e:
+            return False, f"分析中にエラーが発生しました: {str(e)}", progress.report
+        finally:
+            progress.finish_stage()
+            if progress.memory is not None:
+                progress.memory.stop()
+            tracer = stop_tracing()
+            if tracer is not None:
+                progress.report.trace_path = self.save_trace(tracer)
+
+    def run_batch(self, date_ranges, open_output=False, progress_callback=None, cancel_event=None):
+        """複数の期間 [(開始日, 終了日), ...] をブックの1回の読み込みで分析し、期間ごとに結果を出力する
+
+        (すべて成功したか, 期間ごとのメッセージのリスト, RunReport) を返す。
+        期間内のデータがない期間はメッセージに記録し、残りの期間の出力は続ける。
+        """
+        progress = self.create_progress(progress_callback, cancel_event)
+        if self.settings.analysis.trace:
+            start_tracing()
+        try:
+            with span('run_batch', ranges=len(date_ranges)):
+                messages = self.execute_batch(date_ranges, open_output, progress)
+            return all(success for success, _ in messages), [message for _, message in messages], progress.report
+
+        except AnalysisCancelled:
+            return False, ["分析をキャンセルしました。"], progress.report
+        except Exception as e:
+            return False, [f"分析中にエラーが発生しました: {str(e)}"], progress.report
+        finally:
+            progress.finish_stage()
+            if progress.memory is not None:
+                progress.memory.stop()
+            tracer = stop_tracing()
+            if tracer is not None:
+                progress.report.trace_path = self.save_trace(tracer)
+
+    def execute_batch(self, date_ranges, open_output, progress):
+        """すべての期間を含む範囲を1回だけ読み込み、期間ごとに集計・出力した (成否, メッセージ) のリストを返す"""
+        with span(STAGE_READ):
+            if self.cube is None:
+                range_results = self.reader.read_workbook_ranges(
+                    self.paths.input_file_path,
+                    date_ranges,
+                    progress=progress
+                )
+            else:
+                range_results = self.query_cube(date_ranges, progress)
+
+        messages = []
+        for (start_date, end_date), result in zip(date_ranges, range_results):
+            period = f"{start_date:%Y-%m-%d}～{end_date:%Y-%m-%d}"
+            if result is None:
+                messages.append((False, f"{period}: 指定された期間内のデータがありません"))
+                continue
+            tasks, daily_tasks, comm_tasks, all_items, actual_start_date_str, actual_end_date_str = result
 
+            progress.start_stage(STAGE_ANALYZE)
+            with span(STAGE_ANALYZE, period=period):
+                analysis_results, extra_sheets = self.analyzer.analyze(
+                    tasks, daily_tasks, comm_tasks, all_items
+                )
+
+            progress.start_stage(STAGE_WRITE)
+            with span(STAGE_WRITE, period=period):
+                output_file = self.writer.save_results(
+                    analysis_results,
+                    self.paths.template_path,
+                    self.paths.output_dir,
+                    datetime.strptime(actual_start_date_str, '%Y%m%d'),
+                    datetime.strptime(actual_end_date_str, '%Y%m%d'),
+                    extra_sheets,
+                    backend=self.writer_backend,
+                    open_output=open_output
+                )
+            progress.report.bytes_written += os.path.getsize(output_file)
+            messages.append((True, f"{period}: {output_file}"))
+        return messages
+
+    def execute(self, start_date, end_date, progress):
+        """読み込み・集計・出力を順に実行し、出力したファイルのパスを返す"""
+        analysis_results, extra_sheets, actual_start_date, actual_end_date = self.prepare(
+            start_date, end_date, progress
+        )
+
+        progress.start_stage(STAGE_WRITE)
+        with span(STAGE_WRITE):
             output_file = self.writer.save_results(
                 analysis_results,
-                self.paths_config['template_path'],
-                self.paths_config['output_dir'],
+                self.paths.template_path,
+                self.paths.output_dir,
                 actual_start_date,
-                actual_end_date
+                actual_end_date,
+                extra_sheets,
+                backend=self.writer_backend
             )
+        progress.report.bytes_written = os.path.getsize(output_file)
+        return output_file
 
-            return True, f"分析が完了しました。結果は {output_file} に保存されました。"
+    def prepare(self, start_date, end_date, progress=None):
+        """期間の集計結果 (6種類の集計, 追加のシート, 実際の開始日, 実際の終了日) を求めてメモリに保持する
 
-        except ValueError as ve:
-            return False, f"日付の形式が正しくありません: {str(ve)}"
-        except Exception as e:
-            return False, f"分析中にエラーが発生しました: {str(e)}"
+        前回と同じ期間で入力ファイルが変わっていなければ、読み込み・集計を行わずに保持している結果を返す。
+        監視モード（WorkbookWatcher）はファイルが変わるたびにこのメソッドを呼び、結果を最新に保つ。
+        """
+        progress = progress or ProgressReporter()
+        try:
+            signature = get_input_signature(self.paths.input_file_path)
+        except OSError:
+            signature = None
+
+        with self.lock:
+            key = (start_date, end_date, signature)
+            if signature is not None and self.prepared is not None and self.prepared[0] == key:
+                return self.prepared[1]
+
+            tasks, daily_tasks, comm_tasks, all_items, actual_start_date_str, actual_end_date_str = self.read_range(
+                start_date, end_date, progress
+            )
+
+            progress.start_stage(STAGE_ANALYZE)
+            with span(STAGE_ANALYZE):
+                analysis_results, extra_sheets = self.analyzer.analyze(
+                    tasks, daily_tasks, comm_tasks, all_items
+                )
+
+            prepared = (
+                analysis_results,
+                extra_sheets,
+                datetime.strptime(actual_start_date_str, '%Y%m%d'),
+                datetime.strptime(actual_end_date_str, '%Y%m%d'),
+            )
+            self.prepared = (key, prepared)
+            return prepared
+
+    def read_range(self, start_date, end_date, progress):
+        with span(STAGE_READ):
+            if self.cube is None:
+                return self.reader.read_workbook(
+                    self.paths.input_file_path,
+                    start_date,
+                    end_date,
+                    progress=progress
+                )
+            result = self.query_cube([(start_date, end_date)], progress)[0]
+            if result is None:
+                raise ValueError("指定された期間内のデータがありません")
+            return result
+
+    def save_trace(self, tracer):
+        """トレースを出力フォルダの trace フォルダに実行日時のファイル名で保存する"""
+        trace_dir = Path(self.paths.output_dir or '.') / 'trace'
+        try:
+            return tracer.save(trace_dir / f"trace_{datetime.now():%Y%m%d_%H%M%S}.json")
+        except OSError as e:
+            print(f"トレースの保存中にエラーが発生しました: {e}")
+            return None
@@ -0,0 +1,79 @@
+import threading
+
+from config_manager import get_config_bool, get_config_value
+from service_excel_reader import get_input_signature
+
+# 監視する間隔の既定値(秒)
+DEFAULT_WATCH_INTERVAL = 5.0
+
+
+def get_watch_interval(config):
+    """[Analysis] watch が有効な場合に入力のブックを確認する間隔(秒)を返す。無効な場合はNone"""
+    if not get_config_bool(config, 'Analysis', 'watch', False):
+        return None
+    try:
+        return max(0.5, float(get_config_value(config, 'Analysis', 'watch_interval', DEFAULT_WATCH_INTERVAL)))
+    except ValueError:
+        return DEFAULT_WATCH_INTERVAL
+
+
+class WorkbookWatcher:
+    """入力のブックの更新日時とサイズを一定間隔で確認し、変わった場合に on_change を呼ぶ
+
+    OSのファイル監視の仕組みは使わず、os.stat だけで確認する。
+    Excelの保存中に呼ばないよう、変わった後に同じ状態が2回続いた時点で on_change を呼ぶ。
+    on_change は監視スレッドで呼ばれるため、画面の操作は行わないこと。
+    """
+
+    def __init__(self, input_path, on_change, interval=DEFAULT_WATCH_INTERVAL):
+        self.input_path = input_path
+        self.on_change = on_change
+        self.interval = interval
+        self.signature = self.get_signature()
+        self.pending = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def get_signature(self):
+        try:
+            return get_input_signature(self.input_path)
+        except OSError:
+            # 保存中などで一時的に読めない場合は変わっていないものとして扱う
+            return None
+
+    def poll(self):
+        """1回確認し、on_change を呼んだ場合は真を返す"""
+        signature = self.get_signature()
+        if signature is None or signature == self.signature:
+            self.pending = None
+            return False
+        if signature != self.pending:
+            # 変わった直後は保存中の可能性があるため、次の確認まで待つ
+            self.pending = signature
+            return False
+
+        self.signature = signature
+        self.pending = None
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"ブックの更新後の処理中にエラーが発生しました: {e}")
+        return True
+
+    def run(self):
+        """stop が呼ばれるまで確認を繰り返す"""
+        while not self.stop_event.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """監視を止める。on_change の中（監視スレッド）から呼んだ場合は終了を待たない"""
+        self.stop_event.set()
+        if self.thread is not None:
+            if self.thread is not threading.current_thread():
+                self.thread.join()
+            self.thread = None
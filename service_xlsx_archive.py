@@ -0,0 +1,249 @@
+import posixpath
+import re
+import zipfile
+from datetime import datetime
+from xml.etree.ElementTree import iterparse, fromstring
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+WORKSHEET_REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+
+CELL_REF_PATTERN = re.compile(r'([A-Z]+)(\d+)')
+
+
+def column_index(letters):
+    """列記号(A, B, ..., AA)を1始まりの列番号に変換する"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - 64)
+    return index
+
+
+class XlsxArchive:
+    """openpyxlのオブジェクトモデルを作らずにxlsxのzipを直接読むためのクラス"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.zip = zipfile.ZipFile(file_path)
+        self.date1904 = False
+        self.sheets = self._read_sheet_list()
+        self._shared_strings = None
+        self._date_styles = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    def _read_sheet_list(self):
+        """workbook.xmlとそのrelsからシート名とzip内のパスの対応を取得する"""
+        workbook = fromstring(self.zip.read('xl/workbook.xml'))
+        workbook_pr = workbook.find(f'{NS_MAIN}workbookPr')
+        if workbook_pr is not None:
+            self.date1904 = workbook_pr.get('date1904') in ('1', 'true')
+
+        rels = fromstring(self.zip.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.iter(f'{NS_PKG_REL}Relationship'):
+            if rel.get('Type') != WORKSHEET_REL_TYPE:
+                continue
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[rel.get('Id')] = target
+
+        sheets = []
+        for sheet in workbook.iter(f'{NS_MAIN}sheet'):
+            member = targets.get(sheet.get(f'{NS_REL}id'))
+            if member:
+                sheets.append((sheet.get('name'), member))
+        return sheets
+
+    @property
+    def sheet_names(self):
+        return [name for name, _ in self.sheets]
+
+    def get_member(self, sheet_name):
+        for name, member in self.sheets:
+            if name == sheet_name:
+                return member
+        raise KeyError(sheet_name)
+
+    def member_crc(self, member):
+        return self.zip.getinfo(member).CRC
+
+    @property
+    def shared_strings(self):
+        """共有文字列テーブルを初回アクセス時に1回だけ読み込む"""
+        if self._shared_strings is None:
+            self._shared_strings = self._read_shared_strings()
+        return self._shared_strings
+
+    def _read_shared_strings(self):
+        strings = []
+        try:
+            source = self.zip.open('xl/sharedStrings.xml')
+        except KeyError:
+            return strings
+
+        with source:
+            for _, element in iterparse(source):
+                if element.tag != f'{NS_MAIN}si':
+                    continue
+                strings.append(self._read_text(element))
+                element.clear()
+        return strings
+
+    @staticmethod
+    def _read_text(element):
+        # ふりがな(rPh)の文字列は含めない
+        text = element.find(f'{NS_MAIN}t')
+        if text is not None:
+            return text.text or ''
+        return ''.join(
+            (run_text.text or '')
+            for run in element.findall(f'{NS_MAIN}r')
+            for run_text in run.findall(f'{NS_MAIN}t')
+        )
+
+    @property
+    def date_styles(self):
+        """日付書式が設定されたセルスタイルの番号の集合"""
+        if self._date_styles is None:
+            self._date_styles = self._read_date_styles()
+        return self._date_styles
+
+    def _read_date_styles(self):
+        try:
+            styles = fromstring(self.zip.read('xl/styles.xml'))
+        except KeyError:
+            return set()
+
+        formats = dict(BUILTIN_FORMATS)
+        num_fmts = styles.find(f'{NS_MAIN}numFmts')
+        if num_fmts is not None:
+            for num_fmt in num_fmts.findall(f'{NS_MAIN}numFmt'):
+                formats[int(num_fmt.get('numFmtId'))] = num_fmt.get('formatCode')
+
+        date_styles = set()
+        cell_xfs = styles.find(f'{NS_MAIN}cellXfs')
+        if cell_xfs is not None:
+            for index, xf in enumerate(cell_xfs.findall(f'{NS_MAIN}xf')):
+                format_code = formats.get(int(xf.get('numFmtId', 0)))
+                if format_code and is_date_format(format_code):
+                    date_styles.add(index)
+        return date_styles
+
+    def _read_cell_value(self, cell, keep_formulas):
+        cell_type = cell.get('t', 'n')
+
+        if keep_formulas:
+            formula = cell.find(f'{NS_MAIN}f')
+            if formula is not None and formula.text:
+                return f'={formula.text}'
+
+        if cell_type == 'inlineStr':
+            inline = cell.find(f'{NS_MAIN}is')
+            return self._read_text(inline) if inline is not None else None
+
+        value = cell.findtext(f'{NS_MAIN}v')
+        if value is None or value == '':
+            return None
+
+        if cell_type == 's':
+            return self.shared_strings[int(value)]
+        if cell_type in ('str', 'e'):
+            return value
+        if cell_type == 'd':
+            # ISO 8601 形式の日付セルは openpyxl と同じく datetime で返す
+            return datetime.fromisoformat(value)
+        if cell_type == 'b':
+            return value == '1'
+
+        if value.isdigit() or (value[0] == '-' and value[1:].isdigit()):
+            number = int(value)
+        else:
+            number = float(value)
+
+        if int(cell.get('s', 0)) in self.date_styles:
+            calendar = CALENDAR_MAC_1904 if self.date1904 else CALENDAR_WINDOWS_1900
+            return from_excel(number, calendar)
+        return number
+
+    def iter_rows(self, member, max_row, max_col=3, keep_formulas=True, rows=None):
+        """シートXMLを先頭から読み、max_rowを超えた時点で解析を打ち切る
+
+        (行番号, 1～max_col列の値のタプル) を値のある行だけ返す。
+        rowsを指定した場合はその行番号のセルだけを読み込む。
+        keep_formulasがTrueの場合は数式セルを openpyxl と同じく '=数式' の文字列で返す。
+        """
+        with self.zip.open(member) as source:
+            row_index = 0
+            values = None
+            column = 0
+
+            for event, element in iterparse(source, events=('start', 'end')):
+                tag = element.tag
+
+                if event == 'start':
+                    if tag == f'{NS_MAIN}row':
+                        row_ref = element.get('r')
+                        row_index = int(row_ref) if row_ref else row_index + 1
+                        if row_index > max_row:
+                            break
+                        values = [None] * max_col if rows is None or row_index in rows else None
+                        column = 0
+                    continue
+
+                if tag == f'{NS_MAIN}c' and values is not None:
+                    ref = element.get('r')
+                    if ref:
+                        match = CELL_REF_PATTERN.match(ref)
+                        column = column_index(match.group(1))
+                    else:
+                        column += 1
+                    if column <= max_col:
+                        values[column - 1] = self._read_cell_value(element, keep_formulas)
+                    element.clear()
+                elif tag == f'{NS_MAIN}row':
+                    if values is not None:
+                        yield row_index, tuple(values)
+                        values = None
+                    element.clear()
+                elif tag == f'{NS_MAIN}sheetData':
+                    break
+
+    def shared_string_indices(self, member):
+        """シート内のセルが参照している共有文字列の番号を昇順で返す"""
+        indices = set()
+        with self.zip.open(member) as source:
+            for _, element in iterparse(source):
+                tag = element.tag
+                if tag == f'{NS_MAIN}c':
+                    if element.get('t') == 's':
+                        value = element.findtext(f'{NS_MAIN}v')
+                        if value:
+                            indices.add(int(value))
+                    element.clear()
+                elif tag == f'{NS_MAIN}row':
+                    element.clear()
+                elif tag == f'{NS_MAIN}sheetData':
+                    break
+        return sorted(indices)
+
+    def read_cell(self, member, row, column, keep_formulas=True):
+        for row_index, values in self.iter_rows(member, row, column, keep_formulas):
+            if row_index == row:
+                return values[column - 1]
+        return None
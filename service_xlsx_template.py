@@ -0,0 +1,229 @@
+import math
+import posixpath
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.utils import get_column_letter
+
+from service_xlsx_archive import NS_REL, WORKSHEET_REL_TYPE, XlsxArchive, column_index
+from task_trace import span
+
+WORKSHEET_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+
+SHEET_DATA_PATTERN = re.compile(r'<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>', re.S)
+DIMENSION_PATTERN = re.compile(r'<dimension\b[^>]*?/>')
+ROW_PATTERN = re.compile(r'<row\b([^>]*?)(?:/>|>(.*?)</row>)', re.S)
+CELL_PATTERN = re.compile(r'<c\b[^>]*?(?:/>|>.*?</c>)', re.S)
+ROW_NUMBER_PATTERN = re.compile(r'\br="(\d+)"')
+CELL_COLUMN_PATTERN = re.compile(r'\br="([A-Z]+)\d+"')
+STYLE_PATTERN = re.compile(r'\bs="(\d+)"')
+SPANS_PATTERN = re.compile(r'\s+spans="[^"]*"')
+SHEET_ID_PATTERN = re.compile(r'<sheet\b[^>]*?\bsheetId="(\d+)"')
+RELATIONSHIP_ID_PATTERN = re.compile(r'\bId="rId(\d+)"')
+# XMLに書き込めない制御文字（openpyxlでは IllegalCharacterError になる）
+ILLEGAL_CHARACTERS_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# 生成したシートXMLは一定の行数ごとにまとめて書き込む
+WRITE_CHUNK_ROWS = 1000
+
+EMPTY_SHEET_XML = (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData/></worksheet>'
+)
+
+
+def format_cell(ref, value, style=None):
+    """1セル分のXMLを返す。値がNoneの場合は書式だけを残す"""
+    style_attr = f' s="{style}"' if style else ''
+    if value is None or (isinstance(value, float) and not math.isfinite(value)):
+        return f'<c r="{ref}"{style_attr}/>' if style else ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+
+    text = ILLEGAL_CHARACTERS_PATTERN.sub('', str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def parse_template_rows(sheet_data):
+    """テンプレートの行を {行番号: (rowタグの属性, {列記号: セルのXML})} で返す"""
+    rows = {}
+    for match in ROW_PATTERN.finditer(sheet_data):
+        attributes, content = match.group(1), match.group(2) or ''
+        row_number = int(ROW_NUMBER_PATTERN.search(attributes).group(1))
+        cells = {}
+        for cell in CELL_PATTERN.finditer(content):
+            cells[CELL_COLUMN_PATTERN.search(cell.group(0)).group(1)] = cell.group(0)
+        rows[row_number] = (SPANS_PATTERN.sub('', attributes), cells)
+    return rows
+
+
+def format_template_row(attributes, cells):
+    return f'<row{attributes}>{"".join(cells.values())}</row>'
+
+
+def format_data_row(row_number, values, columns, template_row):
+    """結果の1行分のXMLを返す。テンプレートの同じ位置にあるセルの書式を引き継ぐ"""
+    attributes, template_cells = template_row or (f' r="{row_number}"', {})
+    cells = dict(template_cells)
+    for column, value in zip(columns, values):
+        template_cell = template_cells.get(column)
+        style_match = STYLE_PATTERN.search(template_cell) if template_cell else None
+        cells[column] = format_cell(f'{column}{row_number}', value, style_match.group(1) if style_match else None)
+
+    # テンプレートのセルと結果のセルを列の順に並べる
+    ordered = sorted(cells.items(), key=lambda item: column_index(item[0]))
+    return f'<row{attributes}>{"".join(cell for _, cell in ordered)}</row>'
+
+
+def iter_sheet_xml(template_xml, data_frame, header=None):
+    """テンプレートのシートXMLの2行目以降に結果の行を差し込んだXMLを断片ごとに返す
+
+    1行目の見出し行やシートの書式などテンプレートのその他の部分はそのまま残す。
+    """
+    match = SHEET_DATA_PATTERN.search(template_xml)
+    if match is None:
+        raise ValueError("テンプレートのシートにsheetDataがありません")
+
+    template_rows = parse_template_rows(match.group(1) or '')
+    if header is not None and 1 not in template_rows:
+        header_cells = {
+            get_column_letter(index): format_cell(f'{get_column_letter(index)}1', name)
+            for index, name in enumerate(header, start=1)
+        }
+        template_rows[1] = (' r="1"', header_cells)
+
+    columns = [get_column_letter(index) for index in range(1, data_frame.width + 1)]
+    last_data_row = data_frame.height + 1
+    last_row = max([last_data_row, *template_rows])
+    last_column = max([data_frame.width, 1, *(
+        column_index(column) for _, cells in template_rows.values() for column in cells
+    )])
+
+    prefix = template_xml[:match.start()]
+    dimension = f'<dimension ref="A1:{get_column_letter(last_column)}{last_row}"/>'
+    prefix = DIMENSION_PATTERN.sub(dimension, prefix, count=1)
+    yield prefix + '<sheetData>'
+
+    for row_number in sorted(row for row in template_rows if row < 2):
+        yield format_template_row(*template_rows[row_number])
+
+    chunk = []
+    for row_number, values in enumerate(data_frame.iter_rows(), start=2):
+        chunk.append(format_data_row(row_number, values, columns, template_rows.get(row_number)))
+        if len(chunk) >= WRITE_CHUNK_ROWS:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+    for row_number in sorted(row for row in template_rows if row > last_data_row):
+        yield format_template_row(*template_rows[row_number])
+
+    yield '</sheetData>' + template_xml[match.end():]
+
+
+class XlsxTemplateWriter:
+    """テンプレートのxlsxのzipを直接書き換えて結果を出力するクラス
+
+    結果を書き込むシートのXMLだけを生成し、スタイルやその他のシートなどの
+    zip内のファイルはテンプレートの内容をそのままコピーする。
+    """
+
+    def __init__(self, template_path):
+        self.template_path = template_path
+
+    def save(self, output_path, sheet_frames):
+        """sheet_frames（シート名→データフレーム）を書き込んだxlsxを output_path に保存する
+
+        テンプレートにないシートは見出し行付きで末尾に追加する。
+        """
+        with XlsxArchive(self.template_path) as template:
+            members = dict(template.sheets)
+            sheet_names = {member: name for name, member in template.sheets}
+            replaced = {members[name]: frame for name, frame in sheet_frames.items() if name in members}
+            added = [(name, frame) for name, frame in sheet_frames.items() if name not in members]
+
+            overrides = {}
+            new_sheets = []
+            if added:
+                overrides, new_sheets = self.add_sheets(template, [name for name, _ in added])
+
+            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as output:
+                for info in template.zip.infolist():
+                    if info.filename in replaced:
+                        frame = replaced[info.filename]
+                        with span('write_sheet', sheet=sheet_names[info.filename], rows=frame.height):
+                            template_xml = template.zip.read(info).decode('utf-8')
+                            self.write_member(output, info.filename, iter_sheet_xml(template_xml, frame))
+                    else:
+                        data = overrides.get(info.filename) or template.zip.read(info)
+                        output.writestr(self.copy_info(info), data)
+
+                for (name, frame), member in zip(added, new_sheets):
+                    with span('write_sheet', sheet=name, rows=frame.height):
+                        self.write_member(output, member, iter_sheet_xml(EMPTY_SHEET_XML, frame, header=frame.columns))
+
+    @staticmethod
+    def copy_info(info):
+        # テンプレートのZipInfoは書き込み時に更新されるため、名前と属性だけを引き継いだものを使う
+        copied = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+        copied.compress_type = info.compress_type
+        copied.external_attr = info.external_attr
+        return copied
+
+    @staticmethod
+    def write_member(output, member, fragments):
+        info = zipfile.ZipInfo(member)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with output.open(info, 'w') as target:
+            for fragment in fragments:
+                target.write(fragment.encode('utf-8'))
+
+    @staticmethod
+    def add_sheets(template, sheet_names):
+        """シートを追加するために書き換えた workbook.xml などの内容と、追加するシートのパスを返す"""
+        workbook_xml = template.zip.read('xl/workbook.xml').decode('utf-8')
+        rels_xml = template.zip.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+        content_types_xml = template.zip.read('[Content_Types].xml').decode('utf-8')
+
+        prefix_match = re.search(rf'xmlns:(\w+)="{re.escape(NS_REL[1:-1])}"', workbook_xml)
+        if prefix_match is None:
+            raise ValueError("テンプレートの workbook.xml の形式に対応していません")
+        rel_prefix = prefix_match.group(1)
+
+        sheet_id = max((int(value) for value in SHEET_ID_PATTERN.findall(workbook_xml)), default=0)
+        rel_id = max((int(value) for value in RELATIONSHIP_ID_PATTERN.findall(rels_xml)), default=0)
+        existing = set(template.zip.namelist())
+
+        sheet_entries = []
+        rel_entries = []
+        type_entries = []
+        members = []
+        file_number = 1
+        for name in sheet_names:
+            while f'xl/worksheets/sheet{file_number}.xml' in existing:
+                file_number += 1
+            member = f'xl/worksheets/sheet{file_number}.xml'
+            existing.add(member)
+            members.append(member)
+
+            sheet_id += 1
+            rel_id += 1
+            sheet_entries.append(f'<sheet name={quoteattr(name)} sheetId="{sheet_id}" {rel_prefix}:id="rId{rel_id}"/>')
+            rel_entries.append(
+                f'<Relationship Id="rId{rel_id}" Type="{WORKSHEET_REL_TYPE}" '
+                f'Target="{posixpath.relpath(member, "xl")}"/>'
+            )
+            type_entries.append(f'<Override PartName="/{member}" ContentType="{WORKSHEET_CONTENT_TYPE}"/>')
+
+        overrides = {
+            'xl/workbook.xml': workbook_xml.replace('</sheets>', ''.join(sheet_entries) + '</sheets>', 1),
+            'xl/_rels/workbook.xml.rels': rels_xml.replace(
+                '</Relationships>', ''.join(rel_entries) + '</Relationships>', 1),
+            '[Content_Types].xml': content_types_xml.replace('</Types>', ''.join(type_entries) + '</Types>', 1),
+        }
+        return {member: content.encode('utf-8') for member, content in overrides.items()}, members
@@ -0,0 +1,112 @@
+import csv
+from typing import NamedTuple
+
+import polars as pl
+
+from config_manager import get_config_section, get_config_value
+
+CLERK_CATEGORY = 'クラーク業務'
+DEFAULT_CATEGORY = 'クラーク以外業務'
+CATEGORY_SECTION = 'Categories'
+DEFAULT_CATEGORY_OPTION = 'default_category'
+MATCH_TYPES = ('contains', 'prefix', 'regex')
+
+
+class CategoryRule(NamedTuple):
+    category: str
+    match: str
+    pattern: str
+
+    def to_expr(self, column='content'):
+        if self.match == 'prefix':
+            return pl.col(column).str.starts_with(self.pattern)
+        if self.match == 'regex':
+            return pl.col(column).str.contains(self.pattern)
+        return pl.col(column).str.contains(self.pattern, literal=True)
+
+
+def parse_pattern(category, text):
+    """'prefix:報告' / 'regex:^会議.*' / '打合せ' の形式のパターンを解釈する"""
+    match, separator, pattern = text.strip().partition(':')
+    if not (separator and match in MATCH_TYPES):
+        return CategoryRule(category, 'contains', text.strip())
+
+    pattern = pattern.strip()
+    if match == 'regex':
+        # 集計の実行中ではなく、設定の読み込み時に正規表現の誤りを検出する
+        try:
+            pl.select(pl.lit('').str.contains(pattern))
+        except pl.exceptions.ComputeError as e:
+            raise ValueError(f"業務分類 {category} の正規表現が正しくありません: {pattern}") from e
+    return CategoryRule(category, match, pattern)
+
+
+class CategoryTaxonomy:
+    """業務内容から業務分類を決めるルールの一覧。先に一致したルールの分類を使う"""
+
+    def __init__(self, rules, default_category=DEFAULT_CATEGORY):
+        self.rules = list(rules)
+        self.default_category = default_category
+
+    def __eq__(self, other):
+        # 設定ファイルの編集で分類が変わったかを Settings の比較で判定する
+        if not isinstance(other, CategoryTaxonomy):
+            return NotImplemented
+        return (self.rules, self.default_category) == (other.rules, other.default_category)
+
+    def __hash__(self):
+        return hash((tuple(self.rules), self.default_category))
+
+    @classmethod
+    def default(cls):
+        # 従来のクラーク業務／クラーク以外業務の2分類
+        return cls([CategoryRule(CLERK_CATEGORY, 'contains', CLERK_CATEGORY)], DEFAULT_CATEGORY)
+
+    @classmethod
+    def from_csv(cls, file_path, default_category=DEFAULT_CATEGORY):
+        """category,pattern の列を持つCSVファイルから読み込む"""
+        rules = []
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('category') and row.get('pattern'):
+                    rules.append(parse_pattern(row['category'].strip(), row['pattern']))
+        return cls(rules, default_category)
+
+    @classmethod
+    def from_config(cls, config):
+        """[PATHS] category_file のCSV、または [Categories] セクションから読み込む
+
+        [Categories] セクションでは「分類名 = パターン1, パターン2」の形式で記述する。
+        どちらもない場合は従来の2分類を使う。
+        """
+        section = get_config_section(config, CATEGORY_SECTION)
+        default_category = (section or {}).get(DEFAULT_CATEGORY_OPTION, DEFAULT_CATEGORY)
+
+        category_file = get_config_value(config, 'PATHS', 'category_file')
+        if category_file:
+            return cls.from_csv(category_file, default_category)
+
+        if section is None:
+            return cls.default()
+
+        rules = []
+        for category, patterns in section.items():
+            if category == DEFAULT_CATEGORY_OPTION:
+                continue
+            rules.extend(
+                parse_pattern(category, pattern)
+                for pattern in patterns.split(',') if pattern.strip()
+            )
+        if not rules:
+            return cls.default()
+        return cls(rules, default_category)
+
+    def category_expr(self, column='content'):
+        """分類を求める式。業務内容ごとに集計済みのデータに適用することで、判定は業務内容ごとに1回になる"""
+        if not self.rules:
+            return pl.lit(self.default_category, dtype=pl.String)
+
+        expr = pl.when(self.rules[0].to_expr(column)).then(pl.lit(self.rules[0].category))
+        for rule in self.rules[1:]:
+            expr = expr.when(rule.to_expr(column)).then(pl.lit(rule.category))
+        return expr.otherwise(pl.lit(self.default_category))
@@ -0,0 +1,124 @@
+import ctypes
+import os
+import sys
+import tracemalloc
+
+from config_manager import get_config_bool
+
+# 設定ファイルを変更せずにメモリの計測を有効にする環境変数（1, true など）
+MEMORY_ENV_VAR = 'TASK_ANALYZER_MEMORY'
+
+# 段階ごとに記録する割り当て箇所の数
+TOP_ALLOCATION_SITES = 5
+
+# 割り当て箇所の集計から除くフレーム（計測そのものとモジュールの読み込み）
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+
+def is_memory_profile_enabled(config):
+    """環境変数または [Analysis] の memory_profile でメモリの計測が有効になっているか"""
+    if os.environ.get(MEMORY_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    return get_config_bool(config, 'Analysis', 'memory_profile')
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    _fields_ = [
+        ('cb', ctypes.c_ulong),
+        ('PageFaultCount', ctypes.c_ulong),
+        ('PeakWorkingSetSize', ctypes.c_size_t),
+        ('WorkingSetSize', ctypes.c_size_t),
+        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+        ('PagefileUsage', ctypes.c_size_t),
+        ('PeakPagefileUsage', ctypes.c_size_t),
+    ]
+
+
+def get_rss_bytes():
+    """プロセスの物理メモリ使用量（Windowsはワーキングセット）。取得できない環境ではNone"""
+    try:
+        if sys.platform == 'win32':
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.WorkingSetSize
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+class StageMemoryProfiler:
+    """tracemalloc で段階ごとのメモリの割り当てを計測する
+
+    段階ごとに、段階の開始時点からの割り当ての最大値（peak_bytes）、段階の終了時点で残っている
+    割り当て（retained_bytes）、終了時点のプロセスの物理メモリ使用量（rss_bytes）、
+    終了時点で増えていた割り当ての多い箇所（top_allocations）を記録する。
+    計測できるのはこのプロセスの割り当てのみで、ワーカープロセスの割り当ては含まない。
+    """
+
+    def __init__(self, top_sites=TOP_ALLOCATION_SITES):
+        self.top_sites = top_sites
+        self.was_tracing = False
+        self.stage_current = 0
+        self.stage_snapshot = None
+
+    def start(self):
+        self.was_tracing = tracemalloc.is_tracing()
+        if not self.was_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        if not self.was_tracing:
+            tracemalloc.stop()
+
+    def begin_stage(self):
+        self.stage_snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        tracemalloc.reset_peak()
+        self.stage_current = tracemalloc.get_traced_memory()[0]
+
+    def end_stage(self):
+        """begin_stage からの計測結果を辞書で返す"""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        top_allocations = [
+            {
+                'site': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                'size_bytes': stat.size_diff,
+                'count': stat.count_diff,
+            }
+            for stat in snapshot.compare_to(self.stage_snapshot, 'lineno')
+            if stat.size_diff > 0
+        ][:self.top_sites]
+        self.stage_snapshot = None
+        return {
+            'peak_bytes': peak - self.stage_current,
+            'retained_bytes': current - self.stage_current,
+            'rss_bytes': get_rss_bytes(),
+            'top_allocations': top_allocations,
+        }
+
+    def merge(self, previous, current):
+        """同じ段階を複数回実行した場合（複数の期間の出力など）の計測結果をまとめる"""
+        sites = {}
+        for allocation in previous['top_allocations'] + current['top_allocations']:
+            site = sites.setdefault(allocation['site'], {'site': allocation['site'], 'size_bytes': 0, 'count': 0})
+            site['size_bytes'] += allocation['size_bytes']
+            site['count'] += allocation['count']
+        return {
+            'peak_bytes': max(previous['peak_bytes'], current['peak_bytes']),
+            'retained_bytes': previous['retained_bytes'] + current['retained_bytes'],
+            'rss_bytes': current['rss_bytes'],
+            'top_allocations': sorted(
+                sites.values(), key=lambda site: site['size_bytes'], reverse=True
+            )[:self.top_sites],
+        }
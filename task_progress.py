@@ -0,0 +1,139 @@
+import time
+
+STAGE_READ = '読み込み'
+STAGE_ANALYZE = '集計'
+STAGE_WRITE = '出力'
+
+
+class AnalysisCancelled(Exception):
+    """分析の途中でキャンセルが要求された場合に発生する例外"""
+
+
+class RunReport:
+    """1回の分析の実行結果の記録（段階ごとの時間、シート数、行数、入出力のバイト数）"""
+
+    def __init__(self):
+        self.stage_seconds = {}
+        # ブック内のシート数（シート一覧を除く）と、そのうち期間内のシート数
+        self.sheets_scanned = 0
+        self.sheets_in_range = 0
+        # キャッシュになく解析したシート数
+        self.sheets_parsed = 0
+        # 解析したシートで業務内容のあった行数と、そのうち時間が数値でないなどの理由で集計対象外とした行数
+        self.rows_parsed = 0
+        self.rows_rejected = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        # トレースを保存した場合はそのファイルのパス
+        self.trace_path = None
+        # メモリを計測した場合の段階ごとの計測結果（task_memory.StageMemoryProfiler.end_stage の辞書）
+        self.stage_memory = {}
+
+    @property
+    def total_seconds(self):
+        return sum(self.stage_seconds.values())
+
+    def add_rows(self, parsed, rejected):
+        self.rows_parsed += parsed
+        self.rows_rejected += rejected
+
+    def merge_counts(self, other):
+        """別に読み込んだブックの RunReport のシート数・行数を加える"""
+        self.sheets_scanned += other.sheets_scanned
+        self.sheets_in_range += other.sheets_in_range
+        self.sheets_parsed += other.sheets_parsed
+        self.add_rows(other.rows_parsed, other.rows_rejected)
+
+    def to_dict(self):
+        return {
+            'stage_seconds': dict(self.stage_seconds),
+            'total_seconds': self.total_seconds,
+            'sheets_scanned': self.sheets_scanned,
+            'sheets_in_range': self.sheets_in_range,
+            'sheets_parsed': self.sheets_parsed,
+            'rows_parsed': self.rows_parsed,
+            'rows_rejected': self.rows_rejected,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'trace_path': str(self.trace_path) if self.trace_path else None,
+            'stage_memory': dict(self.stage_memory),
+        }
+
+    def format_summary(self):
+        stages = ' / '.join(f'{stage} {seconds:.2f}秒' for stage, seconds in self.stage_seconds.items())
+        summary = (
+            f"{stages}（合計 {self.total_seconds:.2f}秒）\n"
+            f"シート: 期間内 {self.sheets_in_range} / 全体 {self.sheets_scanned}（解析 {self.sheets_parsed}）\n"
+            f"行: 解析 {self.rows_parsed}（集計対象外 {self.rows_rejected}）\n"
+            f"入力 {self.bytes_read:,} バイト / 出力 {self.bytes_written:,} バイト"
+        )
+        for stage, memory in self.stage_memory.items():
+            summary += (
+                f"\nメモリ {stage}: ピーク {memory['peak_bytes']:,} バイト / 保持 {memory['retained_bytes']:,} バイト"
+            )
+            if memory['top_allocations']:
+                top = memory['top_allocations'][0]
+                summary += f"（最大の割り当て {top['site']} {top['size_bytes']:,} バイト）"
+        return summary
+
+
+class ProgressReporter:
+    """分析の進捗をコールバックに通知し、キャンセルの要求を確認する
+
+    callback は (段階, 完了数, 全体数) を受け取る。全体数がない段階では完了数・全体数は0になる。
+    cancel_event には threading.Event などの is_set() を持つオブジェクトを渡す。
+    段階ごとの経過時間などは report（RunReport）に記録する。
+    memory（task_memory.StageMemoryProfiler）を渡した場合は段階ごとのメモリの割り当ても記録する。
+    """
+
+    def __init__(self, callback=None, cancel_event=None, memory=None):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.memory = memory
+        self.report = RunReport()
+        self.stage = None
+        self.stage_started = None
+        self.total = 0
+        self.done = 0
+
+    def start_stage(self, stage, total=0):
+        self.finish_stage()
+        self.check_cancelled()
+        self.stage = stage
+        if self.memory is not None:
+            self.memory.begin_stage()
+        self.stage_started = time.perf_counter()
+        self.total = total
+        self.done = 0
+        self.notify()
+
+    def finish_stage(self):
+        """実行中の段階の経過時間を記録する"""
+        if self.stage_started is not None:
+            elapsed = time.perf_counter() - self.stage_started
+            self.report.stage_seconds[self.stage] = self.report.stage_seconds.get(self.stage, 0.0) + elapsed
+            self.stage_started = None
+            if self.memory is not None:
+                self.record_memory(self.memory.end_stage())
+
+    def record_memory(self, memory):
+        previous = self.report.stage_memory.get(self.stage)
+        self.report.stage_memory[self.stage] = memory if previous is None else self.memory.merge(previous, memory)
+
+    def set_total(self, total):
+        self.total = total
+        self.done = 0
+        self.notify()
+
+    def advance(self, count=1):
+        self.done += count
+        self.notify()
+        self.check_cancelled()
+
+    def notify(self):
+        if self.callback is not None:
+            self.callback(self.stage, self.done, self.total)
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise AnalysisCancelled()
@@ -0,0 +1,85 @@
+import polars as pl
+
+# シート名・業務内容・氏名は種類が少なく同じ文字列が繰り返されるため、カテゴリ型で保持する。
+# 別々に作成したデータフレームを結合・比較する処理は、全体を1つの pl.StringCache() で囲む。
+# 読み込みをまたいで保持するデータフレーム（読み込みキャッシュ）は文字列型で保持し、取り出すときに変換する
+CATEGORICAL_COLUMNS = ('sheet', 'content', 'name')
+
+TASK_SCHEMA = {
+    'sheet': pl.Categorical(),
+    'date': pl.Datetime('us'),
+    'content': pl.Categorical(),
+    'minutes': pl.Float64,
+}
+
+COMMUNICATION_SCHEMA = {
+    'sheet': pl.Categorical(),
+    'date': pl.Datetime('us'),
+    'name': pl.Categorical(),
+    'content': pl.Categorical(),
+    'minutes': pl.Float64,
+}
+
+# 読み込み結果の種類（タスク、デイリータスク、コミュニケーション、全項目）
+RECORD_SCHEMAS = {
+    'tasks': TASK_SCHEMA,
+    'daily_tasks': TASK_SCHEMA,
+    'communication_tasks': COMMUNICATION_SCHEMA,
+    'all_items': TASK_SCHEMA,
+}
+
+
+class TaskRecordBuffer:
+    """読み込み結果を行ごとの辞書ではなく列ごとのリストに追加するバッファ"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.columns = {name: [] for name in schema}
+        self._appenders = [values.append for values in self.columns.values()]
+
+    def append(self, *values):
+        """スキーマの列順に値を追加する"""
+        for append, value in zip(self._appenders, values):
+            append(value)
+
+    def __len__(self):
+        return len(self.columns['sheet'])
+
+    def to_frame(self):
+        return pl.DataFrame(self.columns, schema=self.schema)
+
+
+def to_categorical(data_frame):
+    """文字列型の業務内容・氏名の列をカテゴリ型に変換する。変換する列がなければそのまま返す"""
+    columns = [column for column in CATEGORICAL_COLUMNS if data_frame.schema.get(column) == pl.String]
+    if not columns:
+        return data_frame
+    return data_frame.with_columns(pl.col(columns).cast(pl.Categorical()))
+
+
+def to_string_columns(data_frame):
+    """カテゴリ型の列を文字列型に変換する。変換する列がなければそのまま返す"""
+    columns = [column for column in CATEGORICAL_COLUMNS if data_frame.schema.get(column) == pl.Categorical]
+    if not columns:
+        return data_frame
+    return data_frame.with_columns(pl.col(columns).cast(pl.String))
+
+
+def to_string_schema(schema):
+    return {name: pl.String if name in CATEGORICAL_COLUMNS else dtype for name, dtype in schema.items()}
+
+
+def create_record_buffers():
+    return tuple(TaskRecordBuffer(schema) for schema in RECORD_SCHEMAS.values())
+
+
+def empty_record_frames():
+    return tuple(pl.DataFrame(schema=schema) for schema in RECORD_SCHEMAS.values())
+
+
+def concat_record_frames(batches):
+    """種類ごとのデータフレームの組を、与えられた順序のまま種類ごとに結合する"""
+    batches = list(batches)
+    if not batches:
+        return empty_record_frames()
+    return tuple(pl.concat(frames) for frames in zip(*batches))
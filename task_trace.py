@@ -0,0 +1,87 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from config_manager import get_config_bool
+
+# 設定ファイルを変更せずにトレースを有効にする環境変数（1, true など）
+TRACE_ENV_VAR = 'TASK_ANALYZER_TRACE'
+
+# トレースが無効な場合に返す何もしないコンテキスト（毎回作成しない）
+_NULL_SPAN = contextlib.nullcontext()
+_active_tracer = None
+
+
+class Tracer:
+    """区間の開始・終了時刻を記録し、Chromeのトレースイベント形式(JSON)で保存する
+
+    保存したファイルは Perfetto (https://ui.perfetto.dev) や chrome://tracing で開ける。
+    時刻はプロセス間で共通の単調増加時計を使うため、ワーカープロセスの区間も同じ時間軸に並ぶ。
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.events = []
+
+    @contextlib.contextmanager
+    def span(self, name, args):
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': started / 1000,
+                'dur': (time.perf_counter_ns() - started) / 1000,
+                'pid': self.pid,
+                'tid': threading.get_ident(),
+                'args': args,
+            })
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path
+
+
+def is_trace_enabled(config):
+    """環境変数または [Analysis] の trace でトレースが有効になっているか"""
+    if os.environ.get(TRACE_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    return get_config_bool(config, 'Analysis', 'trace')
+
+
+def start_tracing():
+    global _active_tracer
+    _active_tracer = Tracer()
+    return _active_tracer
+
+
+def stop_tracing():
+    """記録を終了し、記録していた Tracer を返す。記録していなかった場合は None を返す"""
+    global _active_tracer
+    tracer, _active_tracer = _active_tracer, None
+    return tracer
+
+
+def is_tracing():
+    return _active_tracer is not None
+
+
+def span(name, **args):
+    """with 文で囲んだ区間を記録する。トレースが無効な場合はほぼ何もしない"""
+    if _active_tracer is None:
+        return _NULL_SPAN
+    return _active_tracer.span(name, args)
+
+
+def add_events(events):
+    """ワーカープロセスで記録した区間を追加する"""
+    if _active_tracer is not None:
+        _active_tracer.events.extend(events)
@@ -3,7 +3,9 @@ from unittest.mock import Mock, patch, mock_open
 from datetime import datetime
 import configparser
 import os
+import threading
 from app_window import TaskAnalyzerGUI
+from task_progress import RunReport
 from version import VERSION
 
 
@@ -48,6 +50,7 @@ def mock_config():
             original_config[section][key] = value
 
     with patch('app_window.load_config', return_value=config), \
+            patch('app_window.load_settings', return_value=Mock(**{'analysis.watch_interval': None})), \
             patch('app_window.save_config') as mock_save:
         yield config
         restore_config(config, original_config)
@@ -67,7 +70,7 @@ def restore_config(config, original_config):
 
 @pytest.fixture
 def mock_analyzer():
-    with patch('app_window.TaskAnalyzer') as mock_task_analyzer:
+    with patch('service_task_analyzer.TaskAnalyzer') as mock_task_analyzer:
         analyzer = Mock()
         mock_task_analyzer.return_value = analyzer
         yield analyzer
@@ -86,7 +89,8 @@ def gui(mock_tk, mock_config, mock_analyzer, mock_date_entry):
     with patch('app_window.ttk.Frame'), \
             patch('app_window.ttk.LabelFrame'), \
             patch('app_window.ttk.Label'), \
-            patch('app_window.ttk.Button'):
+            patch('app_window.ttk.Button'), \
+            patch('app_window.ttk.Progressbar'):
         gui = TaskAnalyzerGUI(mock_tk)
         yield gui
 
@@ -99,7 +103,7 @@ def test_init(gui, mock_tk):
 def test_analysis_error(gui, mock_config, mock_analyzer, mock_date_entry, mock_messagebox):
     """分析エラー時のテスト"""
     error_message = "テストエラー"
-    mock_analyzer.run_analysis.return_value = (False, error_message)
+    mock_analyzer.run_analysis.return_value = (False, error_message, RunReport())
 
     start_date = datetime(2025, 2, 1)
     end_date = datetime(2025, 2, 28)
@@ -110,9 +114,43 @@ def test_analysis_error(gui, mock_config, mock_analyzer, mock_date_entry, mock_m
     with patch('app_window.save_config'):
         gui.start_analysis()
 
+    # 分析はワーカースレッドで実行され、結果は root.after で予約した確認処理で表示する
+    gui.root.after.assert_called_with(100, gui._poll_analysis)
+    gui.worker.join(timeout=5)
+    gui._poll_analysis()
+
     mock_messagebox.showerror.assert_called_with("エラー", error_message)
 
 
+def test_analysis_progress_and_cancel(gui, mock_analyzer, mock_messagebox):
+    """進捗の表示とキャンセルのテスト"""
+    started = threading.Event()
+
+    def run_analysis(start_date_str, end_date_str, progress_callback, cancel_event):
+        progress_callback('読み込み', 3, 30)
+        started.set()
+        cancel_event.wait(timeout=5)
+        return False, "分析をキャンセルしました。", RunReport()
+
+    mock_analyzer.run_analysis.side_effect = run_analysis
+    gui.start_date.get_date.return_value = datetime(2025, 2, 1)
+    gui.end_date.get_date.return_value = datetime(2025, 2, 28)
+
+    gui.start_analysis()
+    assert started.wait(timeout=5)
+    gui._poll_analysis()
+    gui.progress_bar.configure.assert_any_call(mode='determinate', maximum=30, value=3)
+    gui.status_label.configure.assert_called_with(text="読み込み 3/30")
+
+    gui.cancel_analysis()
+    gui.worker.join(timeout=5)
+    gui._poll_analysis()
+
+    assert not gui.worker.is_alive()
+    gui.status_label.configure.assert_called_with(text="分析をキャンセルしました。")
+    mock_messagebox.showerror.assert_not_called()
+
+
 def test_open_config(gui, mock_config):
     """設定ファイルを開く機能のテスト"""
     test_config_path = 'test_config.ini'
@@ -128,3 +166,43 @@ def test_open_config_error(gui, mock_config):
         with patch('app_window.messagebox.showerror') as mock_error:
             gui.open_config()
             mock_error.assert_called_with("エラー", "設定ファイルを開けませんでした：\nテストエラー")
+
+
+def test_analyzer_is_created_on_first_use(gui, mock_tk, mock_analyzer):
+    """分析に使う TaskAnalyzer は画面の作成時には作成しない"""
+    assert gui.analyzer is None
+    mock_tk.after_idle.assert_called_once_with(gui._start_prewarm)
+
+    assert gui.get_analyzer() is mock_analyzer
+    assert gui.get_analyzer() is mock_analyzer
+
+
+def test_analyzer_and_watcher_follow_edited_settings(gui, mock_analyzer):
+    """設定ファイルの編集で Settings が変わった場合は TaskAnalyzer を作成し直し、監視も新しい設定でやり直す"""
+    watched = Mock(**{'analysis.watch_interval': 2.0, 'paths.input_file_path': 'WILLDOリスト.xlsx'})
+    unwatched = Mock(**{'analysis.watch_interval': None})
+
+    with patch('service_task_analyzer.TaskAnalyzer', return_value=mock_analyzer) as mock_task_analyzer, \
+            patch('service_workbook_watcher.WorkbookWatcher') as mock_watcher_class, \
+            patch('app_window.load_settings', return_value=watched):
+        gui.get_analyzer()
+        gui.get_analyzer()
+        mock_task_analyzer.assert_called_once_with(watched)
+        mock_watcher_class.assert_called_once_with('WILLDOリスト.xlsx', gui._refresh_prepared, 2.0)
+        mock_watcher_class.return_value.start.assert_called_once()
+
+        with patch('app_window.load_settings', return_value=unwatched):
+            gui.get_analyzer()
+        mock_task_analyzer.assert_called_with(unwatched)
+        mock_watcher_class.return_value.stop.assert_called_once()
+        assert gui.watcher is None
+
+
+def test_window_module_does_not_import_analysis_libraries():
+    import subprocess
+    import sys
+
+    code = "import sys, app_window; print(sorted({'polars', 'openpyxl', 'pyarrow'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
@@ -0,0 +1,76 @@
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+from regression import BASELINE_PATH, check, find_regressions, get_threshold, load_baseline  # noqa: E402
+
+
+def make_benchmark(read_seconds, analyze_seconds=0.01, write_seconds=0.02, reader_backend='openpyxl',
+                   import_seconds=0.3):
+    return {
+        'settings': {'reader_backend': reader_backend, 'writer_backend': 'zip', 'workers': '1', 'repeat': 3},
+        'results': {
+            '30': {'stages': {
+                'read_workbook': {'median': read_seconds},
+                'analyze': {'median': analyze_seconds},
+                'save_results': {'median': write_seconds},
+            }},
+        },
+        'startup': {'service_task_analyzer': {'median': import_seconds}},
+    }
+
+
+def test_find_regressions():
+    baseline = make_benchmark(0.1)
+
+    assert find_regressions(make_benchmark(0.12), baseline, 0.25) == []
+    regressions = find_regressions(make_benchmark(0.2), baseline, 0.25)
+    assert len(regressions) == 1
+    assert 'read_workbook' in regressions[0]
+
+    regressions = find_regressions(make_benchmark(0.1, import_seconds=0.5), baseline, 0.25)
+    assert len(regressions) == 1
+    assert 'service_task_analyzer' in regressions[0]
+
+    # 数ミリ秒の揺らぎは割合が大きくても無視する
+    assert find_regressions(make_benchmark(0.1, analyze_seconds=0.014), baseline, 0.25) == []
+
+
+def test_find_regressions_requires_same_settings():
+    baseline = make_benchmark(0.1)
+
+    benchmark = make_benchmark(0.1)
+    benchmark['settings']['repeat'] = 1
+    assert find_regressions(benchmark, baseline, 0.25) == []
+
+    assert len(find_regressions(make_benchmark(0.1, reader_backend='xml'), baseline, 0.25)) == 1
+
+    missing = copy.deepcopy(baseline)
+    missing['results'] = {}
+    assert len(find_regressions(missing, baseline, 0.25)) == 1
+
+
+def test_get_threshold(monkeypatch):
+    monkeypatch.delenv('TASK_ANALYZER_BENCHMARK_THRESHOLD', raising=False)
+    assert get_threshold() == 0.25
+    monkeypatch.setenv('TASK_ANALYZER_BENCHMARK_THRESHOLD', '0.5')
+    assert get_threshold() == 0.5
+    assert get_threshold(0.1) == 0.1
+
+
+def test_baseline_covers_all_stages():
+    baseline = load_baseline()
+    assert set(baseline['results']) == {'30', '365', '1500'}
+    for result in baseline['results'].values():
+        assert set(result['stages']) == {'read_workbook', 'analyze', 'save_results'}
+    assert set(baseline['startup']) == {'app_window', 'service_task_analyzer'}
+
+
+@pytest.mark.benchmark
+def test_no_stage_regressed():
+    _, regressions = check(BASELINE_PATH)
+    assert regressions == [], '\n'.join(regressions)
@@ -0,0 +1,108 @@
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from cli import build_date_ranges, create_parser, main, month_ranges
+from config_manager import create_config_parser
+from service_daily_cube import get_cube_dir
+from service_sheet_cache import get_cache_dir
+from task_progress import RunReport
+
+
+def cli_config():
+    config = create_config_parser()
+    config['PATHS'] = {'input_file_path': 'WILLDOリスト.xlsx', 'output_dir': 'output'}
+    config['Analysis'] = {
+        'start_row': '5', 'end_row': '15',
+        'daily_task_start_row': '20', 'daily_task_end_row': '25',
+        'communication_start_row': '30', 'communication_end_row': '35',
+    }
+    return config
+
+
+def test_month_ranges():
+    ranges = month_ranges(2024)
+
+    assert len(ranges) == 12
+    assert ranges[0] == (datetime(2024, 1, 1), datetime(2024, 1, 31))
+    assert ranges[1] == (datetime(2024, 2, 1), datetime(2024, 2, 29))
+    assert ranges[11] == (datetime(2024, 12, 1), datetime(2024, 12, 31))
+
+
+def test_build_date_ranges():
+    args = create_parser().parse_args([
+        '--range', '2025-03-01', '2025-03-31',
+        '--months', '2025',
+        '--year', '2025',
+    ])
+
+    date_ranges = build_date_ranges(args)
+
+    # 指定した順に並べ、重複する期間（3月）は1回だけにする
+    assert date_ranges[0] == (datetime(2025, 3, 1), datetime(2025, 3, 31))
+    assert len(date_ranges) == 1 + 11 + 1
+    assert date_ranges[-1] == (datetime(2025, 1, 1), datetime(2025, 12, 31))
+
+
+def test_build_date_ranges_rejects_reversed_range():
+    args = create_parser().parse_args(['--range', '2025-03-31', '2025-03-01'])
+
+    with pytest.raises(ValueError):
+        build_date_ranges(args)
+
+
+def test_main_runs_batch_without_opening_excel(tmp_path, capsys):
+    report_path = tmp_path / 'report.json'
+    with patch('cli.load_config', return_value=cli_config()), patch('cli.TaskAnalyzer') as mock_analyzer_class:
+        analyzer = mock_analyzer_class.return_value
+        analyzer.run_batch.return_value = (True, ['2025-01-01～2025-01-31: 結果.xlsx'], RunReport())
+
+        exit_code = main([
+            '--months', '2025', '--input', 'other.xlsx', '--report', str(report_path)
+        ])
+
+    assert exit_code == 0
+    date_ranges = analyzer.run_batch.call_args.args[0]
+    assert len(date_ranges) == 12
+    assert analyzer.run_batch.call_args.kwargs == {'open_output': False}
+    settings = mock_analyzer_class.call_args.args[0]
+    assert settings.paths.input_file_path == 'other.xlsx'
+    assert settings.paths.output_dir == 'output'
+    assert '結果.xlsx' in capsys.readouterr().out
+    assert json.loads(report_path.read_text(encoding='utf-8'))['sheets_scanned'] == 0
+
+
+def test_output_dir_moves_cache_and_cube(tmp_path):
+    config = cli_config()
+    config['Analysis'].update({'use_cache': 'true', 'use_cube': 'true'})
+    output_dir = tmp_path / 'other' / 'output'
+    with patch('cli.load_config', return_value=config), patch('cli.TaskAnalyzer') as mock_analyzer_class:
+        mock_analyzer_class.return_value.run_batch.return_value = (True, [], RunReport())
+        main(['--year', '2025', '--output-dir', str(output_dir)])
+
+    # cache_dir の指定がなければ、読み込みキャッシュと日別集計は指定した出力先に合わせる
+    settings = mock_analyzer_class.call_args.args[0]
+    assert get_cache_dir(settings) == tmp_path / 'other' / 'cache'
+    assert get_cube_dir(settings) == tmp_path / 'other' / 'cache' / 'cube'
+
+    # cache_dir を指定している場合はそのフォルダを使う
+    config['PATHS']['cache_dir'] = str(tmp_path / 'shared')
+    with patch('cli.load_config', return_value=config), patch('cli.TaskAnalyzer') as mock_analyzer_class:
+        mock_analyzer_class.return_value.run_batch.return_value = (True, [], RunReport())
+        main(['--year', '2025', '--output-dir', str(output_dir)])
+    assert get_cache_dir(mock_analyzer_class.call_args.args[0]) == tmp_path / 'shared'
+
+
+def test_main_requires_date_range():
+    with pytest.raises(SystemExit):
+        main([])
+
+
+def test_watch_option():
+    parser = create_parser()
+
+    assert parser.parse_args(['--year', '2025']).watch is None
+    assert parser.parse_args(['--year', '2025', '--watch']).watch == 5.0
+    assert parser.parse_args(['--year', '2025', '--watch', '2']).watch == 2.0
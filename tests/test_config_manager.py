@@ -0,0 +1,157 @@
+import dataclasses
+import os
+
+import pytest
+
+import config_manager
+from config_manager import (
+    create_config_parser, load_settings, read_analysis_settings, read_row_bands, read_settings, replace_paths
+)
+from task_categories import CategoryTaxonomy
+
+
+@pytest.fixture
+def config():
+    config = create_config_parser()
+    config['PATHS'] = {
+        'input_file_path': 'WILLDOリスト.xlsx',
+        'output_dir': 'output',
+    }
+    config['Analysis'] = {
+        'start_row': '4', 'end_row': '24',
+        'communication_start_row': '26', 'communication_end_row': '34',
+        'daily_task_start_row': '37', 'daily_task_end_row': '42',
+        'workers': '2',
+        'writer_backend': 'zip',
+        'use_cache': 'true',
+    }
+    return config
+
+
+def test_read_settings(config):
+    settings = read_settings(config)
+
+    assert settings.paths.input_file_path == 'WILLDOリスト.xlsx'
+    assert settings.paths.template_path is None
+    assert settings.analysis.workers == 2
+    assert settings.analysis.source_workers == 4
+    assert settings.analysis.reader_backend == 'openpyxl'
+    assert settings.analysis.writer_backend == 'zip'
+    assert settings.analysis.use_cache is True
+    assert settings.analysis.use_cube is False
+    assert settings.analysis.rollup_periods == ()
+    assert settings.analysis.watch_interval is None
+    assert settings.analysis.trace is False
+    assert settings.categories == CategoryTaxonomy.default()
+
+    bands = settings.row_bands
+    assert bands.tasks == range(4, 25)
+    assert 34 in bands.communication and 35 not in bands.communication
+    assert bands.all_items == range(4, 43)
+    assert bands.max_row == 42
+    assert bands.rows == {1, *range(4, 43)}
+    assert bands.as_dict() == {'tasks': (4, 24), 'communication': (26, 34), 'daily': (37, 42)}
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.analysis.workers = 3
+
+
+@pytest.mark.parametrize('option, value, message', [
+    ('end_row', '3', 'start_row が end_row より後'),
+    ('end_row', '26', '行範囲が重なっています'),
+    ('daily_task_start_row', '30', '行範囲が重なっています'),
+    ('start_row', 'abc', 'start_row の値が正しくありません'),
+])
+def test_read_row_bands_rejects_invalid_bands(config, option, value, message):
+    config['Analysis'][option] = value
+    with pytest.raises(ValueError, match=message):
+        read_row_bands(config)
+
+
+def test_read_row_bands_requires_bands(config):
+    del config['Analysis']['daily_task_end_row']
+    with pytest.raises(ValueError, match='daily_task_end_row'):
+        read_row_bands(config)
+
+
+def test_read_analysis_settings_rejects_unknown_backend(config):
+    config['Analysis']['reader_backend'] = 'csv'
+    with pytest.raises(ValueError, match='reader_backend'):
+        read_analysis_settings(config)
+
+
+@pytest.mark.parametrize('section, option, value', [
+    ('Categories', '会議', 'prefix:会議'),
+    ('Analysis', 'rollup_periods', 'week'),
+    ('Analysis', 'trace', 'true'),
+    ('Analysis', 'memory_profile', 'true'),
+    ('Analysis', 'watch', 'true'),
+])
+def test_settings_cover_options_used_by_analysis(config, section, option, value):
+    # 画面は Settings を比較して TaskAnalyzer を作成し直すため、分析が使う設定の変更は Settings に表れる
+    settings = read_settings(config)
+    if not config.has_section(section):
+        config.add_section(section)
+    config[section][option] = value
+
+    assert read_settings(config) != settings
+
+
+def test_settings_ignore_saved_dates(config):
+    # 画面が分析のたびに保存する分析期間では作成し直さない
+    settings = read_settings(config)
+    config['Analysis']['start_date'] = '2025-01-01'
+
+    assert read_settings(config) == settings
+
+
+def test_replace_paths(config):
+    settings = read_settings(config)
+
+    replaced = replace_paths(settings, input_file_path='other.xlsx', output_dir=None)
+    assert replaced.paths.input_file_path == 'other.xlsx'
+    assert replaced.paths.output_dir == 'output'
+    assert replace_paths(settings) is settings
+
+
+def test_load_settings_reloads_only_when_modified(config, tmp_path, monkeypatch):
+    config_path = tmp_path / 'config.ini'
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+    monkeypatch.setattr(config_manager, 'CONFIG_PATH', str(config_path))
+    monkeypatch.setattr(config_manager, '_settings_cache', None)
+
+    settings = load_settings()
+    assert load_settings() is settings
+
+    config['Analysis']['workers'] = '3'
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = load_settings()
+    assert reloaded is not settings
+    assert reloaded.analysis.workers == 3
+
+
+def test_load_settings_reloads_when_category_file_is_modified(config, tmp_path, monkeypatch):
+    category_path = tmp_path / 'categories.csv'
+    category_path.write_text('category,pattern\nクラーク業務,クラーク\n', encoding='utf-8')
+    config['PATHS']['category_file'] = str(category_path)
+    config_path = tmp_path / 'config.ini'
+    with open(config_path, 'w', encoding='utf-8') as f:
+        config.write(f)
+    monkeypatch.setattr(config_manager, 'CONFIG_PATH', str(config_path))
+    monkeypatch.setattr(config_manager, '_settings_cache', None)
+
+    settings = load_settings()
+    assert load_settings() is settings
+
+    category_path.write_text('category,pattern\nクラーク業務,クラーク\n会議,会議\n', encoding='utf-8')
+    stat = os.stat(category_path)
+    os.utime(category_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    reloaded = load_settings()
+    assert reloaded != settings
+    assert [rule.category for rule in reloaded.categories.rules] == ['クラーク業務', '会議']
@@ -0,0 +1,103 @@
+import configparser
+import os
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from config_manager import read_settings
+from service_daily_cube import DailyCube, get_cube_dir
+from service_data_analyzer import TaskDataAnalyzer
+from service_excel_reader import ExcelTaskReader, split_date_ranges
+
+
+@pytest.fixture
+def cube_config(tmp_path):
+    config = configparser.ConfigParser()
+    config['Analysis'] = {
+        'start_row': '5',
+        'end_row': '15',
+        'daily_task_start_row': '20',
+        'daily_task_end_row': '25',
+        'communication_start_row': '30',
+        'communication_end_row': '35',
+        'use_cache': 'true',
+        'use_cube': 'true'
+    }
+    config['PATHS'] = {'cache_dir': str(tmp_path / 'cache')}
+    return config
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    # 同じ日に同じ業務内容が複数回出現する20日分のシート
+    wb = Workbook()
+    wb.remove(wb.active)
+    for day in range(1, 21):
+        sheet = wb.create_sheet(title=f'シート{day}')
+        sheet['A1'] = f'2024年1月{day}日'
+        for row in range(5, 5 + day % 5 + 2):
+            sheet[f'B{row}'] = f'クラーク業務{row % 3}' if row % 2 else f'業務{row % 4}'
+            sheet[f'C{row}'] = day + row
+        sheet['B20'] = '毎日タスクA'
+        sheet['C20'] = 10
+        sheet['B30'] = f'打合せ({"田中" if day % 2 else "佐藤"})'
+        sheet['C30'] = 15
+        sheet['B31'] = '打合せ(田中)'
+        sheet['C31'] = day
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    wb.save(path)
+    return str(path)
+
+
+def build_cube(config, workbook_path):
+    reader = ExcelTaskReader(config)
+    cube = DailyCube(get_cube_dir(read_settings(config)), signature='bands')
+    sheet_dates, frames = reader.read_dataset(workbook_path, datetime.min, datetime.max)
+    cube.build(workbook_path, sheet_dates, frames)
+    return cube
+
+
+def test_cube_matches_raw_path(cube_config, workbook_path):
+    cube = build_cube(cube_config, workbook_path)
+    analyzer = TaskDataAnalyzer(rollup_periods=['week'])
+    date_ranges = [
+        (datetime(2024, 1, 1), datetime(2024, 1, 31)),
+        (datetime(2024, 1, 3), datetime(2024, 1, 9)),
+        (datetime(2024, 1, 20), datetime(2024, 2, 5)),
+    ]
+
+    raw_results = ExcelTaskReader(cube_config).read_workbook_ranges(workbook_path, date_ranges)
+    cube_results = split_date_ranges(cube.sheet_dates, cube.frames, date_ranges)
+
+    for raw, queried in zip(raw_results, cube_results):
+        # 実際の開始日・終了日も一致する
+        assert raw[4:] == queried[4:]
+        raw_analysis, raw_extra = analyzer.analyze(*raw[:4])
+        cube_analysis, cube_extra = analyzer.analyze(*queried[:4])
+        # 合計時間が同じ行の順序は不定のため、行の集合で比較する（回数も含めて一致する）
+        for expected, result in zip([*raw_analysis, *raw_extra.values()], [*cube_analysis, *cube_extra.values()]):
+            assert result.schema == expected.schema
+            assert sorted(result.rows()) == sorted(expected.rows())
+
+
+def test_cube_is_reused_until_workbook_changes(cube_config, workbook_path):
+    build_cube(cube_config, workbook_path)
+
+    cube = DailyCube(get_cube_dir(read_settings(cube_config)), signature='bands')
+    assert cube.is_current(workbook_path)
+    assert cube.sheet_dates[0] == datetime(2024, 1, 1)
+
+    # 行範囲の設定が異なる場合は使わない
+    assert not DailyCube(get_cube_dir(read_settings(cube_config)), signature='other').is_current(workbook_path)
+
+    stat = os.stat(workbook_path)
+    os.utime(workbook_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not cube.is_current(workbook_path)
+
+
+def test_get_cube_dir(cube_config, tmp_path):
+    assert get_cube_dir(read_settings(cube_config)) == tmp_path / 'cache' / 'cube'
+
+    cube_config['Analysis']['use_cube'] = 'false'
+    assert get_cube_dir(read_settings(cube_config)) is None
@@ -1,9 +1,30 @@
+import os
 import pytest
 import tempfile
 import configparser
 from datetime import datetime
 from openpyxl import Workbook
+import polars as pl
+from polars.testing import assert_frame_equal
 from service_excel_reader import ExcelTaskReader
+from task_progress import AnalysisCancelled, ProgressReporter
+from task_records import create_record_buffers
+
+
+def collect_records(reader, rows, date):
+    """1シート分の読み込み結果を種類ごとの行の辞書のリストで返す"""
+    buffers = create_record_buffers()
+    reader.collect_sheet_records(rows, 'シート1', date, buffers)
+    return tuple(buffer.to_frame().drop('sheet').to_dicts() for buffer in buffers)
+
+
+def assert_results_equal(result, expected):
+    *frames, actual_start_date, actual_end_date = result
+    *expected_frames, expected_start_date, expected_end_date = expected
+    for frame, expected_frame in zip(frames, expected_frames):
+        # カテゴリ型の列は文字列キャッシュが異なっても値が同じなら等しいとみなす
+        assert_frame_equal(frame, expected_frame, categorical_as_str=True)
+    assert (actual_start_date, actual_end_date) == (expected_start_date, expected_end_date)
 
 
 @pytest.fixture
@@ -159,6 +180,44 @@ class TestExcelTaskReader:
         # 検証
         assert len(all_items) == 4  # クラーク業務2つ + デイリータスク2つ
 
+    def test_parse_task_minutes(self, mock_config):
+        reader = ExcelTaskReader(mock_config)
+
+        # テスト実行・検証
+        assert reader.parse_task_minutes('テストタスク 補足', 30) == ('テストタスク', 30.0)
+
+        # 無効なデータは None を返す
+        assert reader.parse_task_minutes('テストタスク', '*') is None
+        assert reader.parse_task_minutes(None, 30) is None
+        assert reader.parse_task_minutes('テストタスク', 'abc') is None  # 数値に変換できない
+
+    def test_collect_sheet_records(self, mock_config, mock_workbook):
+        reader = ExcelTaskReader(mock_config)
+        wb = self.__load_workbook(mock_workbook) # テスト用のワークブックを読み込む
+
+        # 日付
+        date = datetime(2024, 1, 1)
+
+        # テスト実行
+        tasks, daily_tasks, comm_tasks, all_items = collect_records(
+            reader, reader.read_sheet_rows(wb['シート1']), date
+        )
+
+        # 検証
+        assert len(tasks) == 2
+        assert tasks[0]['content'] == 'クラーク業務A'
+        assert tasks[0]['minutes'] == 30
+
+        assert len(daily_tasks) == 2
+        assert daily_tasks[0]['content'] == '毎日タスクA'
+
+        assert len(comm_tasks) == 2
+        assert comm_tasks[0]['name'] == '田中'
+        assert comm_tasks[0]['content'] == '打合せ'
+        assert comm_tasks[0]['minutes'] == 30
+
+        assert len(all_items) == 4  # クラーク業務2つ + デイリータスク2つ
+
     def test_read_workbook(self, mock_config, mock_workbook):
         reader = ExcelTaskReader(mock_config)
         
@@ -177,7 +236,97 @@ class TestExcelTaskReader:
         
         assert actual_start_date == '20240101'
         assert actual_end_date == '20240103'
+
+        # 列ごとに作成されたデータフレームで返される
+        assert comm_tasks.columns == ['date', 'name', 'content', 'minutes']
+        assert tasks['content'].to_list() == ['クラーク業務A', 'クラーク業務B', 'クラーク業務A', '会議', '資料作成']
         
+    def test_read_workbook_reports_progress(self, mock_config, mock_workbook):
+        reader = ExcelTaskReader(mock_config)
+        notified = []
+        progress = ProgressReporter(lambda stage, done, total: notified.append((stage, done, total)))
+
+        reader.read_workbook(mock_workbook, datetime(2024, 1, 1), datetime(2024, 1, 3), progress=progress)
+
+        assert notified == [
+            ('読み込み', 0, 0), ('読み込み', 0, 3), ('読み込み', 1, 3), ('読み込み', 2, 3), ('読み込み', 3, 3)
+        ]
+
+    def test_read_workbook_report(self, mock_config, mock_workbook):
+        reader = ExcelTaskReader(mock_config)
+        progress = ProgressReporter()
+
+        tasks, daily_tasks, comm_tasks, all_items, *_ = reader.read_workbook(
+            mock_workbook, datetime(2024, 1, 2), datetime(2024, 1, 3), progress=progress
+        )
+        progress.finish_stage()
+        report = progress.report
+
+        assert (report.sheets_scanned, report.sheets_in_range, report.sheets_parsed) == (3, 2, 2)
+        assert report.bytes_read == os.path.getsize(mock_workbook)
+        assert list(report.stage_seconds) == ['読み込み']
+        assert (report.rows_parsed, report.rows_rejected) == (8, 0)
+
+    def test_collect_sheet_records_counts_rejected_rows(self, mock_config):
+        reader = ExcelTaskReader(mock_config)
+        rows = {
+            5: (None, '会議', 60),
+            6: (None, '休憩', '*'),
+            7: (None, '資料作成', '未定'),
+            30: (None, '打合せ', 15),
+            31: (None, '相談(鈴木)', 15),
+        }
+
+        # 時間が数値でない行と、氏名のないコミュニケーション行は集計対象外
+        assert reader.collect_sheet_records(rows, 'シート1', datetime(2024, 1, 1), create_record_buffers()) == (5, 3)
+
+    def test_read_workbook_cancelled(self, mock_config, mock_workbook):
+        class CancelAfterFirstSheet:
+            def __init__(self):
+                self.sheets = 0
+
+            def is_set(self):
+                return self.sheets >= 1
+
+        cancel_event = CancelAfterFirstSheet()
+
+        def count_sheets(stage, done, total):
+            cancel_event.sheets = done
+
+        reader = ExcelTaskReader(mock_config)
+        with pytest.raises(AnalysisCancelled):
+            reader.read_workbook(
+                mock_workbook, datetime(2024, 1, 1), datetime(2024, 1, 3),
+                progress=ProgressReporter(count_sheets, cancel_event)
+            )
+
+    def test_read_workbook_ranges(self, mock_config, mock_workbook, monkeypatch):
+        reader = ExcelTaskReader(mock_config)
+        expected = [
+            reader.read_workbook(mock_workbook, datetime(2024, 1, 1), datetime(2024, 1, 1)),
+            reader.read_workbook(mock_workbook, datetime(2024, 1, 2), datetime(2024, 1, 3)),
+        ]
+
+        parsed = []
+        original_parse_sheets = reader.parse_sheets
+
+        def spy_parse_sheets(file_path, sheet_entries, progress=None):
+            parsed.append([entry.name for entry in sheet_entries])
+            return original_parse_sheets(file_path, sheet_entries, progress)
+
+        monkeypatch.setattr(reader, 'parse_sheets', spy_parse_sheets)
+        results = reader.read_workbook_ranges(mock_workbook, [
+            (datetime(2024, 1, 1), datetime(2024, 1, 1)),
+            (datetime(2024, 1, 2), datetime(2024, 1, 3)),
+            (datetime(2024, 2, 1), datetime(2024, 2, 29)),
+        ])
+
+        # すべての期間を含む範囲を1回だけ解析し、期間ごとに絞り込む
+        assert parsed == [['シート1', 'シート2', 'シート3']]
+        for result, expected_result in zip(results, expected):
+            assert_results_equal(result, expected_result)
+        assert results[2] is None
+
     def test_read_workbook_date_filter(self, mock_config, mock_workbook):
         reader = ExcelTaskReader(mock_config)
         
@@ -197,3 +346,167 @@ class TestExcelTaskReader:
         """テスト用のヘルパーメソッド（ExcelTaskReaderの非公開メソッドを模倣）"""
         from openpyxl import load_workbook
         return load_workbook(filename=mock_workbook)
+
+    def test_read_sheet_rows(self, mock_config, mock_workbook):
+        reader = ExcelTaskReader(mock_config)
+        from openpyxl import load_workbook
+        wb = load_workbook(filename=mock_workbook, read_only=True)
+
+        # テスト実行
+        rows = reader.read_sheet_rows(wb['シート1'])
+        wb.close()
+
+        # 検証 - A～C列のみ、デイリータスクの終了行までを取得
+        assert rows[1][0] == '2024年1月1日'
+        assert rows[5] == (None, 'クラーク業務A', 30)
+        assert max(rows) <= 35
+        assert all(len(values) <= 3 for values in rows.values())
+
+    def test_read_workbook_skips_out_of_range_sheets(self, mock_config, mock_workbook, monkeypatch):
+        reader = ExcelTaskReader(mock_config)
+        read_sheets = []
+        original_read_sheet_rows = reader.read_sheet_rows
+
+        def spy_read_sheet_rows(sheet):
+            read_sheets.append(sheet.title)
+            return original_read_sheet_rows(sheet)
+
+        monkeypatch.setattr(reader, 'read_sheet_rows', spy_read_sheet_rows)
+
+        # テスト実行
+        reader.read_workbook(mock_workbook, datetime(2024, 1, 3), datetime(2024, 1, 3))
+
+        # 検証 - 期間内のシートのみ解析される
+        assert read_sheets == ['シート3']
+
+    def test_read_workbook_no_data_in_range(self, mock_config, mock_workbook):
+        reader = ExcelTaskReader(mock_config)
+
+        with pytest.raises(ValueError):
+            reader.read_workbook(mock_workbook, datetime(2025, 1, 1), datetime(2025, 1, 31))
+
+    def test_collect_sheet_records_matches_two_pass(self, mock_config):
+        reader = ExcelTaskReader(mock_config)
+
+        # 全行にさまざまな形式のデータを設定したシートを作成
+        wb = Workbook()
+        sheet = wb.active
+        contents = ['クラーク業務A 補足', '会議', '打合せ(田中)', 'レビュー (佐藤) 追記', None, '資料作成']
+        times = [30, '45', '*', 'abc', None, 12.5, 0]
+        for row in range(1, 41):
+            sheet[f'B{row}'] = contents[row % len(contents)]
+            sheet[f'C{row}'] = times[row % len(times)]
+
+        date = datetime(2024, 1, 1)
+
+        # 行範囲ごとに2回走査する従来の実装（load_excel_task_data / load_excel_sheet_all_items）が
+        # このシートから抽出した結果
+        def records(values):
+            return [{'date': date, 'content': content, 'minutes': minutes} for content, minutes in values]
+
+        expected_tasks = records([
+            ('資料作成', 12.5), ('会議', 30.0), ('打合せ(田中)', 45.0),
+            ('クラーク業務A', 12.5), ('打合せ(田中)', 30.0), ('レビュー', 45.0),
+        ])
+        expected_daily = records([('レビュー', 30.0)])
+        expected_comm = [{'date': date, 'name': '佐藤', 'content': 'レビュー', 'minutes': 12.5}]
+        expected_all_items = expected_tasks + records([('会議', 12.5), ('レビュー', 30.0)])
+
+        # テスト実行
+        tasks, daily_tasks, comm_tasks, all_items = collect_records(reader, reader.read_sheet_rows(sheet), date)
+
+        # 検証
+        assert tasks == expected_tasks
+        assert daily_tasks == expected_daily
+        assert comm_tasks == expected_comm
+        assert all_items == expected_all_items
+        assert reader.load_excel_task_data(wb, sheet.title, date) == (tasks, daily_tasks, comm_tasks)
+        assert reader.load_excel_sheet_all_items(wb, sheet.title, date) == all_items
+
+    def test_read_workbook_parallel_matches_serial(self, mock_config, monkeypatch):
+        # 12日分のシートを作成
+        wb = Workbook()
+        wb.remove(wb.active)
+        for day in range(1, 13):
+            sheet = wb.create_sheet(title=f'シート{day}')
+            sheet['A1'] = f'2024年1月{day}日'
+            for row in range(5, 5 + day % 4 + 1):
+                sheet[f'B{row}'] = f'業務{row}'
+                sheet[f'C{row}'] = day * row
+            sheet['B20'] = '毎日タスクA'
+            sheet['C20'] = day
+            sheet['B30'] = f'打合せ({day % 3})'
+            sheet['C30'] = 15
+        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+            wb.save(tmp.name)
+
+        start_date = datetime(2024, 1, 1)
+        end_date = datetime(2024, 1, 31)
+        expected = ExcelTaskReader(mock_config).read_workbook(tmp.name, start_date, end_date)
+
+        # テスト実行 - 3プロセスで解析
+        monkeypatch.setattr(ExcelTaskReader, 'MIN_SHEETS_PER_WORKER', 1)
+        mock_config['Analysis']['workers'] = '3'
+        result = ExcelTaskReader(mock_config).read_workbook(tmp.name, start_date, end_date)
+
+        # 検証
+        assert_results_equal(result, expected)
+
+    def test_read_workbook_xml_backend_matches_openpyxl(self, mock_config, mock_workbook):
+        start_date = datetime(2024, 1, 1)
+        end_date = datetime(2024, 1, 3)
+        expected = ExcelTaskReader(mock_config).read_workbook(mock_workbook, start_date, end_date)
+
+        # テスト実行 - XMLを直接読む実装
+        mock_config['Analysis']['reader_backend'] = 'xml'
+        reader = ExcelTaskReader(mock_config)
+        result = reader.read_workbook(mock_workbook, start_date, end_date)
+
+        # 検証
+        assert reader.backend == 'xml'
+        assert_results_equal(result, expected)
+
+    def test_invalid_reader_backend(self, mock_config):
+        mock_config['Analysis']['reader_backend'] = 'csv'
+
+        with pytest.raises(ValueError):
+            ExcelTaskReader(mock_config)
+
+    def test_read_workbook_from_directory(self, mock_config, tmp_path):
+        # 担当者ごとのブックを2つ作成する（1つは期間外のシートのみ）
+        for staff, (month, minutes) in {'田中': (1, 30), '佐藤': (1, 45), '鈴木': (3, 60)}.items():
+            wb = Workbook()
+            wb.remove(wb.active)
+            for day in range(1, 3):
+                sheet = wb.create_sheet(title=f'シート{day}')
+                sheet['A1'] = f'2024年{month}月{day}日'
+                sheet['B5'] = 'クラーク業務A'
+                sheet['C5'] = minutes
+                sheet['B30'] = f'打合せ({staff})'
+                sheet['C30'] = 15
+            wb.save(tmp_path / f'WILLDOリスト_{staff}.xlsx')
+        (tmp_path / '~$WILLDOリスト_田中.xlsx').write_bytes(b'')
+
+        start_date = datetime(2024, 1, 1)
+        end_date = datetime(2024, 1, 31)
+        expected = [
+            ExcelTaskReader(mock_config).read_workbook(str(tmp_path / f'WILLDOリスト_{staff}.xlsx'), start_date, end_date)
+            for staff in ('佐藤', '田中')
+        ]
+
+        # テスト実行 - 1プロセスとプロセスプールで読み込む
+        serial = ExcelTaskReader(mock_config).read_workbook(str(tmp_path), start_date, end_date)
+        mock_config['Analysis']['source_workers'] = '3'
+        pooled = ExcelTaskReader(mock_config).read_workbook(str(tmp_path / 'WILLDOリスト_*.xlsx'), start_date, end_date)
+
+        # 検証 - ファイル名の順に結合され、ブックの名前が source 列に入る
+        for result in (serial, pooled):
+            tasks, daily_tasks, comm_tasks, all_items, actual_start_date, actual_end_date = result
+            assert tasks['source'].cast(str).to_list() == ['WILLDOリスト_佐藤'] * 2 + ['WILLDOリスト_田中'] * 2
+            assert comm_tasks['name'].cast(str).to_list() == ['佐藤', '佐藤', '田中', '田中']
+            for frame, expected_frames in zip(result[:4], zip(*expected)):
+                assert_frame_equal(frame.drop('source'), pl.concat([
+                    expected_frame.with_columns(pl.col(pl.Categorical).cast(pl.String))
+                    for expected_frame in expected_frames
+                ]), check_dtypes=False, categorical_as_str=True)
+            assert (actual_start_date, actual_end_date) == ('20240101', '20240102')
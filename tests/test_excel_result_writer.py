@@ -145,3 +145,95 @@ class TestExcelResultWriter:
 
         # ファイル名の確認（日付フォーマット）
         assert '20240101_20240103' in output_file
+
+    def test_save_results_extra_sheets(self, mock_analysis_results, mock_template, mock_output_dir, monkeypatch):
+        monkeypatch.setattr(os, 'system', lambda cmd: None)
+        category_summary = pl.DataFrame({
+            'category': ['クラーク業務', 'クラーク以外業務'],
+            'total_minutes': [100, 150],
+            'total_hours': [1, 2],
+            'frequency': [3, 2]
+        })
+
+        # テスト実行 - テンプレートにないシートを追加
+        output_file = ExcelResultWriter.save_results(
+            mock_analysis_results,
+            mock_template,
+            mock_output_dir,
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 3),
+            {'業務分類別': category_summary}
+        )
+
+        # 検証 - 見出し行付きで作成される
+        sheet = load_workbook(filename=output_file)['業務分類別']
+        assert [cell.value for cell in sheet[1]] == ['category', 'total_minutes', 'total_hours', 'frequency']
+        assert [cell.value for cell in sheet[2]] == ['クラーク業務', 100, 1, 3]
+
+    def test_save_results_zip_matches_openpyxl(self, mock_analysis_results, mock_template, mock_output_dir, monkeypatch):
+        monkeypatch.setattr(os, 'system', lambda cmd: None)
+        category_summary = pl.DataFrame({
+            'category': ['クラーク業務', '<その他> & 会議'],
+            'total_minutes': [100, 150],
+            'total_hours': [1, 2],
+            'frequency': [3, 2]
+        })
+
+        # テスト実行 - 出力先を分けて両方の方式で出力する
+        output_files = {}
+        for backend in ('openpyxl', 'zip'):
+            output_files[backend] = ExcelResultWriter.save_results(
+                mock_analysis_results,
+                mock_template,
+                os.path.join(mock_output_dir, backend),
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 3),
+                {'業務分類別': category_summary},
+                backend=backend
+            )
+
+        # 検証 - すべてのシートの値が一致する
+        expected = load_workbook(filename=output_files['openpyxl'])
+        actual = load_workbook(filename=output_files['zip'])
+        assert actual.sheetnames == expected.sheetnames
+        for sheet_name in expected.sheetnames:
+            assert list(actual[sheet_name].values) == list(expected[sheet_name].values)
+
+    def test_save_results_zip_keeps_template(self, mock_analysis_results, mock_output_dir, monkeypatch):
+        monkeypatch.setattr(os, 'system', lambda cmd: None)
+
+        # テスト準備 - 見出し行と2行目のセルに書式を設定したテンプレート
+        from openpyxl.styles import Font
+        wb = Workbook()
+        wb.active.title = 'Sheet'
+        wb.active['A1'] = '集計期間'
+        for sheet_name in ['クラーク業務', 'クラーク以外業務', 'デイリータスク',
+                           'コミュニケーション', 'コミュニケーション内容', '全項目']:
+            sheet = wb.create_sheet(sheet_name)
+            sheet['A1'] = 'content'
+            sheet['A1'].font = Font(bold=True)
+            sheet['B2'].font = Font(italic=True)
+            sheet['F10'] = '備考'
+        template_path = os.path.join(mock_output_dir, 'template.xlsx')
+        wb.save(template_path)
+
+        # テスト実行
+        output_file = ExcelResultWriter.save_results(
+            mock_analysis_results, template_path, mock_output_dir,
+            datetime(2024, 1, 1), datetime(2024, 1, 3), backend='zip'
+        )
+
+        # 検証 - 見出し行・書式・結果の範囲外のセルはテンプレートのまま残る
+        sheet = load_workbook(filename=output_file)['クラーク業務']
+        assert sheet['A1'].value == 'content'
+        assert sheet['A1'].font.bold
+        assert sheet['A2'].value == 'クラーク業務A'
+        assert sheet['B2'].value == 55
+        assert sheet['B2'].font.italic
+        assert sheet['F10'].value == '備考'
+
+        # 結果を書き込まないファイルはテンプレートと同じ内容
+        import zipfile
+        with zipfile.ZipFile(template_path) as template, zipfile.ZipFile(output_file) as output:
+            assert output.read('xl/styles.xml') == template.read('xl/styles.xml')
+            assert output.read('xl/worksheets/sheet1.xml') == template.read('xl/worksheets/sheet1.xml')
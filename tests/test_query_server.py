@@ -0,0 +1,150 @@
+import configparser
+import json
+import os
+import threading
+from datetime import datetime
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from config_manager import read_settings
+from query_server import TaskQueryService, QueryError, create_server
+
+
+@pytest.fixture
+def server_config(tmp_path):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for day in range(1, 5):
+        sheet = wb.create_sheet(title=f'シート{day}')
+        sheet['A1'] = f'2024年1月{day}日'
+        sheet['B5'] = 'クラーク業務A'
+        sheet['C5'] = 10 * day
+        sheet['B6'] = '会議'
+        sheet['C6'] = 30
+        sheet['B30'] = f'打合せ({"田中" if day % 2 else "佐藤"})'
+        sheet['C30'] = 15
+    workbook_path = tmp_path / 'WILLDOリスト.xlsx'
+    wb.save(workbook_path)
+
+    config = configparser.ConfigParser()
+    config['PATHS'] = {'input_file_path': str(workbook_path)}
+    config['Analysis'] = {
+        'start_row': '5', 'end_row': '15',
+        'daily_task_start_row': '20', 'daily_task_end_row': '25',
+        'communication_start_row': '30', 'communication_end_row': '35',
+        'use_cache': 'false'
+    }
+    return config
+
+
+def test_query_filters(server_config):
+    service = TaskQueryService(read_settings(server_config))
+
+    start_date, end_date, frame = service.query('all_items_summary', datetime(2024, 1, 2), datetime(2024, 1, 3))
+    assert (start_date, end_date) == ('20240102', '20240103')
+    assert dict(frame.select('content', 'total_minutes').rows()) == {'会議': 60.0, 'クラーク業務A': 50.0}
+
+    *_, frame = service.query('all_items_summary', content='クラーク')
+    assert frame.rows() == [('クラーク業務A', 100.0, 1, 4)]
+
+    *_, frame = service.query('communication_by_name', name='田中')
+    assert frame.rows() == [('田中', 30.0, 0, 2)]
+
+    assert service.query('clerk_tasks', datetime(2024, 2, 1), datetime(2024, 2, 29)) is None
+
+
+def test_query_errors(server_config):
+    service = TaskQueryService(read_settings(server_config))
+
+    with pytest.raises(QueryError):
+        service.query('unknown')
+    with pytest.raises(QueryError):
+        service.query('clerk_tasks', datetime(2024, 1, 3), datetime(2024, 1, 1))
+
+
+def test_repeated_queries_use_cache(server_config):
+    service = TaskQueryService(read_settings(server_config), cache_size=1)
+
+    with patch.object(service.analyzer, 'analyze', wraps=service.analyzer.analyze) as analyze:
+        service.query('clerk_tasks', datetime(2024, 1, 1), datetime(2024, 1, 2))
+        # 同じ条件は集計の名前が違っても集計し直さない
+        service.query('communication_by_name', datetime(2024, 1, 1), datetime(2024, 1, 2))
+        assert analyze.call_count == 1
+
+        # 最も古い結果から捨てる
+        service.query('clerk_tasks', content='会議')
+        service.query('clerk_tasks', datetime(2024, 1, 1), datetime(2024, 1, 2))
+        assert analyze.call_count == 3
+
+
+def test_concurrent_requests_read_workbook_once(server_config):
+    service = TaskQueryService(read_settings(server_config))
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    responses = []
+
+    def request(index):
+        url = f'{base_url}/communication_by_name?start=2024-01-0{index % 4 + 1}&name={quote("佐藤")}'
+        with urlopen(url) as response:
+            responses.append(json.loads(response.read().decode('utf-8')))
+
+    try:
+        with patch.object(service.reader, 'read_sources', wraps=service.reader.read_sources) as read_sources:
+            threads = [threading.Thread(target=request, args=(index,)) for index in range(8)]
+            for request_thread in threads:
+                request_thread.start()
+            for request_thread in threads:
+                request_thread.join()
+
+        assert read_sources.call_count == 1
+        assert len(responses) == 8
+        assert all(response['rows'][0]['name'] == '佐藤' for response in responses)
+
+        with urlopen(f'{base_url}/') as response:
+            assert 'clerk_tasks' in json.loads(response.read())['queries']
+        with pytest.raises(HTTPError) as error:
+            urlopen(f'{base_url}/clerk_tasks?start=2024/01/01')
+        assert error.value.code == 400
+        with pytest.raises(HTTPError) as error:
+            urlopen(f'{base_url}/unknown')
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_reload_after_edit_with_cache(server_config, tmp_path):
+    # 読み込みキャッシュを使う場合も、ブックの編集後のクエリは読み込み直した結果を返す
+    server_config['Analysis']['use_cache'] = 'true'
+    server_config['PATHS']['cache_dir'] = str(tmp_path / 'cache')
+    service = TaskQueryService(read_settings(server_config))
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f'http://127.0.0.1:{server.server_port}/all_items_summary?content={quote("クラーク")}'
+
+    try:
+        with urlopen(url) as response:
+            assert json.loads(response.read())['rows'][0]['total_minutes'] == 100.0
+
+        workbook_path = server_config['PATHS']['input_file_path']
+        wb = load_workbook(workbook_path)
+        wb['シート2']['C5'] = 60
+        wb.save(workbook_path)
+        stat = os.stat(workbook_path)
+        os.utime(workbook_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        with urlopen(url) as response:
+            assert response.status == 200
+            assert json.loads(response.read())['rows'][0]['total_minutes'] == 140.0
+    finally:
+        server.shutdown()
+        server.server_close()
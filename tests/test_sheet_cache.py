@@ -0,0 +1,369 @@
+import polars as pl
+import pytest
+import configparser
+import json
+import os
+import re
+import zipfile
+from datetime import datetime
+from openpyxl import Workbook, load_workbook
+from polars.testing import assert_frame_equal
+from service_excel_reader import ExcelTaskReader
+from config_manager import read_settings
+from service_sheet_cache import SheetCache, get_cache_dir
+from service_xlsx_archive import XlsxArchive
+from task_progress import ProgressReporter
+
+
+@pytest.fixture
+def cache_config(tmp_path):
+    config = configparser.ConfigParser()
+    config['Analysis'] = {
+        'start_row': '5',
+        'end_row': '15',
+        'daily_task_start_row': '20',
+        'daily_task_end_row': '25',
+        'communication_start_row': '30',
+        'communication_end_row': '35',
+        'use_cache': 'true'
+    }
+    config['PATHS'] = {
+        'output_dir': str(tmp_path / 'output'),
+        'cache_dir': str(tmp_path / 'cache')
+    }
+    return config
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    for day in range(1, 4):
+        sheet = wb.create_sheet(title=f'シート{day}')
+        sheet['A1'] = f'2024年1月{day}日'
+        sheet['B5'] = f'クラーク業務{day}'
+        sheet['C5'] = 10 * day
+        sheet['B20'] = '毎日タスクA'
+        sheet['C20'] = 5
+        sheet['B30'] = '打合せ(田中)'
+        sheet['C30'] = 15
+
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    wb.save(path)
+    return str(path)
+
+
+INLINE_STRING_PATTERN = re.compile(r'<c r="([A-Z]+\d+)"([^>]*?) t="inlineStr"><is><t>(.*?)</t></is></c>')
+
+
+def save_with_shared_strings(wb, path):
+    """Excelと同じく文字列を共有文字列テーブル(xl/sharedStrings.xml)に格納して保存する
+
+    openpyxl はセルに文字列を直接書き込むため、保存後に共有文字列の形式に変換する。
+    共有文字列の番号はブック内で最初に出現した順とする。
+    """
+    wb.save(path)
+    with zipfile.ZipFile(path) as source:
+        members = {name: source.read(name) for name in source.namelist()}
+
+    strings = {}
+    count = 0
+
+    def to_shared_string(match):
+        nonlocal count
+        count += 1
+        index = strings.setdefault(match.group(3), len(strings))
+        return f'<c r="{match.group(1)}"{match.group(2)} t="s"><v>{index}</v></c>'
+
+    for name in sorted(members):
+        if name.startswith('xl/worksheets/'):
+            members[name] = INLINE_STRING_PATTERN.sub(to_shared_string, members[name].decode('utf-8')).encode('utf-8')
+
+    members['xl/sharedStrings.xml'] = (
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        f'count="{count}" uniqueCount="{len(strings)}">'
+        + ''.join(f'<si><t>{string}</t></si>' for string in strings)
+        + '</sst>'
+    ).encode('utf-8')
+    members['[Content_Types].xml'] = members['[Content_Types].xml'].replace(
+        b'</Types>',
+        b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+        b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'
+    )
+    members['xl/_rels/workbook.xml.rels'] = members['xl/_rels/workbook.xml.rels'].replace(
+        b'</Relationships>',
+        b'<Relationship Id="rIdSharedStrings" Target="sharedStrings.xml" Type="http://schemas.'
+        b'openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/></Relationships>'
+    )
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for name, data in members.items():
+            target.writestr(name, data)
+
+
+def assert_results_equal(result, expected):
+    *frames, actual_start_date, actual_end_date = result
+    *expected_frames, expected_start_date, expected_end_date = expected
+    for frame, expected_frame in zip(frames, expected_frames):
+        # カテゴリ型の列は文字列キャッシュが異なっても値が同じなら等しいとみなす
+        assert_frame_equal(frame, expected_frame, categorical_as_str=True)
+    assert (actual_start_date, actual_end_date) == (expected_start_date, expected_end_date)
+
+
+def spy_parse_sheets(reader, monkeypatch):
+    parsed = []
+    original_parse_sheets = reader.parse_sheets
+
+    def parse_sheets(file_path, sheet_entries, progress=None):
+        parsed.extend(entry.name for entry in sheet_entries)
+        return original_parse_sheets(file_path, sheet_entries, progress)
+
+    monkeypatch.setattr(reader, 'parse_sheets', parse_sheets)
+    return parsed
+
+
+def test_get_cache_dir(cache_config, tmp_path):
+    assert get_cache_dir(read_settings(cache_config)) == tmp_path / 'cache'
+
+    # cache_dir の指定がない場合は出力フォルダと同じ階層
+    del cache_config['PATHS']['cache_dir']
+    assert get_cache_dir(read_settings(cache_config)) == tmp_path / 'cache'
+
+    cache_config['Analysis']['use_cache'] = 'false'
+    assert get_cache_dir(read_settings(cache_config)) is None
+
+
+def test_cached_results_match_uncached(cache_config, workbook_path):
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 3)
+
+    cache_config['Analysis']['use_cache'] = 'false'
+    expected = ExcelTaskReader(cache_config).read_workbook(workbook_path, start_date, end_date)
+
+    cache_config['Analysis']['use_cache'] = 'true'
+    cold = ExcelTaskReader(cache_config).read_workbook(workbook_path, start_date, end_date)
+    warm = ExcelTaskReader(cache_config).read_workbook(workbook_path, start_date, end_date)
+
+    assert_results_equal(cold, expected)
+    assert_results_equal(warm, expected)
+
+
+def test_warm_run_reads_no_sheets(cache_config, workbook_path, tmp_path, monkeypatch):
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+    assert (tmp_path / 'cache' / 'manifest.json').exists()
+
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    tasks, *_ = reader.read_workbook(workbook_path, datetime(2024, 1, 2), datetime(2024, 1, 3))
+
+    assert parsed == []
+    assert tasks['content'].to_list() == ['クラーク業務2', 'クラーク業務3']
+
+
+def test_only_changed_sheets_are_reread(cache_config, workbook_path, monkeypatch):
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    # 1シートだけ編集する
+    wb = load_workbook(workbook_path)
+    wb['シート3']['B6'] = '会議'
+    wb['シート3']['C6'] = 60
+    wb.save(workbook_path)
+
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    tasks, *_ = reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert parsed == ['シート3']
+    assert tasks['content'].to_list() == ['クラーク業務1', 'クラーク業務2', 'クラーク業務3', '会議']
+
+
+def test_signature_change_discards_cache(cache_config, workbook_path, monkeypatch):
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    cache_config['Analysis']['end_row'] = '16'
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert parsed == ['シート1', 'シート2', 'シート3']
+
+
+def test_empty_cache_directory(tmp_path):
+    cache = SheetCache(tmp_path / 'missing')
+
+    assert cache.get_cached_dates({'シート1': 'abc'}) == {}
+    assert all(frame.is_empty() for frame in cache.get_records(['シート1']))
+
+
+def test_shared_strings_edit_rereads_only_edited_sheet(cache_config, workbook_path, monkeypatch):
+    # 共有文字列テーブルのあるブックでは、1シートの編集でテーブル全体が書き換わる
+    save_with_shared_strings(load_workbook(workbook_path), workbook_path)
+    with zipfile.ZipFile(workbook_path) as archive:
+        shared_strings_before = archive.read('xl/sharedStrings.xml')
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    wb = load_workbook(workbook_path)
+    wb['シート3']['B6'] = '会議'
+    wb['シート3']['C6'] = 60
+    save_with_shared_strings(wb, workbook_path)
+    with zipfile.ZipFile(workbook_path) as archive:
+        assert archive.read('xl/sharedStrings.xml') != shared_strings_before
+
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    tasks, *_ = reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert parsed == ['シート3']
+    assert tasks['content'].to_list() == ['クラーク業務1', 'クラーク業務2', 'クラーク業務3', '会議']
+
+
+def test_shared_string_value_change_rereads_sheet(cache_config, workbook_path, monkeypatch):
+    save_with_shared_strings(load_workbook(workbook_path), workbook_path)
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    # シートXMLは同じまま、参照している共有文字列の値だけを変更する
+    with zipfile.ZipFile(workbook_path) as source:
+        members = {name: source.read(name) for name in source.namelist()}
+    members['xl/sharedStrings.xml'] = members['xl/sharedStrings.xml'].replace(
+        'クラーク業務2'.encode('utf-8'), '会議'.encode('utf-8'))
+    with zipfile.ZipFile(workbook_path, 'w') as target:
+        for name, data in members.items():
+            target.writestr(name, data)
+
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    tasks, *_ = reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert parsed == ['シート2']
+    assert tasks['content'].to_list() == ['クラーク業務1', '会議', 'クラーク業務3']
+
+
+def test_toc_date_change_rereads_sheet(cache_config, workbook_path, monkeypatch):
+    wb = load_workbook(workbook_path)
+    toc = wb.create_sheet(title='シート一覧')
+    toc.append(['シート3', '2024年1月3日'])
+    wb.save(workbook_path)
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 5))
+
+    # シート一覧の日付だけを変更する
+    wb = load_workbook(workbook_path)
+    wb['シート一覧']['B1'] = '2024年1月5日'
+    wb.save(workbook_path)
+
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    tasks, *_, end_date = reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 5))
+
+    assert parsed == ['シート3']
+    assert end_date == '20240105'
+    assert tasks['date'].max() == datetime(2024, 1, 5)
+
+
+@pytest.mark.parametrize('backend', ['openpyxl', 'xml'])
+def test_same_reader_rereads_after_edit(cache_config, workbook_path, backend):
+    # 同じ読み込み処理で2回目以降に読み込む場合も、保持しているキャッシュと再読み込みの結果を結合できる
+    cache_config['Analysis']['reader_backend'] = backend
+    reader = ExcelTaskReader(cache_config)
+    reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+    reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    wb = load_workbook(workbook_path)
+    wb['シート2']['B6'] = '会議'
+    wb['シート2']['C6'] = 60
+    wb.save(workbook_path)
+
+    tasks, daily_tasks, communication_tasks, *_ = reader.read_workbook(
+        workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert tasks['content'].to_list() == ['クラーク業務1', 'クラーク業務2', '会議', 'クラーク業務3']
+    assert tasks['content'].dtype == pl.Categorical
+    assert communication_tasks['name'].to_list() == ['田中', '田中', '田中']
+    assert daily_tasks.height == 3
+
+
+def test_fingerprints_scan_only_sheets_in_range(cache_config, workbook_path, monkeypatch):
+    save_with_shared_strings(load_workbook(workbook_path), workbook_path)
+    scanned = []
+    original_indices = XlsxArchive.shared_string_indices
+
+    def shared_string_indices(archive, member):
+        scanned.append(member)
+        return original_indices(archive, member)
+
+    monkeypatch.setattr(XlsxArchive, 'shared_string_indices', shared_string_indices)
+
+    # キャッシュがない場合も期間外のシートのXMLは走査しない
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 2), datetime(2024, 1, 2))
+    assert scanned == ['xl/worksheets/sheet2.xml']
+
+    # 期間外のシートだけを編集した場合は、どのシートも走査・再読み込みしない
+    wb = load_workbook(workbook_path)
+    wb['シート3']['B6'] = '会議'
+    wb['シート3']['C6'] = 60
+    save_with_shared_strings(wb, workbook_path)
+    scanned.clear()
+    reader = ExcelTaskReader(cache_config)
+    parsed = spy_parse_sheets(reader, monkeypatch)
+    tasks, *_ = reader.read_workbook(workbook_path, datetime(2024, 1, 2), datetime(2024, 1, 2))
+
+    assert scanned == []
+    assert parsed == []
+    assert tasks['content'].to_list() == ['クラーク業務2']
+
+    # 期間を広げると、キャッシュにないシートと編集したシートだけを走査して読み込む
+    tasks, *_ = reader.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3))
+
+    assert scanned == ['xl/worksheets/sheet1.xml', 'xl/worksheets/sheet3.xml']
+    assert parsed == ['シート1', 'シート3']
+    assert tasks['content'].to_list() == ['クラーク業務1', 'クラーク業務2', 'クラーク業務3', '会議']
+
+
+def test_concurrent_writers_leave_a_consistent_cache(cache_config, workbook_path, tmp_path):
+    # 画面とサーバーなど、2つのプロセスが同じ保存先のキャッシュを順に更新する
+    first = ExcelTaskReader(cache_config)
+    second = ExcelTaskReader(cache_config)
+    first.read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 1))
+    second.read_workbook(workbook_path, datetime(2024, 1, 2), datetime(2024, 1, 2))
+    first.read_workbook(workbook_path, datetime(2024, 1, 3), datetime(2024, 1, 3))
+
+    cache_dir = tmp_path / 'cache'
+    with open(cache_dir / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    # マニフェストは最後に保存したファイルの組を参照し、最後に保存したプロセスが置き換えたファイルは削除される
+    parquet_files = {path.name for path in cache_dir.glob('*.parquet')}
+    assert set(manifest['files'].values()) <= parquet_files
+    assert not list(cache_dir.glob('*.tmp'))
+
+    cache = SheetCache(cache_dir, signature=first.cache.signature)
+    tasks, *_ = cache.get_records(list(manifest['sheets']))
+    assert tasks['sheet'].to_list() == list(manifest['sheets'])
+
+    # 競合して残ったファイルは古くなってから削除する
+    cache.remove_unused_files([])
+    assert {path.name for path in cache_dir.glob('*.parquet')} == parquet_files
+    for name in parquet_files - set(manifest['files'].values()):
+        os.utime(cache_dir / name, (0, 0))
+    cache.remove_unused_files([])
+    assert {path.name for path in cache_dir.glob('*.parquet')} == set(manifest['files'].values())
+
+
+def test_progress_counts_sheets_in_range(cache_config, workbook_path):
+    ExcelTaskReader(cache_config).read_workbook(workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+    # 2シートはキャッシュから取得し、キャッシュにない1シートだけを解析する
+    notified = []
+    progress = ProgressReporter(lambda stage, done, total: notified.append((done, total)))
+    ExcelTaskReader(cache_config).read_workbook(
+        workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3), progress=progress)
+
+    assert notified == [(0, 0), (0, 3), (2, 3), (3, 3)]
+    assert (progress.report.sheets_in_range, progress.report.sheets_parsed) == (3, 1)
+
+    # すべてキャッシュから取得する場合も完了として通知する
+    notified.clear()
+    ExcelTaskReader(cache_config).read_workbook(
+        workbook_path, datetime(2024, 1, 1), datetime(2024, 1, 3),
+        progress=ProgressReporter(lambda stage, done, total: notified.append((done, total))))
+
+    assert notified[-1] == (3, 3)
@@ -0,0 +1,78 @@
+import pytest
+import tempfile
+from datetime import datetime
+from openpyxl import Workbook
+from service_sheet_index import build_sheet_index, select_sheets
+from service_xlsx_archive import XlsxArchive
+
+
+def save_workbook(wb):
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+        wb.save(tmp.name)
+        return tmp.name
+
+
+@pytest.fixture
+def dated_workbook():
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    wb.create_sheet(title='シート1')['A1'] = '2024年1月1日'
+    wb.create_sheet(title='シート2')['A1'] = datetime(2024, 1, 2)
+    wb.create_sheet(title='シート3')['A1'] = '日付なし'
+    wb.create_sheet(title='シート一覧')
+
+    return save_workbook(wb)
+
+
+@pytest.fixture
+def toc_workbook():
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    toc = wb.create_sheet(title='シート一覧')
+    toc.append(['シート名', '日付'])
+    toc.append(['シート1', '2024年2月1日'])
+    toc.append(['シート2', datetime(2024, 2, 2)])
+
+    for index in range(1, 4):
+        wb.create_sheet(title=f'シート{index}')['A1'] = f'2024年1月{index}日'
+
+    return save_workbook(wb)
+
+
+def test_build_sheet_index_from_a1(dated_workbook):
+    with XlsxArchive(dated_workbook) as archive:
+        entries = build_sheet_index(archive)
+
+    assert [entry.name for entry in entries] == ['シート1', 'シート2', 'シート3']
+    assert entries[0].date == datetime(2024, 1, 1)
+    assert entries[1].date == datetime(2024, 1, 2)
+    # 日付として解釈できないシートは日付なしになる
+    assert entries[2].date is None
+
+
+def test_build_sheet_index_prefers_toc(toc_workbook):
+    with XlsxArchive(toc_workbook) as archive:
+        entries = {entry.name: entry.date for entry in build_sheet_index(archive)}
+
+    # シート一覧に載っているシートはその日付、載っていないシートはA1の日付
+    assert entries == {
+        'シート1': datetime(2024, 2, 1),
+        'シート2': datetime(2024, 2, 2),
+        'シート3': datetime(2024, 1, 3),
+    }
+
+
+def test_build_sheet_index_known_dates(dated_workbook):
+    with XlsxArchive(dated_workbook) as archive:
+        entries = build_sheet_index(archive, known_dates={'シート3': datetime(2024, 1, 3)})
+
+    assert entries[2].date == datetime(2024, 1, 3)
+
+
+def test_select_sheets(dated_workbook):
+    with XlsxArchive(dated_workbook) as archive:
+        entries = select_sheets(archive, datetime(2024, 1, 2), datetime(2024, 1, 31))
+
+    assert [entry.name for entry in entries] == ['シート2']
@@ -1,8 +1,16 @@
 import pytest
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import ANY, MagicMock, patch
 from datetime import datetime
 from service_task_analyzer import TaskAnalyzer
 
+# 設定の読み込み時に検証される行範囲
+ROW_BANDS = {
+    'start_row': '5', 'end_row': '15',
+    'daily_task_start_row': '20', 'daily_task_end_row': '25',
+    'communication_start_row': '30', 'communication_end_row': '35',
+}
+
 
 class TestTaskAnalyzer:
     @patch('service_task_analyzer.load_config')
@@ -16,17 +24,18 @@ class TestTaskAnalyzer:
                 'input_file_path': 'test_input.xlsx',
                 'template_path': 'test_template.xlsx',
                 'output_dir': 'test_output'
-            }
+            },
+            'Analysis': dict(ROW_BANDS)
         }
         mock_load_config.return_value = mock_config
         
         # テスト実行
         analyzer = TaskAnalyzer()
         
-        # 検証
-        assert analyzer.config == mock_config
-        assert analyzer.paths_config == mock_config['PATHS']
-        mock_reader.assert_called_once_with(mock_config)
+        # 検証（読み込み・集計・出力は設定ファイルから作成した Settings を使う）
+        assert analyzer.settings.paths.input_file_path == 'test_input.xlsx'
+        assert analyzer.paths == analyzer.settings.paths
+        mock_reader.assert_called_once_with(analyzer.settings)
         mock_analyzer.assert_called_once()
         mock_writer.assert_called_once()
 
@@ -41,7 +50,8 @@ class TestTaskAnalyzer:
                 'input_file_path': 'test_input.xlsx',
                 'template_path': 'test_template.xlsx',
                 'output_dir': 'test_output'
-            }
+            },
+            'Analysis': dict(ROW_BANDS)
         }
         mock_load_config.return_value = mock_config
         
@@ -60,13 +70,16 @@ class TestTaskAnalyzer:
         # アナライザーのモック
         mock_analyzer = MagicMock()
         mock_analyzer_class.return_value = mock_analyzer
-        mock_analyzer.analyze_task_data.return_value = (
-            'clerk_tasks',
-            'non_clerk_tasks',
-            'daily_tasks_agg',
-            'communication_by_name',
-            'communication_by_content',
-            'all_items_summary'
+        mock_analyzer.analyze.return_value = (
+            (
+                'clerk_tasks',
+                'non_clerk_tasks',
+                'daily_tasks_agg',
+                'communication_by_name',
+                'communication_by_content',
+                'all_items_summary'
+            ),
+            {'業務分類別': 'category_summary'}
         )
         
         # ライターのモック
@@ -76,10 +89,13 @@ class TestTaskAnalyzer:
         
         # テスト実行
         analyzer = TaskAnalyzer()
-        success, message = analyzer.run_analysis('2024-01-01', '2024-01-05')
+        with patch('service_task_analyzer.os.path.getsize', return_value=2048):
+            success, message, report = analyzer.run_analysis('2024-01-01', '2024-01-05')
         
         # 検証
         assert success is True
+        assert list(report.stage_seconds) == ['集計', '出力']
+        assert report.bytes_written == 2048
         assert '分析が完了しました' in message
         assert 'output_file_path.xlsx' in message
         
@@ -87,10 +103,11 @@ class TestTaskAnalyzer:
         mock_reader.read_workbook.assert_called_once_with(
             'test_input.xlsx',
             datetime(2024, 1, 1),
-            datetime(2024, 1, 5)
+            datetime(2024, 1, 5),
+            progress=ANY
         )
         
-        mock_analyzer.analyze_task_data.assert_called_once_with(
+        mock_analyzer.analyze.assert_called_once_with(
             [{'content': 'タスク1', 'minutes': 30}],
             [{'content': '日次タスク1', 'minutes': 10}],
             [{'name': '田中', 'content': '打合せ', 'minutes': 30}],
@@ -109,18 +126,20 @@ class TestTaskAnalyzer:
             'test_template.xlsx',
             'test_output',
             datetime(2024, 1, 1),
-            datetime(2024, 1, 5)
+            datetime(2024, 1, 5),
+            {'業務分類別': 'category_summary'},
+            backend='openpyxl'
         )
 
     @patch('service_task_analyzer.load_config')
     def test_run_analysis_date_format_error(self, mock_load_config):
         # モックの設定
-        mock_config = {'PATHS': {}}
+        mock_config = {'PATHS': {}, 'Analysis': dict(ROW_BANDS)}
         mock_load_config.return_value = mock_config
         
         # テスト実行 - 不正な日付形式
         analyzer = TaskAnalyzer()
-        success, message = analyzer.run_analysis('2024/01/01', '2024-01-05')
+        success, message, _ = analyzer.run_analysis('2024/01/01', '2024-01-05')
         
         # 検証
         assert success is False
@@ -135,7 +154,8 @@ class TestTaskAnalyzer:
                 'input_file_path': 'test_input.xlsx',
                 'template_path': 'test_template.xlsx',
                 'output_dir': 'test_output'
-            }
+            },
+            'Analysis': dict(ROW_BANDS)
         }
         mock_load_config.return_value = mock_config
         
@@ -146,9 +166,220 @@ class TestTaskAnalyzer:
         
         # テスト実行
         analyzer = TaskAnalyzer()
-        success, message = analyzer.run_analysis('2024-01-01', '2024-01-05')
+        success, message, _ = analyzer.run_analysis('2024-01-01', '2024-01-05')
         
         # 検証
         assert success is False
         assert '分析中にエラーが発生しました' in message
         assert 'テストエラー' in message
+
+    @patch('service_task_analyzer.load_config')
+    @patch('service_task_analyzer.ExcelTaskReader')
+    @patch('service_task_analyzer.TaskDataAnalyzer')
+    @patch('service_task_analyzer.ExcelResultWriter')
+    def test_run_analysis_cancelled(self, mock_writer_class, mock_analyzer_class, mock_reader_class, mock_load_config):
+        mock_load_config.return_value = {
+            'PATHS': {
+                'input_file_path': 'test_input.xlsx',
+                'template_path': 'test_template.xlsx',
+                'output_dir': 'test_output'
+            },
+            'Analysis': dict(ROW_BANDS)
+        }
+        mock_reader_class.return_value.read_workbook.return_value = ([], [], [], [], '20240101', '20240105')
+
+        # 読み込みの完了後にキャンセルされた場合は集計・出力を行わない
+        cancel_event = threading.Event()
+        cancel_event.set()
+        stages = []
+        analyzer = TaskAnalyzer()
+        success, message, _ = analyzer.run_analysis(
+            '2024-01-01', '2024-01-05',
+            progress_callback=lambda stage, done, total: stages.append(stage),
+            cancel_event=cancel_event
+        )
+
+        assert success is False
+        assert 'キャンセル' in message
+        assert stages == []
+        mock_analyzer_class.return_value.analyze.assert_not_called()
+        mock_writer_class.return_value.save_results.assert_not_called()
+
+    @patch('service_task_analyzer.load_config')
+    @patch('service_task_analyzer.ExcelTaskReader')
+    @patch('service_task_analyzer.TaskDataAnalyzer')
+    @patch('service_task_analyzer.ExcelResultWriter')
+    def test_run_batch(self, mock_writer_class, mock_analyzer_class, mock_reader_class, mock_load_config):
+        mock_load_config.return_value = {
+            'PATHS': {
+                'input_file_path': 'test_input.xlsx',
+                'template_path': 'test_template.xlsx',
+                'output_dir': 'test_output'
+            },
+            'Analysis': dict(ROW_BANDS)
+        }
+        mock_reader = mock_reader_class.return_value
+        mock_reader.read_workbook_ranges.return_value = [
+            (['1月'], [], [], [], '20240101', '20240131'),
+            None,
+        ]
+        mock_analyzer_class.return_value.analyze.return_value = (('results',), {})
+        mock_writer = mock_writer_class.return_value
+        mock_writer.save_results.return_value = 'output_file_path.xlsx'
+
+        date_ranges = [
+            (datetime(2024, 1, 1), datetime(2024, 1, 31)),
+            (datetime(2024, 2, 1), datetime(2024, 2, 29)),
+        ]
+        analyzer = TaskAnalyzer()
+        with patch('service_task_analyzer.os.path.getsize', return_value=100):
+            success, messages, report = analyzer.run_batch(date_ranges)
+
+        # ブックは1回だけ読み込み、データのある期間だけExcelを開かずに出力する
+        mock_reader.read_workbook_ranges.assert_called_once_with('test_input.xlsx', date_ranges, progress=ANY)
+        mock_writer.save_results.assert_called_once_with(
+            ('results',), 'test_template.xlsx', 'test_output',
+            datetime(2024, 1, 1), datetime(2024, 1, 31), {},
+            backend='openpyxl', open_output=False
+        )
+        assert success is False
+        assert messages[0] == '2024-01-01～2024-01-31: output_file_path.xlsx'
+        assert 'データがありません' in messages[1]
+        assert report.bytes_written == 100
+
+    @patch('service_task_analyzer.load_config')
+    @patch('service_task_analyzer.ExcelResultWriter')
+    def test_run_analysis_uses_daily_cube(self, mock_writer_class, mock_load_config, tmp_path):
+        import configparser
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        wb.remove(wb.active)
+        for day in range(1, 4):
+            sheet = wb.create_sheet(title=f'シート{day}')
+            sheet['A1'] = f'2024年1月{day}日'
+            sheet['B5'] = 'クラーク業務A'
+            sheet['C5'] = 10 * day
+        workbook_path = tmp_path / 'WILLDOリスト.xlsx'
+        wb.save(workbook_path)
+
+        config = configparser.ConfigParser()
+        config['PATHS'] = {
+            'input_file_path': str(workbook_path),
+            'template_path': 'test_template.xlsx',
+            'output_dir': str(tmp_path / 'output')
+        }
+        config['Analysis'] = {
+            'start_row': '5', 'end_row': '15',
+            'daily_task_start_row': '20', 'daily_task_end_row': '25',
+            'communication_start_row': '30', 'communication_end_row': '35',
+            'use_cache': 'true', 'use_cube': 'true'
+        }
+        mock_load_config.return_value = config
+        mock_writer_class.return_value.save_results.return_value = str(workbook_path)
+
+        analyzer = TaskAnalyzer()
+        with patch.object(analyzer.reader, 'read_sources', wraps=analyzer.reader.read_sources) as read_sources:
+            first = analyzer.run_analysis('2024-01-01', '2024-01-03')
+            second = analyzer.run_analysis('2024-01-02', '2024-01-03')
+
+        # ブックは日別集計を作るときに1回だけ読み込み、以降の期間は日別集計から求める
+        assert first[0] and second[0]
+        assert read_sources.call_count == 1
+        clerk_tasks = mock_writer_class.return_value.save_results.call_args.args[0][0]
+        assert clerk_tasks.rows() == [('クラーク業務A', 50.0, 0, 2)]
+        assert mock_writer_class.return_value.save_results.call_args.args[3] == datetime(2024, 1, 2)
+
+    @patch('service_task_analyzer.load_config')
+    @patch('service_task_analyzer.ExcelResultWriter')
+    def test_prepared_results_are_reused_until_workbook_changes(self, mock_writer_class, mock_load_config, tmp_path):
+        import configparser
+        import os
+        from openpyxl import Workbook, load_workbook
+
+        from task_progress import ProgressReporter
+
+        wb = Workbook()
+        sheet = wb.active
+        sheet.title = 'シート1'
+        sheet['A1'] = '2024年1月1日'
+        sheet['B5'] = 'クラーク業務A'
+        sheet['C5'] = 10
+        sheet = wb.create_sheet('シート2')
+        sheet['A1'] = '2024年1月2日'
+        sheet['B5'] = '会議'
+        sheet['C5'] = 30
+        workbook_path = tmp_path / 'WILLDOリスト.xlsx'
+        wb.save(workbook_path)
+
+        config = configparser.ConfigParser()
+        config['PATHS'] = {
+            'input_file_path': str(workbook_path),
+            'template_path': 'test_template.xlsx',
+            'output_dir': str(tmp_path / 'output'),
+            'cache_dir': str(tmp_path / 'cache')
+        }
+        config['Analysis'] = {
+            'start_row': '5', 'end_row': '15',
+            'daily_task_start_row': '20', 'daily_task_end_row': '25',
+            'communication_start_row': '30', 'communication_end_row': '35',
+            'use_cache': 'true'
+        }
+        mock_load_config.return_value = config
+        mock_writer_class.return_value.save_results.return_value = str(workbook_path)
+
+        analyzer = TaskAnalyzer()
+        assert analyzer.reader.cache is not None
+        start_date, end_date = datetime(2024, 1, 1), datetime(2024, 1, 31)
+        with patch.object(analyzer.reader, 'read_workbook', wraps=analyzer.reader.read_workbook) as read_workbook:
+            analysis_results, *_ = analyzer.prepare(start_date, end_date)
+            assert analysis_results[0].rows() == [('クラーク業務A', 10.0, 0, 1)]
+            success, _, report = analyzer.run_analysis('2024-01-01', '2024-01-31')
+
+            # 監視モードで集計済みの結果を使い、分析開始では出力だけを行う
+            assert success
+            assert read_workbook.call_count == 1
+            assert set(report.stage_seconds) == {'出力'}
+
+            wb = load_workbook(workbook_path)
+            wb['シート1']['C5'] = 20
+            wb.save(workbook_path)
+            stat = os.stat(workbook_path)
+            os.utime(workbook_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            progress = ProgressReporter()
+            analysis_results, *_ = analyzer.prepare(start_date, end_date, progress)
+
+        # 編集したシートだけを解析し直し、編集していないシートはキャッシュから取得する
+        assert read_workbook.call_count == 2
+        assert progress.report.sheets_parsed == 1
+        assert analysis_results[0].rows() == [('クラーク業務A', 20.0, 0, 1)]
+        assert analysis_results[1].rows() == [('会議', 30.0, 0, 1)]
+
+    @patch('service_task_analyzer.load_config')
+    @patch('service_task_analyzer.ExcelTaskReader')
+    @patch('service_task_analyzer.TaskDataAnalyzer')
+    @patch('service_task_analyzer.ExcelResultWriter')
+    def test_run_analysis_records_stage_memory(self, mock_writer_class, mock_analyzer_class, mock_reader_class,
+                                               mock_load_config):
+        import tracemalloc
+
+        mock_load_config.return_value = {
+            'PATHS': {
+                'input_file_path': 'test_input.xlsx',
+                'template_path': 'test_template.xlsx',
+                'output_dir': 'test_output'
+            },
+            'Analysis': {**ROW_BANDS, 'memory_profile': 'true'}
+        }
+        mock_reader_class.return_value.read_workbook.return_value = ([], [], [], [], '20240101', '20240105')
+        mock_analyzer_class.return_value.analyze.return_value = (('results',), {})
+        mock_writer_class.return_value.save_results.return_value = 'output_file_path.xlsx'
+
+        analyzer = TaskAnalyzer()
+        with patch('service_task_analyzer.os.path.getsize', return_value=100):
+            success, _, report = analyzer.run_analysis('2024-01-01', '2024-01-05')
+
+        assert success
+        assert set(report.stage_memory) == {'集計', '出力'}
+        assert {'peak_bytes', 'retained_bytes', 'rss_bytes', 'top_allocations'} <= set(report.stage_memory['出力'])
+        assert not tracemalloc.is_tracing()
@@ -0,0 +1,91 @@
+import pytest
+import polars as pl
+from config_manager import create_config_parser
+from task_categories import CategoryRule, CategoryTaxonomy, parse_pattern
+
+
+def classify(taxonomy, content):
+    return pl.DataFrame({'content': [content]}).select(taxonomy.category_expr().alias('category')).item()
+
+
+@pytest.fixture
+def category_config():
+    config = create_config_parser()
+    config['Categories'] = {
+        'default_category': 'その他',
+        '会議': 'prefix:会議, 打合せ',
+        '報告': r'regex:^(日報|週報)$',
+        'クラーク業務': 'クラーク業務',
+    }
+    return config
+
+
+def test_parse_pattern():
+    assert parse_pattern('会議', 'prefix:会議') == CategoryRule('会議', 'prefix', '会議')
+    assert parse_pattern('報告', 'regex:^日報$') == CategoryRule('報告', 'regex', '^日報$')
+    assert parse_pattern('会議', ' 打合せ ') == CategoryRule('会議', 'contains', '打合せ')
+
+
+def test_default_taxonomy():
+    taxonomy = CategoryTaxonomy.default()
+
+    assert classify(taxonomy, 'クラーク業務A') == 'クラーク業務'
+    assert classify(taxonomy, '会議') == 'クラーク以外業務'
+
+
+def test_from_config(category_config):
+    taxonomy = CategoryTaxonomy.from_config(category_config)
+
+    assert taxonomy.default_category == 'その他'
+    assert classify(taxonomy, '会議A') == '会議'
+    assert classify(taxonomy, '部署打合せ') == '会議'
+    # 前方一致のため途中に含まれる場合は一致しない
+    assert classify(taxonomy, '定例会議') == 'その他'
+    assert classify(taxonomy, '日報') == '報告'
+    assert classify(taxonomy, '日報作成') == 'その他'
+    assert classify(taxonomy, 'クラーク業務B') == 'クラーク業務'
+
+
+def test_from_config_without_section():
+    taxonomy = CategoryTaxonomy.from_config({'PATHS': {}})
+
+    assert taxonomy.rules == CategoryTaxonomy.default().rules
+
+
+def test_from_csv(tmp_path):
+    csv_path = tmp_path / 'categories.csv'
+    csv_path.write_text('category,pattern\n会議,prefix:会議\nクラーク業務,クラーク業務\n', encoding='utf-8')
+
+    taxonomy = CategoryTaxonomy.from_config({'PATHS': {'category_file': str(csv_path)}})
+
+    assert [rule.category for rule in taxonomy.rules] == ['会議', 'クラーク業務']
+    assert classify(taxonomy, '会議A') == '会議'
+
+
+def test_first_matching_rule_wins():
+    taxonomy = CategoryTaxonomy([
+        CategoryRule('会議', 'contains', '会議'),
+        CategoryRule('クラーク業務', 'contains', 'クラーク業務'),
+    ])
+
+    assert classify(taxonomy, 'クラーク業務会議') == '会議'
+
+
+def test_from_config_keeps_case_and_percent():
+    config = create_config_parser()
+    config.read_string(
+        '[Categories]\n'
+        'default_category = その他\n'
+        'Meeting = 会議\n'
+        '進捗 = regex:^進捗\\d+%$\n'
+    )
+
+    taxonomy = CategoryTaxonomy.from_config(config)
+
+    assert [rule.category for rule in taxonomy.rules] == ['Meeting', '進捗']
+    assert classify(taxonomy, '進捗50%') == '進捗'
+
+
+def test_invalid_regex_fails_on_load():
+    with pytest.raises(ValueError, match='業務分類 会議'):
+        parse_pattern('会議', 'regex:(会議')
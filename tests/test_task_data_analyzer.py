@@ -1,6 +1,7 @@
 import pytest
 import polars as pl
 from service_data_analyzer import TaskDataAnalyzer
+from task_records import to_categorical
 
 
 @pytest.fixture
@@ -63,6 +64,32 @@ class TestTaskDataAnalyzer:
         assert len(comm_df) == len(sample_communication_tasks)
         assert len(all_items_df) == len(sample_all_items)
 
+    def test_create_dataframes_accepts_frames(self, sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items):
+        # テスト準備 - 読み込み時に作成済みのカテゴリ型のデータフレーム
+        frames = [
+            to_categorical(pl.DataFrame(records))
+            for records in (sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items)
+        ]
+
+        # テスト実行
+        result = TaskDataAnalyzer.create_dataframes(*frames)
+
+        # 検証 - コピーせずにそのまま使われる
+        assert all(df is frame for df, frame in zip(result, frames))
+
+    def test_create_dataframes_uses_categorical(self, sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items):
+        # テスト実行
+        df, _, comm_df, _ = TaskDataAnalyzer.create_dataframes(
+            sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items
+        )
+
+        # 検証 - 業務内容・氏名はカテゴリ型、集計結果は文字列型
+        assert df.schema['content'] == pl.Categorical()
+        assert comm_df.schema['name'] == pl.Categorical()
+        result = TaskDataAnalyzer.aggregate_dataframe(comm_df)
+        assert result.schema['name'] == pl.String
+        assert result.schema['content'] == pl.String
+
     def test_aggregate_dataframe_without_filter(self, sample_tasks):
         # テスト準備
         df = pl.DataFrame(sample_tasks)
@@ -140,3 +167,121 @@ class TestTaskDataAnalyzer:
         
         # 全項目の確認
         assert len(all_items_summary) == 4
+
+    def test_analyze_matches_baseline(self, sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items):
+        # テスト実行
+        results, _ = TaskDataAnalyzer().analyze(
+            sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items
+        )
+
+        # 検証 - 1つのクエリプランにまとめる前の集計結果と列・行の順序まで一致する
+        task_columns = ['content', 'total_minutes', 'total_hours', 'frequency']
+        expected = [
+            (task_columns, [('クラーク業務A', 55, 0, 2), ('クラーク業務B', 45, 0, 1)]),
+            (task_columns, [('資料作成', 90, 1, 1), ('会議', 60, 1, 1)]),
+            (task_columns, [('毎日タスクB', 30, 0, 2), ('毎日タスクA', 20, 0, 2)]),
+            (['name', 'total_minutes', 'total_hours', 'frequency'],
+             [('佐藤', 75, 1, 2), ('田中', 55, 0, 2), ('鈴木', 15, 0, 1)]),
+            (['content', 'name', 'total_minutes', 'total_hours', 'frequency'],
+             [('レビュー', '佐藤', 75, 1, 2), ('打合せ', '田中', 55, 0, 2), ('相談', '鈴木', 15, 0, 1)]),
+            (task_columns, [('資料作成', 90, 1, 1), ('会議', 60, 1, 1), ('クラーク業務A', 30, 0, 1), ('毎日タスクA', 10, 0, 1)]),
+        ]
+        for result, (columns, rows) in zip(results, expected):
+            assert result.columns == columns
+            assert result.rows() == rows
+
+    def test_analyze_with_category_summary(self, sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items):
+        # テスト準備 - 会議を独立した分類にする
+        from task_categories import CategoryRule, CategoryTaxonomy
+        taxonomy = CategoryTaxonomy([
+            CategoryRule('クラーク業務', 'contains', 'クラーク業務'),
+            CategoryRule('会議', 'prefix', '会議'),
+        ], default_category='その他')
+        analyzer = TaskDataAnalyzer(taxonomy)
+
+        # テスト実行
+        results, extra_sheets = analyzer.analyze(
+            sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items
+        )
+
+        # 検証 - クラーク業務以外のシートは従来どおりクラーク業務以外のすべての業務
+        clerk_tasks, non_clerk_tasks = results[0], results[1]
+        assert set(clerk_tasks['content'].to_list()) == {'クラーク業務A', 'クラーク業務B'}
+        assert set(non_clerk_tasks['content'].to_list()) == {'会議', '資料作成'}
+
+        category_summary = extra_sheets['業務分類別']
+        assert category_summary.columns == ['category', 'total_minutes', 'total_hours', 'frequency']
+        assert category_summary.rows() == [
+            ('クラーク業務', 100, 1, 3),
+            ('その他', 90, 1, 1),
+            ('会議', 60, 1, 1),
+        ]
+
+    def test_analyze_with_rollups(self, sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items):
+        # テスト準備 - 日付を日時型にする
+        frames = [
+            pl.DataFrame(records).with_columns(pl.col('date').str.to_datetime('%Y-%m-%d'))
+            for records in (sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items)
+        ]
+        analyzer = TaskDataAnalyzer(rollup_periods=['day', 'month'])
+
+        # テスト実行
+        results, extra_sheets = analyzer.analyze(*frames)
+
+        # 検証 - 期間別のシートが日別・月別に追加される
+        assert list(extra_sheets) == [
+            '業務分類別',
+            'クラーク業務(日別)', 'クラーク以外業務(日別)', 'デイリータスク(日別)', 'コミュニケーション(日別)', '全項目(日別)',
+            'クラーク業務(月別)', 'クラーク以外業務(月別)', 'デイリータスク(月別)', 'コミュニケーション(月別)', '全項目(月別)',
+        ]
+        assert extra_sheets['クラーク業務(日別)'].rows() == [
+            ('2024-01-01', 'クラーク業務B', 45, 0, 1),
+            ('2024-01-01', 'クラーク業務A', 30, 0, 1),
+            ('2024-01-02', 'クラーク業務A', 25, 0, 1),
+        ]
+        assert extra_sheets['コミュニケーション(日別)'].columns == [
+            'period', 'name', 'total_minutes', 'total_hours', 'frequency'
+        ]
+
+        # 1か月分の期間別の集計は期間全体の集計と一致する
+        for rollup_name, result in zip(
+                ['クラーク業務', 'クラーク以外業務', 'デイリータスク', 'コミュニケーション', '全項目'],
+                [results[0], results[1], results[2], results[3], results[5]]):
+            monthly = extra_sheets[f'{rollup_name}(月別)']
+            assert monthly['period'].unique().to_list() == ['2024-01']
+            assert sorted(monthly.drop('period').rows()) == sorted(result.rows())
+
+    def test_get_rollup_periods(self):
+        from service_data_analyzer import get_rollup_periods
+        config = {'Analysis': {'rollup_periods': 'week, month'}}
+        assert get_rollup_periods(config) == ['week', 'month']
+        assert get_rollup_periods({'Analysis': {}}) == []
+
+        with pytest.raises(ValueError):
+            get_rollup_periods({'Analysis': {'rollup_periods': 'year'}})
+
+    def test_analyze_with_sources(self, sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items):
+        # テスト準備 - 1月1日のデータをブックA、それ以外をブックBとする
+        frames = [
+            pl.DataFrame(records).with_columns(
+                pl.when(pl.col('date') == '2024-01-01').then(pl.lit('A')).otherwise(pl.lit('B')).alias('source')
+            )
+            for records in (sample_tasks, sample_daily_tasks, sample_communication_tasks, sample_all_items)
+        ]
+
+        # テスト実行
+        results, extra_sheets = TaskDataAnalyzer().analyze(*frames)
+        combined, _ = TaskDataAnalyzer().analyze(*[frame.drop('source') for frame in frames])
+
+        # 検証 - 6種類の集計はすべてのブックを合わせた集計のまま
+        for result, expected in zip(results, combined):
+            assert result.rows() == expected.rows()
+        assert extra_sheets['クラーク業務(ファイル別)'].rows() == [
+            ('A', 'クラーク業務B', 45, 0, 1),
+            ('A', 'クラーク業務A', 30, 0, 1),
+            ('B', 'クラーク業務A', 25, 0, 1),
+        ]
+        assert extra_sheets['コミュニケーション(ファイル別)'].columns == [
+            'source', 'name', 'total_minutes', 'total_hours', 'frequency'
+        ]
+        assert set(extra_sheets) >= {'クラーク以外業務(ファイル別)', 'デイリータスク(ファイル別)', '全項目(ファイル別)'}
@@ -0,0 +1,74 @@
+import tracemalloc
+
+from task_memory import StageMemoryProfiler, get_rss_bytes, is_memory_profile_enabled
+from task_progress import ProgressReporter
+
+
+def allocate(size):
+    return bytearray(size)
+
+
+def test_stage_memory_is_recorded():
+    memory = StageMemoryProfiler()
+    memory.start()
+    try:
+        progress = ProgressReporter(memory=memory)
+        progress.start_stage('読み込み')
+        kept = allocate(4_000_000)
+        allocate(8_000_000)
+        progress.start_stage('集計')
+        progress.finish_stage()
+    finally:
+        memory.stop()
+
+    read = progress.report.stage_memory['読み込み']
+    assert read['peak_bytes'] >= 12_000_000
+    assert 4_000_000 <= read['retained_bytes'] < 8_000_000
+    assert read['top_allocations'][0]['site'].endswith(f'test_task_memory.py:{allocate.__code__.co_firstlineno + 1}')
+    assert read['top_allocations'][0]['size_bytes'] >= 4_000_000
+    assert progress.report.stage_memory['集計']['retained_bytes'] < 1_000_000
+    assert 'メモリ 読み込み' in progress.report.format_summary()
+    assert not tracemalloc.is_tracing()
+    del kept
+
+
+def test_repeated_stage_is_merged():
+    memory = StageMemoryProfiler()
+    memory.start()
+    try:
+        progress = ProgressReporter(memory=memory)
+        kept = []
+        for size in (1_000_000, 3_000_000):
+            progress.start_stage('出力')
+            kept.append(allocate(size))
+            progress.finish_stage()
+    finally:
+        memory.stop()
+
+    write = progress.report.stage_memory['出力']
+    assert write['peak_bytes'] >= 3_000_000
+    assert write['retained_bytes'] >= 4_000_000
+    assert write['top_allocations'][0]['size_bytes'] >= 4_000_000
+
+
+def test_memory_is_not_recorded_by_default():
+    progress = ProgressReporter()
+    progress.start_stage('読み込み')
+    progress.finish_stage()
+
+    assert progress.report.stage_memory == {}
+    assert progress.report.to_dict()['stage_memory'] == {}
+    assert 'メモリ' not in progress.report.format_summary()
+
+
+def test_is_memory_profile_enabled(monkeypatch):
+    monkeypatch.delenv('TASK_ANALYZER_MEMORY', raising=False)
+    assert not is_memory_profile_enabled({'Analysis': {}})
+    assert is_memory_profile_enabled({'Analysis': {'memory_profile': 'true'}})
+    monkeypatch.setenv('TASK_ANALYZER_MEMORY', '1')
+    assert is_memory_profile_enabled({'Analysis': {}})
+
+
+def test_get_rss_bytes():
+    rss = get_rss_bytes()
+    assert rss is None or rss > 0
@@ -0,0 +1,52 @@
+from datetime import datetime
+import polars as pl
+from task_records import (
+    TASK_SCHEMA, TaskRecordBuffer, concat_record_frames,
+    create_record_buffers, empty_record_frames, to_categorical
+)
+
+
+def test_buffer_to_frame():
+    buffer = TaskRecordBuffer(TASK_SCHEMA)
+    buffer.append('シート1', datetime(2024, 1, 1), '会議', 30.0)
+    buffer.append('シート1', datetime(2024, 1, 1), '資料作成', 60.0)
+
+    frame = buffer.to_frame()
+
+    assert len(buffer) == 2
+    assert frame.schema == pl.Schema(TASK_SCHEMA)
+    assert frame['content'].to_list() == ['会議', '資料作成']
+
+
+def test_to_categorical():
+    frame = pl.DataFrame({'content': ['会議', '会議'], 'minutes': [30.0, 60.0]})
+
+    result = to_categorical(frame)
+
+    assert result.schema['content'] == pl.Categorical()
+    # 変換する列がなければコピーせずにそのまま返す
+    assert to_categorical(result) is result
+
+
+def test_empty_buffers_keep_schema():
+    frames = tuple(buffer.to_frame() for buffer in create_record_buffers())
+
+    assert all(frame.is_empty() for frame in frames)
+    assert frames[2].columns == ['sheet', 'date', 'name', 'content', 'minutes']
+    assert [frame.schema for frame in frames] == [frame.schema for frame in empty_record_frames()]
+
+
+def test_concat_record_frames_keeps_order():
+    first = create_record_buffers()
+    first[0].append('シート1', datetime(2024, 1, 1), '会議', 30.0)
+    second = create_record_buffers()
+    second[0].append('シート2', datetime(2024, 1, 2), '資料作成', 60.0)
+
+    with pl.StringCache():
+        tasks, *_ = concat_record_frames([
+            tuple(buffer.to_frame() for buffer in first),
+            tuple(buffer.to_frame() for buffer in second),
+        ])
+
+    assert tasks['sheet'].to_list() == ['シート1', 'シート2']
+    assert all(frame.is_empty() for frame in concat_record_frames([]))
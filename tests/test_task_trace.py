@@ -0,0 +1,82 @@
+import json
+import configparser
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+import task_trace
+from service_excel_reader import ExcelTaskReader
+from task_trace import TRACE_ENV_VAR, is_trace_enabled, span, start_tracing, stop_tracing
+
+
+@pytest.fixture
+def tracer():
+    tracer = start_tracing()
+    yield tracer
+    stop_tracing()
+
+
+def test_span_is_noop_when_disabled():
+    assert stop_tracing() is None
+    # 無効な場合は同じ何もしないコンテキストを返す
+    assert span('parse_sheet', sheet='シート1') is task_trace._NULL_SPAN
+    with span('parse_sheet'):
+        pass
+
+
+def test_nested_spans_saved_as_chrome_trace(tracer, tmp_path):
+    with span('outer'):
+        with span('inner', sheet='シート1'):
+            pass
+
+    path = tracer.save(tmp_path / 'trace' / 'trace.json')
+    events = json.loads(path.read_text(encoding='utf-8'))['traceEvents']
+
+    inner, outer = events
+    assert (inner['name'], outer['name']) == ('inner', 'outer')
+    assert inner['ph'] == outer['ph'] == 'X'
+    assert inner['args'] == {'sheet': 'シート1'}
+    # 内側の区間は外側の区間に含まれる
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+
+def test_is_trace_enabled(monkeypatch):
+    config = configparser.ConfigParser()
+    config['Analysis'] = {}
+    monkeypatch.delenv(TRACE_ENV_VAR, raising=False)
+    assert not is_trace_enabled(config)
+
+    config['Analysis']['trace'] = 'true'
+    assert is_trace_enabled(config)
+
+    config['Analysis']['trace'] = 'false'
+    monkeypatch.setenv(TRACE_ENV_VAR, '1')
+    assert is_trace_enabled(config)
+
+
+def test_reader_records_span_per_sheet(tracer, tmp_path):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for day in range(1, 3):
+        sheet = wb.create_sheet(title=f'シート{day}')
+        sheet['A1'] = f'2024年1月{day}日'
+        sheet['B5'] = '会議'
+        sheet['C5'] = 30
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    wb.save(path)
+
+    config = configparser.ConfigParser()
+    config['Analysis'] = {
+        'start_row': '5',
+        'end_row': '15',
+        'daily_task_start_row': '20',
+        'daily_task_end_row': '25',
+        'communication_start_row': '30',
+        'communication_end_row': '35'
+    }
+    ExcelTaskReader(config).read_workbook(str(path), datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+    sheet_spans = [event['args']['sheet'] for event in tracer.events if event['name'] == 'parse_sheet']
+    assert sheet_spans == ['シート1', 'シート2']
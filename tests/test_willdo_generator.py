@@ -0,0 +1,60 @@
+import configparser
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+from polars.testing import assert_frame_equal
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+from service_excel_reader import ExcelTaskReader  # noqa: E402
+from willdo_generator import generate_workbook  # noqa: E402
+
+
+@pytest.fixture
+def generator_config():
+    config = configparser.ConfigParser()
+    config['Analysis'] = {
+        'start_row': '4', 'end_row': '24',
+        'communication_start_row': '26', 'communication_end_row': '34',
+        'daily_task_start_row': '37', 'daily_task_end_row': '42',
+        'use_cache': 'false'
+    }
+    return config
+
+
+def read_generated(config, path):
+    reader = ExcelTaskReader(config)
+    return reader.read_workbook(str(path), datetime(2024, 1, 1), datetime(2024, 12, 31))
+
+
+def test_generated_workbook_is_deterministic(generator_config, tmp_path):
+    row_bands = ExcelTaskReader(generator_config).get_row_bands()
+    first = generate_workbook(tmp_path / 'first.xlsx', 10, row_bands=row_bands)
+    second = generate_workbook(tmp_path / 'second.xlsx', 10, row_bands=row_bands)
+
+    for frame, expected in zip(read_generated(generator_config, first)[:4],
+                               read_generated(generator_config, second)[:4]):
+        assert_frame_equal(frame, expected, categorical_as_str=True)
+
+
+def test_generated_workbook_layout(generator_config, tmp_path):
+    row_bands = ExcelTaskReader(generator_config).get_row_bands()
+    path = generate_workbook(tmp_path / 'WILLDOリスト.xlsx', 20, row_bands=row_bands, fill_ratio=0.5)
+
+    wb = load_workbook(path, read_only=True)
+    assert wb.sheetnames[0] == 'シート一覧'
+    assert len(wb.sheetnames) == 21
+    values = [row[2] for sheet in wb.worksheets[1:] for row in sheet.iter_rows(min_row=2, values_only=True)
+              if len(row) > 2 and row[2] is not None]
+    assert '*' in values
+    assert any(isinstance(value, str) and value != '*' and not value.isdigit() for value in values)
+
+    tasks, daily_tasks, comm_tasks, all_items, start_date, end_date = read_generated(generator_config, path)
+    assert (start_date, end_date) == ('20240101', '20240120')
+    assert comm_tasks['name'].n_unique() > 1
+    assert daily_tasks.height > 0 and tasks.height > 0
+    # すべての行を埋めた場合より少ない
+    assert all_items.height < 20 * (42 - 4 + 1)
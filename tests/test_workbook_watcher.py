@@ -0,0 +1,83 @@
+import configparser
+import os
+
+from service_workbook_watcher import DEFAULT_WATCH_INTERVAL, WorkbookWatcher, get_watch_interval
+
+
+def touch(path, content, mtime_ns):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_change_is_reported_after_it_settles(tmp_path):
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    touch(path, b'a', 1_000_000_000)
+    changes = []
+    watcher = WorkbookWatcher(str(path), lambda: changes.append(True), interval=0.01)
+
+    assert watcher.poll() is False
+
+    # 保存中（確認するたびに変わる）の間は呼ばない
+    touch(path, b'ab', 2_000_000_000)
+    assert watcher.poll() is False
+    touch(path, b'abc', 3_000_000_000)
+    assert watcher.poll() is False
+    assert changes == []
+
+    # 同じ状態が続いたら1回だけ呼ぶ
+    assert watcher.poll() is True
+    assert watcher.poll() is False
+    assert changes == [True]
+
+
+def test_missing_file_is_not_a_change(tmp_path):
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    touch(path, b'a', 1_000_000_000)
+    changes = []
+    watcher = WorkbookWatcher(str(path), lambda: changes.append(True))
+
+    path.unlink()
+    assert watcher.poll() is False
+    assert watcher.poll() is False
+    assert changes == []
+
+
+def test_on_change_error_does_not_stop_watching(tmp_path, capsys):
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    touch(path, b'a', 1_000_000_000)
+
+    def on_change():
+        raise RuntimeError('読み込みエラー')
+
+    watcher = WorkbookWatcher(str(path), on_change)
+    touch(path, b'ab', 2_000_000_000)
+    watcher.poll()
+
+    assert watcher.poll() is True
+    assert '読み込みエラー' in capsys.readouterr().out
+
+
+def test_start_and_stop(tmp_path):
+    path = tmp_path / 'WILLDOリスト.xlsx'
+    touch(path, b'a', 1_000_000_000)
+    watcher = WorkbookWatcher(str(path), lambda: None, interval=0.01)
+
+    watcher.start()
+    assert watcher.thread.is_alive()
+    watcher.stop()
+    assert watcher.thread is None
+
+
+def test_get_watch_interval():
+    config = configparser.ConfigParser()
+    config['Analysis'] = {}
+    assert get_watch_interval(config) is None
+
+    config['Analysis']['watch'] = 'true'
+    assert get_watch_interval(config) == DEFAULT_WATCH_INTERVAL
+
+    config['Analysis']['watch_interval'] = '2'
+    assert get_watch_interval(config) == 2.0
+
+    config['Analysis']['watch_interval'] = 'abc'
+    assert get_watch_interval(config) == DEFAULT_WATCH_INTERVAL
@@ -0,0 +1,99 @@
+import pytest
+import tempfile
+import zipfile
+from datetime import datetime
+from openpyxl import Workbook
+from service_xlsx_archive import XlsxArchive, column_index
+
+
+WORKBOOK_XML = (
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="2024年1月1日" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+
+RELS_XML = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/></Relationships>'
+)
+
+SHARED_STRINGS_XML = (
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<si><t>2024年1月1日</t></si>'
+    '<si><r><t>打合せ</t></r><r><t>(田中)</t></r><rPh sb="0" eb="3"><t>ウチアワセ</t></rPh></si>'
+    '</sst>'
+)
+
+SHEET_XML = (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    '<row r="1"><c r="A1" t="s"><v>0</v></c></row>'
+    '<row r="5"><c r="B5" t="s"><v>1</v></c><c r="C5"><v>30</v></c><c r="D5"><v>99</v></c></row>'
+    '<row r="6"><c r="B6" t="inlineStr"><is><t>会議</t></is></c><c r="C6"><f>10+5</f><v>15</v></c></row>'
+    '<row r="7"><c r="A7" t="d"><v>2024-01-03T00:00:00</v></c></row>'
+    '<row r="50"><c r="B50" t="s"><v>1</v></c></row>'
+    '</sheetData></worksheet>'
+)
+
+
+@pytest.fixture
+def shared_strings_workbook():
+    # Excelが保存する形式(共有文字列・ふりがな付き)のxlsxを直接作成
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+        with zipfile.ZipFile(tmp, 'w') as archive:
+            archive.writestr('xl/workbook.xml', WORKBOOK_XML)
+            archive.writestr('xl/_rels/workbook.xml.rels', RELS_XML)
+            archive.writestr('xl/sharedStrings.xml', SHARED_STRINGS_XML)
+            archive.writestr('xl/worksheets/sheet1.xml', SHEET_XML)
+        return tmp.name
+
+
+def test_column_index():
+    assert column_index('A') == 1
+    assert column_index('C') == 3
+    assert column_index('AA') == 27
+
+
+def test_sheet_list(shared_strings_workbook):
+    with XlsxArchive(shared_strings_workbook) as archive:
+        assert archive.sheets == [('2024年1月1日', 'xl/worksheets/sheet1.xml')]
+        assert archive.get_member('2024年1月1日') == 'xl/worksheets/sheet1.xml'
+        assert archive.member_crc('xl/worksheets/sheet1.xml') != 0
+
+
+def test_shared_strings_exclude_phonetic(shared_strings_workbook):
+    with XlsxArchive(shared_strings_workbook) as archive:
+        assert archive.shared_strings == ['2024年1月1日', '打合せ(田中)']
+
+
+def test_iter_rows(shared_strings_workbook):
+    with XlsxArchive(shared_strings_workbook) as archive:
+        rows = dict(archive.iter_rows('xl/worksheets/sheet1.xml', max_row=10))
+
+    # D列と max_row を超える行は読み込まない
+    assert rows == {
+        1: ('2024年1月1日', None, None),
+        5: (None, '打合せ(田中)', 30),
+        6: (None, '会議', '=10+5'),
+        7: (datetime(2024, 1, 3), None, None),
+    }
+
+
+def test_iter_rows_formula_values(shared_strings_workbook):
+    with XlsxArchive(shared_strings_workbook) as archive:
+        rows = dict(archive.iter_rows('xl/worksheets/sheet1.xml', max_row=10, keep_formulas=False))
+
+    assert rows[6] == (None, '会議', 15)
+
+
+def test_read_cell_date_style():
+    # 日付書式のセルは datetime に変換される
+    wb = Workbook()
+    wb.active['A1'] = datetime(2024, 1, 2)
+    with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
+        wb.save(tmp.name)
+
+    with XlsxArchive(tmp.name) as archive:
+        member = archive.sheets[0][1]
+        assert archive.read_cell(member, 1, 1) == datetime(2024, 1, 2)